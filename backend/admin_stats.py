@@ -0,0 +1,130 @@
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Admin dashboard totals.
+#
+# Collection totals come from estimated_document_count (collection metadata,
+# no scan); the dashboard only needs them approximately. The number of houses
+# awaiting approval is kept exact in a `platform_counters` document that every
+# house write adjusts through `record_pending_houses`. A background task
+# refreshes one shared snapshot, so dashboard loads never touch MongoDB.
+#
+# Deltas only apply to an existing counter; a missing one is seeded with an
+# exact count, which already includes the write that triggered it.
+
+PENDING_STATUS = "pending_approval"
+PENDING_COUNTER_ID = "pending_houses"
+# Bump when the counter changes meaning; startup recounts older counters once
+PENDING_COUNTER_VERSION = 2
+
+
+async def _seed_pending_houses(db) -> None:
+    exact = await db.houses.count_documents({"status": PENDING_STATUS})
+    await db.platform_counters.update_one(
+        {"_id": PENDING_COUNTER_ID},
+        {"$setOnInsert": {"value": exact, "version": PENDING_COUNTER_VERSION}},
+        upsert=True
+    )
+
+
+async def record_pending_houses(db, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+    """Adjust the pending-approval counter for a house create, update or delete."""
+    delta = int(bool(after) and after.get("status") == PENDING_STATUS)
+    delta -= int(bool(before) and before.get("status") == PENDING_STATUS)
+    if delta:
+        result = await db.platform_counters.update_one(
+            {"_id": PENDING_COUNTER_ID}, {"$inc": {"value": delta}}
+        )
+        if result.matched_count == 0:
+            # An upserted $inc would hold only this delta
+            await _seed_pending_houses(db)
+
+
+async def pending_houses(db) -> int:
+    counter = await db.platform_counters.find_one({"_id": PENDING_COUNTER_ID})
+    if counter is None:
+        # First run against existing data: seed the counter with an exact count
+        await _seed_pending_houses(db)
+        counter = await db.platform_counters.find_one({"_id": PENDING_COUNTER_ID})
+    return counter["value"]
+
+
+async def migrate_pending_houses(db) -> bool:
+    """Recount a counter written before PENDING_COUNTER_VERSION. True if it did."""
+    counter = await db.platform_counters.find_one({"_id": PENDING_COUNTER_ID})
+    if counter is None or counter.get("version", 1) >= PENDING_COUNTER_VERSION:
+        return False
+    # Version 1 upserted the first delta, which could leave out existing houses
+    exact = await db.houses.count_documents({"status": PENDING_STATUS})
+    await db.platform_counters.update_one(
+        {"_id": PENDING_COUNTER_ID},
+        {"$set": {"value": exact, "version": PENDING_COUNTER_VERSION}}
+    )
+    return True
+
+
+class AdminStatsSnapshot:
+    """Admin dashboard totals, refreshed every ``refresh_interval`` seconds"""
+
+    def __init__(self, refresh_interval: float = 30):
+        self.refresh_interval = refresh_interval
+        self._stats: Optional[Dict[str, int]] = None
+        self._taken_at: Optional[datetime] = None
+        self._taken_monotonic = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db) -> None:
+        total_users, total_houses, total_bookings, pending = await asyncio.gather(
+            db.users.estimated_document_count(),
+            db.houses.estimated_document_count(),
+            db.bookings.estimated_document_count(),
+            pending_houses(db)
+        )
+        self._stats = {
+            "total_users": total_users,
+            "total_houses": total_houses,
+            "pending_houses": pending,
+            "total_bookings": total_bookings,
+        }
+        self._taken_at = datetime.now(timezone.utc)
+        self._taken_monotonic = time.monotonic()
+
+    async def get(self, db) -> Dict[str, Any]:
+        if self._stats is None:
+            # Before the first background refresh has landed
+            async with self._lock:
+                if self._stats is None:
+                    await self.refresh(db)
+        return {
+            **self._stats,
+            "snapshot_taken_at": self._taken_at.isoformat(),
+            "snapshot_age_seconds": round(time.monotonic() - self._taken_monotonic, 3),
+        }
+
+    async def _run(self, db) -> None:
+        while True:
+            try:
+                await self.refresh(db)
+            except Exception as e:
+                # Keep serving the previous snapshot; its age shows it is stale
+                logger.error(f"Admin stats refresh failed: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self, db) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
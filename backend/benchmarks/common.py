@@ -0,0 +1,109 @@
+"""Shared helpers for the backend benchmarks.
+
+Run benchmarks from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.login_bench --logins 200
+
+By default the app talks to an in-process MongoDB stand-in (``mongomock-motor``,
+a development-only dependency). Pass ``--mongo-url`` to benchmark against a
+real MongoDB server instead; the benchmark database is dropped afterwards.
+"""
+import os
+import time
+import math
+from typing import Dict, List, Optional
+
+import httpx
+
+# No background Chapa health probe: it would call the real gateway and add
+# its own traffic to the measurements. Read by server's startup handler.
+os.environ.setdefault("CHAPA_PROBE_INTERVAL", "0")
+
+import server
+
+
+def use_database(mongo_url: Optional[str] = None, db_name: str = "woliso_bench"):
+    """Point ``server`` at a benchmark database and return it."""
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from metrics import MongoCommandTimer
+        client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandTimer()])
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("Install mongomock-motor or pass --mongo-url to run benchmarks")
+        client = AsyncMongoMockClient()
+    server.client = client
+    server.db = client[db_name]
+    return server.db
+
+
+def use_stub_gateway(stub):
+    """Route every Chapa call the app makes to a ``StubGateway`` and return the client."""
+    from chapa_service import ChapaService
+
+    gateway = ChapaService(secret_key="stub", base_url="http://stub", transport=stub.transport())
+    gateway.observers = list(server.chapa_service.observers)
+    server.chapa_service = gateway
+    server.payment_confirmer.gateway = gateway
+    server.payment_reconciler.gateway = gateway
+    return gateway
+
+
+async def drop_database(db) -> None:
+    await db.client.drop_database(db.name)
+
+
+def make_client(app=None) -> httpx.AsyncClient:
+    """HTTP client that calls the ASGI app in-process (same event loop)."""
+    transport = httpx.ASGITransport(app=app or server.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+
+async def run_startup(app=None) -> None:
+    for handler in (app or server.app).router.on_startup:
+        await handler()
+
+
+async def run_shutdown(app=None) -> None:
+    for handler in (app or server.app).router.on_shutdown:
+        await handler()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Summarize latencies (seconds) into count, throughput and p50/p95/p99 in ms."""
+    return {
+        "count": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def print_table(rows: Dict[str, Dict[str, float]], columns: Optional[List[str]] = None) -> None:
+    columns = columns or ["count", "rps", "p50_ms", "p95_ms", "p99_ms"]
+    width = max([len(name) for name in rows] + [10])
+    print(f"{'name':<{width}}  " + "  ".join(f"{c:>9}" for c in columns))
+    for name, row in rows.items():
+        print(f"{name:<{width}}  " + "  ".join(f"{row.get(c, ''):>9}" for c in columns))
+
+
+class Timer:
+    """Context manager that records elapsed wall time in ``elapsed``."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
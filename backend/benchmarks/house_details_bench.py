@@ -0,0 +1,131 @@
+"""Latency of loading the house details page: separate calls vs /full.
+
+The old page issued one request per part (house, feedback, saved state,
+the tenant's bookings); ``GET /api/houses/{id}/full`` returns all of them in
+one response. In-process calls have no network cost, so ``--rtt-ms`` adds a
+simulated round trip to every request to model a real client.
+
+    python -m benchmarks.house_details_bench --pages 200 --rtt-ms 40
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+import server
+from benchmarks.common import (
+    use_database, drop_database, make_client, run_startup, run_shutdown,
+    summarize, print_table
+)
+from ratings import empty_rating_fields
+from location_search import location_fields
+
+
+async def seed(db, feedback_count: int) -> str:
+    house_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    await db.houses.insert_one({
+        "house_id": house_id,
+        "landlord_id": str(uuid.uuid4()),
+        "title": "Bench house",
+        "description": "Two rooms near the market",
+        "location": "Woliso Town",
+        "price_per_month": 3500,
+        "num_rooms": 2,
+        "status": "available",
+        "photos": [],
+        "created_at": now,
+        **location_fields("Woliso Town"),
+        **empty_rating_fields()
+    })
+    if feedback_count:
+        await db.feedbacks.insert_many([{
+            "feedback_id": str(uuid.uuid4()),
+            "tenant_id": str(uuid.uuid4()),
+            "house_id": house_id,
+            "rating": 1 + i % 5,
+            "comment": "Nice place",
+            "submitted_at": now
+        } for i in range(feedback_count)])
+    return house_id
+
+
+class DelayTransport(httpx.AsyncBaseTransport):
+    """Adds a fixed round-trip delay in front of another transport."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, rtt: float):
+        self.inner = inner
+        self.rtt = rtt
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self.rtt)
+        return await self.inner.handle_async_request(request)
+
+
+async def run(args):
+    db = use_database(args.mongo_url)
+    await run_startup()
+    house_id = await seed(db, args.feedback)
+
+    async with make_client() as client:
+        response = await client.post("/api/auth/register", json={
+            "email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "bench-password",
+            "full_name": "Bench Tenant", "role": "tenant"
+        })
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    transport = DelayTransport(httpx.ASGITransport(app=server.app), args.rtt_ms / 1000)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        separate_urls = [
+            f"/api/houses/{house_id}",
+            f"/api/houses/{house_id}/feedback",
+            f"/api/tenant/is-saved/{house_id}",
+            "/api/bookings/my-requests",
+        ]
+
+        async def sequential():
+            for url in separate_urls:
+                (await client.get(url, headers=headers)).raise_for_status()
+
+        async def parallel():
+            for response in await asyncio.gather(*(client.get(url, headers=headers) for url in separate_urls)):
+                response.raise_for_status()
+
+        async def composite():
+            (await client.get(f"/api/houses/{house_id}/full", headers=headers)).raise_for_status()
+
+        rows = {}
+        for name, flow in (
+            ("4 calls, sequential", sequential),
+            ("4 calls, parallel", parallel),
+            ("GET /full", composite),
+        ):
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(args.pages):
+                page_start = time.perf_counter()
+                await flow()
+                latencies.append(time.perf_counter() - page_start)
+            rows[name] = summarize(latencies, time.perf_counter() - start)
+
+    print(f"simulated round trip: {args.rtt_ms} ms, feedback rows: {args.feedback}")
+    print_table(rows)
+
+    await run_shutdown()
+    await drop_database(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", help="benchmark against a real MongoDB")
+    parser.add_argument("--pages", type=int, default=200, help="page loads per flow")
+    parser.add_argument("--feedback", type=int, default=30)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
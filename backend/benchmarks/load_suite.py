@@ -0,0 +1,498 @@
+"""Mixed tenant, landlord and admin traffic against the whole API.
+
+Seeds the benchmark database with synthetic data (``benchmarks.seed``), points
+the app's Chapa client at the in-process stub gateway
+(``benchmarks.stub_gateway``) and runs ``--concurrency`` virtual users against
+``server.app``. Each virtual user is a tenant, landlord or admin (``--mix``)
+issuing that role's typical requests back to back. Reports throughput and
+p50/p95/p99 latency per route template, plus 4xx/5xx counts.
+
+Runs are comparable across commits: the data and each virtual user's request
+sequence are deterministic for a given ``--seed``, ``--json`` stores the
+results with the commit and configuration, and ``--compare`` checks a run
+against an earlier ``--json`` file, exiting non-zero when a route's p95
+latency or throughput regressed by more than ``--threshold`` percent.
+
+In-process runs share one event loop between the virtual users, the app and
+the stub gateway, so absolute latencies include waiting for each other's CPU
+time; routes that fan out into concurrent tasks (``/houses/{id}/full``) are
+hit hardest. Compare runs made with the same settings on the same machine,
+and use ``--mongo-url`` with larger volumes for numbers closer to production.
+
+    python -m benchmarks.load_suite --requests 5000 --concurrency 50 --json before.json
+    python -m benchmarks.load_suite --requests 5000 --concurrency 50 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import server
+from benchmarks.common import (
+    use_database, use_stub_gateway, drop_database, make_client, run_startup, run_shutdown,
+    summarize, print_table
+)
+from benchmarks.seed import LOCATIONS, SeedVolumes, seed_database
+from benchmarks.stub_gateway import StubGateway
+
+COLUMNS = ["count", "rps", "p50_ms", "p95_ms", "p99_ms", "4xx", "5xx"]
+
+
+class Recorder:
+    """Latencies and status codes per route template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, route: str, elapsed: float, status: Optional[int]) -> None:
+        self.latencies[route].append(elapsed)
+        # Transport errors (no response) are counted as 5xx
+        self.statuses[route]["5xx" if status is None or status >= 500 else f"{status // 100}xx"] += 1
+
+    def rows(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        rows = {}
+        for route in sorted(self.latencies):
+            rows[route] = {
+                **summarize(self.latencies[route], elapsed),
+                "4xx": self.statuses[route]["4xx"],
+                "5xx": self.statuses[route]["5xx"],
+            }
+        everything = [value for values in self.latencies.values() for value in values]
+        rows["ALL"] = {
+            **summarize(everything, elapsed),
+            "4xx": sum(s["4xx"] for s in self.statuses.values()),
+            "5xx": sum(s["5xx"] for s in self.statuses.values()),
+        }
+        return rows
+
+
+class Targets:
+    """What the virtual users pick request targets from, indexed from the seed"""
+
+    def __init__(self, seeded, admin: dict):
+        self.admin = admin
+        self.tenants = seeded.tenants
+        self.landlords = seeded.landlords
+        self.house_ids = [h["house_id"] for h in seeded.houses]
+        self.available_house_ids = [h["house_id"] for h in seeded.houses if h["status"] == "available"]
+        self.pending_house_ids = [h["house_id"] for h in seeded.houses if h["status"] == "pending_approval"]
+        self.houses_by_landlord = defaultdict(list)
+        for house in seeded.houses:
+            self.houses_by_landlord[house["landlord_id"]].append(house["house_id"])
+        self.pending_bookings_by_landlord = defaultdict(list)
+        self.payable_by_tenant = defaultdict(list)
+        for booking in seeded.bookings:
+            if booking["status"] == "pending":
+                self.pending_bookings_by_landlord[booking["landlord_id"]].append(booking["booking_id"])
+            elif booking["status"] == "approved" and not booking["deposit_paid"]:
+                self.payable_by_tenant[booking["tenant_id"]].append(booking["booking_id"])
+        self.tx_refs_by_tenant = defaultdict(list)
+        for payment in seeded.payments:
+            self.tx_refs_by_tenant[payment["tenant_id"]].append(payment["tx_ref"])
+
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, targets: Targets, role: str, user: dict, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.targets = targets
+        self.role = role
+        self.user = user
+        self.rng = rng
+        # Tokens are minted directly; logging in would benchmark bcrypt (see login_bench)
+        token = server.create_access_token({"user_id": user["user_id"], "role": role})
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # Last listing query and its next-page cursor, for paging through results
+        self.params: dict = {}
+        self.cursor: Optional[str] = None
+        self.actions = ACTIONS[role]
+        self.weights = [weight for weight, _ in self.actions]
+
+    async def request(self, method: str, template: str, path_params: Optional[dict] = None, **kwargs):
+        path = template.format(**(path_params or {}))
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except Exception:
+            self.recorder.record(f"{method} {template}", time.perf_counter() - start, None)
+            return None
+        self.recorder.record(f"{method} {template}", time.perf_counter() - start, response.status_code)
+        return response
+
+    async def step(self) -> None:
+        _, action = self.rng.choices(self.actions, weights=self.weights)[0]
+        await action(self)
+        # mongomock and the in-process transports never suspend, so without
+        # this a virtual user would keep the loop until the run ends and the
+        # tasks a handler spawns (asyncio.gather) would wait for all of them
+        await asyncio.sleep(0)
+
+
+# Tenant traffic
+
+async def browse(vu: VirtualUser) -> None:
+    params = {}
+    if vu.rng.random() < 0.3:
+        params["location"] = vu.rng.choice(LOCATIONS).split()[0]
+    if vu.rng.random() < 0.3:
+        params["max_price"] = vu.rng.randrange(3000, 15000, 1000)
+    if vu.rng.random() < 0.2:
+        params["num_rooms"] = vu.rng.randint(1, 5)
+    if vu.rng.random() < 0.2:
+        params["sort"] = vu.rng.choice(["price_asc", "price_desc"])
+    response = await vu.request("GET", "/api/houses", params=params)
+    vu.params = params
+    vu.cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+
+
+async def browse_next_page(vu: VirtualUser) -> None:
+    if not vu.cursor:
+        return await browse(vu)
+    response = await vu.request("GET", "/api/houses", params={**vu.params, "cursor": vu.cursor})
+    vu.cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+
+
+async def view_house(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/houses/{house_id}", {"house_id": vu.rng.choice(vu.targets.house_ids)})
+
+
+async def view_house_details(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/houses/{house_id}/full", {"house_id": vu.rng.choice(vu.targets.house_ids)})
+
+
+async def read_feedback(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/houses/{house_id}/feedback", {"house_id": vu.rng.choice(vu.targets.house_ids)})
+
+
+async def suggest_locations(vu: VirtualUser) -> None:
+    location = vu.rng.choice(LOCATIONS)
+    await vu.request("GET", "/api/locations/suggest", params={"q": location[:vu.rng.randint(1, 4)]})
+
+
+async def toggle_saved(vu: VirtualUser) -> None:
+    await vu.request("POST", "/api/tenant/save-house/{house_id}", {"house_id": vu.rng.choice(vu.targets.house_ids)})
+
+
+async def saved_houses(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/tenant/saved-houses")
+
+
+async def check_saved(vu: VirtualUser) -> None:
+    house_ids = vu.rng.sample(vu.targets.house_ids, min(20, len(vu.targets.house_ids)))
+    await vu.request("POST", "/api/tenant/is-saved", json={"house_ids": house_ids})
+
+
+async def my_requests(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/bookings/my-requests")
+
+
+async def request_booking(vu: VirtualUser) -> None:
+    if not vu.targets.available_house_ids:
+        return await browse(vu)
+    await vu.request("POST", "/api/bookings", json={
+        "house_id": vu.rng.choice(vu.targets.available_house_ids), "message": "Is it still available?"
+    })
+
+
+async def leave_feedback(vu: VirtualUser) -> None:
+    await vu.request("POST", "/api/feedback", json={
+        "house_id": vu.rng.choice(vu.targets.house_ids), "rating": vu.rng.randint(1, 5), "comment": "Load test"
+    })
+
+
+async def pay_deposit(vu: VirtualUser) -> None:
+    payable = vu.targets.payable_by_tenant.get(vu.user["user_id"])
+    if not payable:
+        return await my_requests(vu)
+    response = await vu.request("POST", "/api/payment/initialize", json={"booking_id": vu.rng.choice(payable)})
+    if response is not None and response.status_code == 200:
+        await vu.request("GET", "/api/payment/verify/{tx_ref}", {"tx_ref": response.json()["tx_ref"]})
+
+
+async def check_payment(vu: VirtualUser) -> None:
+    tx_refs = vu.targets.tx_refs_by_tenant.get(vu.user["user_id"])
+    if not tx_refs:
+        return await my_requests(vu)
+    await vu.request("GET", "/api/payment/verify/{tx_ref}", {"tx_ref": vu.rng.choice(tx_refs)})
+
+
+# Landlord traffic
+
+def own_house(vu: VirtualUser) -> Optional[str]:
+    houses = vu.targets.houses_by_landlord.get(vu.user["user_id"])
+    return vu.rng.choice(houses) if houses else None
+
+
+async def my_houses(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/my-houses")
+
+
+async def received_requests(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/bookings/received")
+
+
+async def landlord_analytics(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/landlord/analytics")
+
+
+async def daily_views(vu: VirtualUser) -> None:
+    house_id = own_house(vu)
+    if house_id is None:
+        return await my_houses(vu)
+    await vu.request("GET", "/api/houses/{house_id}/views/daily", {"house_id": house_id})
+
+
+async def update_house(vu: VirtualUser) -> None:
+    house_id = own_house(vu)
+    if house_id is None:
+        return await my_houses(vu)
+    await vu.request("PUT", "/api/houses/{house_id}", {"house_id": house_id}, json={
+        "price_per_month": float(vu.rng.randrange(1500, 15000, 250))
+    })
+
+
+async def decide_booking(vu: VirtualUser) -> None:
+    pending = vu.targets.pending_bookings_by_landlord.get(vu.user["user_id"])
+    if not pending:
+        return await received_requests(vu)
+    # Popped so each booking is decided once; approving rents the house, so most get rejected
+    booking_id = pending.pop(vu.rng.randrange(len(pending)))
+    status = "approved" if vu.rng.random() < 0.2 else "rejected"
+    await vu.request("PUT", "/api/bookings/{booking_id}", {"booking_id": booking_id}, json={"status": status})
+
+
+async def list_house(vu: VirtualUser) -> None:
+    location = vu.rng.choice(LOCATIONS)
+    await vu.request("POST", "/api/houses", json={
+        "title": "Load test listing", "description": "Generated during a load test", "location": location,
+        "price_per_month": float(vu.rng.randrange(1500, 15000, 250)), "num_rooms": vu.rng.randint(1, 5)
+    })
+
+
+# Admin traffic
+
+async def admin_stats(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/admin/stats")
+
+
+async def pending_houses(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/admin/pending-houses")
+
+
+async def list_users(vu: VirtualUser) -> None:
+    params = {"cursor": vu.cursor} if vu.cursor and vu.rng.random() < 0.5 else {}
+    response = await vu.request("GET", "/api/admin/users", params=params)
+    vu.cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+
+
+async def approve_house(vu: VirtualUser) -> None:
+    pending = vu.targets.pending_house_ids
+    if not pending:
+        return await pending_houses(vu)
+    house_id = pending.pop(vu.rng.randrange(len(pending)))
+    await vu.request("PUT", "/api/admin/houses/{house_id}/status", {"house_id": house_id}, params={"status": "available"})
+
+
+async def cache_stats(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/admin/cache-stats")
+
+
+async def reconciliation(vu: VirtualUser) -> None:
+    await vu.request("GET", "/api/admin/payments/reconciliation")
+
+
+# (weight, action) per role; weights are relative within a role
+ACTIONS = {
+    "tenant": [
+        (30, browse), (10, browse_next_page), (10, view_house), (15, view_house_details),
+        (8, read_feedback), (5, suggest_locations), (5, toggle_saved), (4, saved_houses),
+        (5, check_saved), (8, my_requests), (3, request_booking), (2, leave_feedback),
+        (2, pay_deposit), (2, check_payment),
+    ],
+    "landlord": [
+        (25, my_houses), (25, received_requests), (15, landlord_analytics), (10, daily_views),
+        (10, update_house), (10, decide_booking), (5, list_house),
+    ],
+    "admin": [
+        (25, admin_stats), (25, pending_houses), (25, list_users), (10, approve_house),
+        (10, cache_stats), (5, reconciliation),
+    ],
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        role, _, weight = part.partition("=")
+        if role not in ACTIONS:
+            raise SystemExit(f"Unknown role in --mix: {role}")
+        weights[role] = float(weight)
+    return weights
+
+
+async def drive(users: List[VirtualUser], requests: int, duration: float) -> float:
+    """Run the virtual users until ``requests`` actions ran or ``duration`` seconds passed"""
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def loop(vu: VirtualUser) -> None:
+        nonlocal remaining
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            else:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            await vu.step()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(loop(vu) for vu in users))
+    return time.perf_counter() - start
+
+
+def git_commit() -> Dict[str, object]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def compare(baseline: dict, rows: Dict[str, Dict[str, float]], threshold: float, min_ms: float) -> List[str]:
+    """Print current vs baseline per route and return the regressions"""
+    regressions = []
+    table = {}
+    for route, row in rows.items():
+        before = baseline["results"].get(route)
+        if before is None:
+            continue
+        p95_change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        rps_change = (row["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        table[route] = {
+            "p95_before": before["p95_ms"], "p95_after": row["p95_ms"], "p95_%": round(p95_change, 1),
+            "rps_before": before["rps"], "rps_after": row["rps"], "rps_%": round(rps_change, 1),
+        }
+        # Sub-millisecond differences are noise, whatever the percentage
+        if p95_change > threshold and row["p95_ms"] - before["p95_ms"] >= min_ms:
+            regressions.append(f"{route}: p95 {before['p95_ms']} -> {row['p95_ms']} ms ({p95_change:+.1f}%)")
+        if route == "ALL" and rps_change < -threshold:
+            regressions.append(f"{route}: throughput {before['rps']} -> {row['rps']} rps ({rps_change:+.1f}%)")
+        if row["5xx"] > before.get("5xx", 0):
+            regressions.append(f"{route}: {row['5xx']} server errors (baseline {before.get('5xx', 0)})")
+    commit = baseline.get("git", {}).get("commit")
+    print(f"\nCompared with {commit or 'baseline'}:")
+    print_table(table, ["p95_before", "p95_after", "p95_%", "rps_before", "rps_after", "rps_%"])
+    return regressions
+
+
+async def run(args) -> int:
+    mix = parse_mix(args.mix)
+    # One log line per request would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db = use_database(args.mongo_url)
+    volumes = SeedVolumes(
+        tenants=args.tenants, landlords=args.landlords, houses=args.houses,
+        bookings=args.bookings, feedback=args.feedback, payments=args.payments
+    )
+    seed_start = time.perf_counter()
+    # Seeded before startup so startup sees the data (pending-houses counter, caches)
+    seeded = await seed_database(db, volumes, args.seed)
+    print(f"Seeded {volumes} in {time.perf_counter() - seed_start:.1f}s")
+
+    stub = StubGateway(latency_ms=args.gateway_latency_ms)
+    use_stub_gateway(stub)
+    await run_startup()
+    admin = await db.users.find_one({"email": "admin@woliso.com"}, {"_id": 0})
+    targets = Targets(seeded, admin)
+
+    async with make_client() as client:
+        def virtual_users(recorder: Recorder, seed: int) -> List[VirtualUser]:
+            rng = random.Random(seed)
+            roles = rng.choices(list(mix), weights=list(mix.values()), k=args.concurrency)
+            pools = {"tenant": targets.tenants, "landlord": targets.landlords, "admin": [admin]}
+            return [
+                VirtualUser(client, recorder, targets, role, rng.choice(pools[role]), random.Random(rng.random()))
+                for role in roles
+            ]
+
+        if args.warmup:
+            await drive(virtual_users(Recorder(), args.seed + 1), args.warmup, 0)
+        recorder = Recorder()
+        elapsed = await drive(virtual_users(recorder, args.seed), args.requests, args.duration)
+
+    await run_shutdown()
+    await drop_database(db)
+
+    rows = recorder.rows(elapsed)
+    print(f"{args.concurrency} virtual users ({args.mix}), {rows['ALL']['count']} requests in {elapsed:.1f}s, "
+          f"gateway calls: {dict(stub.calls)}")
+    print_table(rows, COLUMNS)
+
+    report = {
+        "git": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "database": "mongodb" if args.mongo_url else "mongomock",
+        },
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "compare", "mongo_url")},
+        "elapsed": round(elapsed, 3),
+        "results": rows,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"] or baseline.get("environment") != report["environment"]:
+            print("\nWarning: baseline was recorded with a different configuration or environment")
+        regressions = compare(baseline, rows, args.threshold, args.min_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print("no regressions" if not regressions else f"{len(regressions)} regression(s)")
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", help="run against a real MongoDB")
+    parser.add_argument("--tenants", type=int, default=150)
+    parser.add_argument("--landlords", type=int, default=50)
+    parser.add_argument("--houses", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--feedback", type=int, default=2000)
+    parser.add_argument("--payments", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--mix", default="tenant=70,landlord=20,admin=10", help="share of virtual users per role")
+    parser.add_argument("--requests", type=int, default=2000, help="total actions across all virtual users")
+    parser.add_argument("--duration", type=float, default=0, help="run for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=200, help="unrecorded actions before the run")
+    parser.add_argument("--gateway-latency-ms", type=float, default=50)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline --json file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed regression in percent")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore p95 changes smaller than this")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Login throughput and event-loop responsiveness under concurrent logins.
+
+Fires ``--logins`` logins with ``--concurrency`` in flight while a probe
+repeatedly calls an unrelated endpoint (``GET /api/houses``). With bcrypt on
+the event loop the probe's p99 tracks the cost of a whole queue of hashes; with
+the password pool it stays close to its idle latency.
+
+    python -m benchmarks.login_bench
+    python -m benchmarks.login_bench --inline   # hash on the event loop (old behaviour)
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+import server
+import password_hashing
+from benchmarks.common import (
+    use_database, drop_database, make_client, run_startup, run_shutdown,
+    summarize, print_table
+)
+
+PASSWORD = "bench-password"
+
+
+async def seed_users(db, count: int):
+    password_hash = password_hashing.hash_password_sync(PASSWORD)
+    users = [{
+        "user_id": str(uuid.uuid4()),
+        "email": f"bench-user-{i}@example.com",
+        "password_hash": password_hash,
+        "full_name": f"Bench User {i}",
+        "phone_number": None,
+        "role": "tenant",
+        "created_at": datetime.now(timezone.utc).isoformat()
+    } for i in range(count)]
+    await db.users.insert_many(users)
+    return [u["email"] for u in users]
+
+
+async def run(args):
+    db = use_database(args.mongo_url)
+    if args.inline:
+        async def inline_verify(plain_password, hashed_password):
+            return password_hashing.verify_password_sync(plain_password, hashed_password)
+        server.verify_password = inline_verify
+
+    await run_startup()
+    emails = await seed_users(db, args.users)
+
+    login_latencies, probe_latencies = [], []
+    rejected = 0
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with make_client() as client:
+        async def login(i):
+            nonlocal rejected
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/auth/login", json={
+                    "email": emails[i % len(emails)], "password": PASSWORD
+                })
+                if response.status_code == 503:
+                    rejected += 1
+                else:
+                    login_latencies.append(time.perf_counter() - start)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/houses")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(args.probe_interval)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    print(f"mode: {'inline' if args.inline else password_hashing.password_pool.kind + ' pool'}"
+          f", logins rejected with 503: {rejected}")
+    print_table({
+        "login": summarize(login_latencies, elapsed),
+        "probe GET /api/houses": summarize(probe_latencies, elapsed),
+    })
+
+    await run_shutdown()
+    await drop_database(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", help="benchmark against a real MongoDB")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    parser.add_argument("--inline", action="store_true", help="verify passwords on the event loop")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Concurrency stress test for the conditional write routes.
+
+Fires many concurrent requests at the routes whose preconditions live in the
+write itself and checks the invariants afterwards:
+
+- approving every pending booking of one house at once rents the house once:
+  exactly one booking ends up approved, the rest stay pending (409)
+- approving the same booking repeatedly succeeds once (the rest get 409)
+- toggling a saved house from many requests never stores a duplicate
+- the landlord's materialized counters still match the source collections
+
+Exits non-zero if an invariant is broken. Works in-process or against a
+real MongoDB (``--mongo-url``), where requests genuinely interleave.
+
+    python -m benchmarks.mutation_stress --tenants 50 --rounds 5
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from collections import Counter
+
+from benchmarks.common import use_database, drop_database, make_client, run_startup, run_shutdown
+from landlord_stats import check_landlord_stats
+
+
+async def register(client, role: str) -> dict:
+    response = await client.post("/api/auth/register", json={
+        "email": f"stress-{uuid.uuid4().hex[:10]}@example.com", "password": "stress-password",
+        "full_name": f"Stress {role.title()}", "role": role
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def create_house(client, landlord) -> str:
+    response = await client.post("/api/houses", headers=landlord, json={
+        "title": "Stress house", "description": "Contested listing", "location": "Woliso Town",
+        "price_per_month": 3000, "num_rooms": 2
+    })
+    response.raise_for_status()
+    return response.json()["house_id"]
+
+
+async def run(args) -> int:
+    db = use_database(args.mongo_url)
+    await run_startup()
+    failures = []
+
+    async with make_client() as client:
+        admin_login = await client.post("/api/auth/login", json={
+            "email": "admin@woliso.com", "password": "Admin@123"
+        })
+        admin = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+        landlord = await register(client, "landlord")
+        tenants = await asyncio.gather(*(register(client, "tenant") for _ in range(args.tenants)))
+
+        for round_no in range(args.rounds):
+            house_id = await create_house(client, landlord)
+            (await client.put(
+                f"/api/admin/houses/{house_id}/status", params={"status": "available"}, headers=admin
+            )).raise_for_status()
+            bookings = await asyncio.gather(*(
+                client.post("/api/bookings", headers=tenant, json={"house_id": house_id})
+                for tenant in tenants
+            ))
+            booking_ids = [b.json()["booking_id"] for b in bookings]
+
+            # Every booking of the house approved at once, plus duplicates of the first
+            targets = booking_ids + [booking_ids[0]] * args.duplicates
+            responses = await asyncio.gather(*(
+                client.put(f"/api/bookings/{booking_id}", headers=landlord, json={"status": "approved"})
+                for booking_id in targets
+            ))
+            codes = Counter(r.status_code for r in responses)
+            approved = await db.bookings.count_documents({"house_id": house_id, "status": "approved"})
+            house = await db.houses.find_one({"house_id": house_id})
+            print(f"round {round_no}: {len(targets)} approvals -> {dict(codes)}, "
+                  f"{approved} approved, house {house['status']}")
+            if codes[200] != 1 or approved != 1 or house["status"] != "rented":
+                failures.append(f"round {round_no}: {codes[200]} approvals succeeded, {approved} stored")
+
+            # Saved-house toggles from one tenant racing each other
+            toggles = await asyncio.gather(*(
+                client.post(f"/api/tenant/save-house/{house_id}", headers=tenants[0])
+                for _ in range(args.toggles)
+            ))
+            saved_docs = await db.saved_houses.count_documents({"house_id": house_id})
+            if any(t.status_code != 200 for t in toggles) or saved_docs > 1:
+                failures.append(f"round {round_no}: {saved_docs} saved_houses documents after toggling")
+
+    problems = await check_landlord_stats(db)
+    failures.extend(problems)
+
+    await run_shutdown()
+    await drop_database(db)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("ok" if not failures else f"{len(failures)} invariant(s) broken")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", help="run against a real MongoDB")
+    parser.add_argument("--tenants", type=int, default=30, help="competing bookings per house")
+    parser.add_argument("--duplicates", type=int, default=10, help="extra approvals of one booking")
+    parser.add_argument("--toggles", type=int, default=20, help="concurrent save toggles per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
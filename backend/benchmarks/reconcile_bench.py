@@ -0,0 +1,110 @@
+"""Draining a backlog of stale pending payments against the stub gateway.
+
+Seeds ``--payments`` pending payments (a share of them past the expiry age),
+then runs reconciler passes until a full sweep needs no retries, against a stub Chapa
+with ``--latency-ms`` per call and an optional ``--rate-limit``. Reports how
+long the backlog took to drain, the outcomes, retries and 429s, and checks
+that every paid payment's booking ended up with ``deposit_paid``.
+
+    python -m benchmarks.reconcile_bench --payments 500 --concurrency 8 --rate-limit 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from benchmarks.common import use_database, drop_database
+from benchmarks.stub_gateway import StubGateway
+from chapa_service import ChapaService
+from payment_reconciler import PaymentReconciler
+
+STALE_AFTER = 900
+EXPIRE_AFTER = 86400
+
+
+async def seed(db, count: int, expired_share: float) -> None:
+    now = datetime.now(timezone.utc)
+    payments, bookings = [], []
+    for i in range(count):
+        booking_id = str(uuid.uuid4())
+        age = EXPIRE_AFTER + 60 if i < count * expired_share else STALE_AFTER + 60 + i
+        payments.append({
+            "payment_id": str(uuid.uuid4()),
+            "booking_id": booking_id,
+            "tenant_id": str(uuid.uuid4()),
+            "house_id": str(uuid.uuid4()),
+            "tx_ref": f"WRS-{booking_id}-{i:08x}",
+            "amount": 500,
+            "currency": "ETB",
+            "status": "pending",
+            "created_at": (now - timedelta(seconds=age)).isoformat()
+        })
+        bookings.append({"booking_id": booking_id, "status": "approved", "deposit_paid": False})
+    await db.payments.insert_many(payments)
+    await db.bookings.insert_many(bookings)
+
+
+async def run(args):
+    db = use_database(args.mongo_url)
+    await seed(db, args.payments, args.expired_share)
+
+    stub = StubGateway(latency_ms=args.latency_ms, rate_limit=args.rate_limit, error_rate=args.error_rate)
+    gateway = ChapaService(secret_key="stub", base_url="http://stub", transport=stub.transport())
+    reconciler = PaymentReconciler(
+        gateway,
+        stale_after=STALE_AFTER,
+        expire_after=EXPIRE_AFTER,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        base_backoff=0.2
+    )
+
+    start = time.perf_counter()
+    passes = 0
+    retry_later = False
+    while passes < args.max_passes:
+        outcomes = await reconciler.reconcile_once(db)
+        passes += 1
+        retry_later = retry_later or "retry_later" in outcomes
+        if reconciler.caught_up:
+            # Done once a full sweep needed no retries; unpaid payments
+            # younger than the expiry age stay pending by design
+            if not retry_later:
+                break
+            retry_later = False
+    elapsed = time.perf_counter() - start
+    stats = reconciler.stats()
+
+    paid = await db.payments.count_documents({"status": "success"})
+    deposits = await db.bookings.count_documents({"deposit_paid": True})
+    print(f"{args.payments} payments in {passes} passes, {elapsed:.2f}s "
+          f"({args.payments / elapsed:.1f} payments/s)")
+    print(f"outcomes: {stats['outcomes']}")
+    print(f"retries: {stats['retries']}, rate limited: {stats['rate_limited']}, "
+          f"gateway calls: {dict(stub.calls)}")
+    print(f"reconcile latency p50 {stats['reconcile_p50_ms']} ms, p95 {stats['reconcile_p95_ms']} ms")
+    print(f"paid payments: {paid}, bookings with deposit_paid: {deposits}, "
+          f"still stale: {stats['backlog']}")
+
+    await gateway.aclose()
+    await drop_database(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", help="benchmark against a real MongoDB")
+    parser.add_argument("--payments", type=int, default=500)
+    parser.add_argument("--expired-share", type=float, default=0.3,
+                        help="share of payments older than the expiry age")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rate-limit", type=float, default=0, help="stub requests per second")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--max-passes", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Synthetic data generator for load tests.
+
+Fills a database with users, houses, bookings, feedback and payments shaped
+like the ones the app writes: location tokens, rating aggregates that match
+the feedback, per-landlord counters and the pending-houses counter. All
+generated users share the password ``bench-password``. Output is
+deterministic for a given ``--seed``.
+
+    python -m benchmarks.seed --mongo-url mongodb://localhost:27017 --db woliso_load \\
+        --users 2000 --houses 5000 --bookings 20000 --feedback 20000 --payments 5000
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List
+
+import password_hashing
+from admin_stats import pending_houses
+from db_indexes import ensure_indexes
+from landlord_stats import rebuild_landlord_stats
+from location_search import location_fields
+from ratings import empty_rating_fields
+
+PASSWORD = "bench-password"
+
+LOCATIONS = [
+    "Woliso Town", "Woliso Kebele 01", "Woliso Kebele 02", "Woliso Kebele 03",
+    "Ambo Road", "Ghion", "Tulu Bolo", "Weliso Market Area", "Dire Ghion",
+]
+HOUSE_STATUSES = ["available"] * 7 + ["rented"] * 2 + ["pending_approval"]
+BOOKING_STATUSES = ["pending"] * 5 + ["approved"] * 3 + ["rejected"] * 2
+PAYMENT_STATUSES = ["success"] * 6 + ["pending"] * 2 + ["failed", "expired"]
+BATCH = 1000
+
+
+@dataclass
+class SeedVolumes:
+    tenants: int = 150
+    landlords: int = 50
+    houses: int = 500
+    bookings: int = 1000
+    feedback: int = 2000
+    payments: int = 300
+
+
+@dataclass
+class SeedResult:
+    """Ids of what was generated, for drivers to pick request targets from"""
+    tenants: List[Dict] = field(default_factory=list)
+    landlords: List[Dict] = field(default_factory=list)
+    houses: List[Dict] = field(default_factory=list)
+    bookings: List[Dict] = field(default_factory=list)
+    payments: List[Dict] = field(default_factory=list)
+
+
+def _timestamp(rng: random.Random, now: datetime, max_days: int = 365) -> str:
+    return (now - timedelta(seconds=rng.randrange(max_days * 86400))).isoformat()
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+async def _insert(collection, docs: List[Dict]) -> None:
+    for start in range(0, len(docs), BATCH):
+        # insert_many adds _id to the dicts; insert copies so callers keep clean docs
+        await collection.insert_many([dict(doc) for doc in docs[start:start + BATCH]], ordered=False)
+
+
+async def seed_database(db, volumes: SeedVolumes, seed: int = 42) -> SeedResult:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    result = SeedResult()
+    password_hash = password_hashing.hash_password_sync(PASSWORD)
+
+    for role, count, target in (
+        ("tenant", volumes.tenants, result.tenants),
+        ("landlord", volumes.landlords, result.landlords),
+    ):
+        for i in range(count):
+            target.append({
+                "user_id": _uuid(rng),
+                "email": f"load-{role}-{i}@example.com",
+                "password_hash": password_hash,
+                "full_name": f"Load {role.title()} {i}",
+                "phone_number": f"09{rng.randrange(10**8):08d}",
+                "role": role,
+                "created_at": _timestamp(rng, now),
+            })
+    await _insert(db.users, result.tenants + result.landlords)
+
+    for i in range(volumes.houses):
+        location = rng.choice(LOCATIONS)
+        result.houses.append({
+            "house_id": _uuid(rng),
+            "landlord_id": rng.choice(result.landlords)["user_id"],
+            "title": f"{rng.randint(1, 5)} room house #{i}",
+            "description": "Generated listing for load tests",
+            "location": location,
+            "price_per_month": float(rng.randrange(1500, 15000, 250)),
+            "num_rooms": rng.randint(1, 5),
+            "status": rng.choice(HOUSE_STATUSES),
+            "photos": [],
+            "created_at": _timestamp(rng, now),
+            **location_fields(location),
+            **empty_rating_fields(),
+        })
+
+    # Rating aggregates are kept on the house (ratings.py); compute them here
+    feedbacks = []
+    for _ in range(volumes.feedback):
+        house = rng.choice(result.houses)
+        rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 3, 5, 4])[0]
+        feedbacks.append({
+            "feedback_id": _uuid(rng),
+            "tenant_id": rng.choice(result.tenants)["user_id"],
+            "house_id": house["house_id"],
+            "rating": rating,
+            "comment": "Generated review",
+            "submitted_at": _timestamp(rng, now),
+        })
+        house["rating_count"] += 1
+        house["rating_sum"] += rating
+        house["rating_histogram"][str(rating)] += 1
+    for house in result.houses:
+        if house["rating_count"]:
+            house["rating_avg"] = house["rating_sum"] / house["rating_count"]
+    await _insert(db.houses, result.houses)
+    await _insert(db.feedbacks, feedbacks)
+
+    seen_pending = set()
+    approved_houses = set()
+    for _ in range(volumes.bookings):
+        house = rng.choice(result.houses)
+        tenant = rng.choice(result.tenants)
+        status = rng.choice(BOOKING_STATUSES)
+        # The app allows one pending request per tenant and house
+        if status == "pending":
+            if (tenant["user_id"], house["house_id"]) in seen_pending:
+                status = "rejected"
+            seen_pending.add((tenant["user_id"], house["house_id"]))
+        # and one approval per house, which rents it
+        if status == "approved":
+            if house["house_id"] in approved_houses:
+                status = "rejected"
+            else:
+                approved_houses.add(house["house_id"])
+        result.bookings.append({
+            "booking_id": _uuid(rng),
+            "tenant_id": tenant["user_id"],
+            "house_id": house["house_id"],
+            "landlord_id": house["landlord_id"],
+            "status": status,
+            "message": "Generated request",
+            "requested_at": _timestamp(rng, now),
+            "deposit_paid": False,
+        })
+
+    # Houses were inserted before the bookings were drawn
+    for house in result.houses:
+        if house["house_id"] in approved_houses:
+            house["status"] = "rented"
+    await db.houses.update_many(
+        {"house_id": {"$in": sorted(approved_houses)}}, {"$set": {"status": "rented"}}
+    )
+
+    approved = [b for b in result.bookings if b["status"] == "approved"]
+    for i in range(min(volumes.payments, len(approved))):
+        booking = approved[i]
+        status = rng.choice(PAYMENT_STATUSES)
+        tx_ref = f"WRS-{booking['booking_id']}-{rng.getrandbits(32):08x}"
+        result.payments.append({
+            "payment_id": _uuid(rng),
+            "booking_id": booking["booking_id"],
+            "tenant_id": booking["tenant_id"],
+            "house_id": booking["house_id"],
+            "tx_ref": tx_ref,
+            "amount": 500.0,
+            "currency": "ETB",
+            "status": status,
+            "checkout_url": f"https://checkout.stub.local/{tx_ref}",
+            "created_at": _timestamp(rng, now, max_days=30),
+        })
+        booking["deposit_paid"] = status == "success"
+    await _insert(db.bookings, result.bookings)
+    await _insert(db.payments, result.payments)
+
+    # Derived state the app keeps up to date on every write
+    await rebuild_landlord_stats(db)
+    await pending_houses(db)
+    return result
+
+
+async def run(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db]
+    if args.drop:
+        await client.drop_database(args.db)
+    await ensure_indexes(db)
+    volumes = SeedVolumes(
+        tenants=args.users - args.users // 4, landlords=args.users // 4, houses=args.houses,
+        bookings=args.bookings, feedback=args.feedback, payments=args.payments
+    )
+    result = await seed_database(db, volumes, args.seed)
+    print(f"Seeded {args.db}: {len(result.tenants)} tenants, {len(result.landlords)} landlords, "
+          f"{len(result.houses)} houses, {len(result.bookings)} bookings, "
+          f"{volumes.feedback} feedback, {len(result.payments)} payments")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--db", default="woliso_load")
+    parser.add_argument("--drop", action="store_true", help="drop the database first")
+    parser.add_argument("--users", type=int, default=200, help="a quarter of them landlords")
+    parser.add_argument("--houses", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--feedback", type=int, default=2000)
+    parser.add_argument("--payments", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
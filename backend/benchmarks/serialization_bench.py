@@ -0,0 +1,115 @@
+"""Response serialization cost per list endpoint: FastAPI default vs fast_json.
+
+For each list endpoint, builds ``--items`` documents shaped like what the
+handler reads from MongoDB (including internal fields the model drops) and
+times turning them into a response body both ways:
+
+- default: validate against ``response_model`` (FastAPI's serialize_response)
+  and encode with JSONResponse, as the handlers did before
+- fast: ``fast_json.trusted_list`` (project onto the model, encode with orjson)
+
+    python -m benchmarks.serialization_bench --items 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import server
+from benchmarks.common import summarize, print_table
+from fast_json import trusted_list
+from location_search import location_fields
+from ratings import empty_rating_fields
+
+NOW = "2025-01-01T12:00:00.000000+00:00"
+
+
+def house(i: int) -> dict:
+    return {
+        "house_id": str(uuid.uuid4()), "landlord_id": str(uuid.uuid4()),
+        "title": f"House {i}", "description": "Two rooms near the market, water included",
+        "location": "Woliso Town, Kebele 02", "price_per_month": 3000 + i, "num_rooms": 1 + i % 4,
+        "status": "available", "photos": [f"/uploads/ab/cd/{'0' * 64}_{i}.jpg"],
+        "created_at": NOW, "views": i,
+        **location_fields("Woliso Town, Kebele 02"), **empty_rating_fields(),
+    }
+
+
+def booking(i: int) -> dict:
+    return {
+        "booking_id": str(uuid.uuid4()), "tenant_id": str(uuid.uuid4()),
+        "house_id": str(uuid.uuid4()), "landlord_id": str(uuid.uuid4()),
+        "status": "pending", "message": "Is it still available?", "requested_at": NOW,
+        "deposit_paid": False,
+    }
+
+
+def feedback(i: int) -> dict:
+    return {
+        "feedback_id": str(uuid.uuid4()), "tenant_id": str(uuid.uuid4()),
+        "house_id": str(uuid.uuid4()), "rating": 1 + i % 5, "comment": "Quiet street",
+        "submitted_at": NOW,
+    }
+
+
+def user(i: int) -> dict:
+    return {
+        "user_id": str(uuid.uuid4()), "email": f"user{i}@example.com", "full_name": f"User {i}",
+        "phone_number": "0911000000", "role": "tenant", "created_at": NOW,
+    }
+
+
+ENDPOINTS = [
+    ("GET /houses", server.House, house),
+    ("GET /my-houses", server.House, house),
+    ("GET /tenant/saved-houses", server.House, house),
+    ("GET /admin/pending-houses", server.House, house),
+    ("GET /bookings/my-requests", server.Booking, booking),
+    ("GET /bookings/received", server.Booking, booking),
+    ("GET /houses/{id}/feedback", server.Feedback, feedback),
+    ("GET /admin/users", server.User, user),
+]
+
+
+async def default_path(field, docs) -> bytes:
+    content = await serialize_response(field=field, response_content=docs, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def run(args):
+    rows = {}
+    for name, model, make in ENDPOINTS:
+        docs = [make(i) for i in range(args.items)]
+        field = create_response_field(name="Response", type_=List[model])
+        for label, encode in (
+            ("default", lambda: default_path(field, docs)),
+            ("fast", None),
+        ):
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                if encode:
+                    await encode()
+                else:
+                    trusted_list(model, docs).body
+                latencies.append(time.perf_counter() - t)
+            rows[f"{name} [{label}]"] = summarize(latencies, time.perf_counter() - start)
+    print(f"{args.items} items per response, {args.repeat} responses per row")
+    print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
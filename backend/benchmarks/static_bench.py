@@ -0,0 +1,111 @@
+"""Requests per second for /uploads image serving: StaticFiles vs UploadFiles.
+
+Writes a few content-addressed variants (and one legacy flat upload) to a
+temporary directory and serves it through both the plain ``StaticFiles``
+mount the app used to have and ``static_serving.UploadFiles``. Each scenario
+replays the same requests a browser makes on repeat page loads:
+
+* ``cold``         plain GET, no validators
+* ``revalidate``   GET with the If-None-Match the first response carried
+* ``range``        GET of the first 64 KiB
+* ``webp``         GET of a .jpg with ``Accept: image/webp``
+
+    python -m benchmarks.static_bench --requests 2000
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from benchmarks.common import make_client, summarize, print_table
+from static_serving import UploadFiles
+
+ACCEPT_WEBP = "image/avif,image/webp,image/apng,*/*;q=0.8"
+
+
+def write_fixture(root: Path, size: int):
+    """Write one content-addressed upload (jpg + webp) and return its jpg URL."""
+    payload = os.urandom(size)
+    content_hash = hashlib.sha256(payload).hexdigest()
+    directory = root / content_hash[:2] / content_hash[2:4]
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{content_hash}_medium.jpg").write_bytes(payload)
+    (directory / f"{content_hash}_medium.webp").write_bytes(payload[: size * 2 // 3])
+    return f"/uploads/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}_medium.jpg"
+
+
+async def measure(client, url, count, concurrency, headers):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = set()
+    transferred = 0
+
+    async def one():
+        nonlocal transferred
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses.add(response.status_code)
+            transferred += len(response.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    row = summarize(latencies, time.perf_counter() - start)
+    row["status"] = "/".join(str(s) for s in sorted(statuses))
+    row["kb_per_req"] = round(transferred / max(count, 1) / 1024, 1)
+    return row
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        url = write_fixture(root, args.size_kb * 1024)
+        apps = {
+            "StaticFiles": Starlette(routes=[Mount("/uploads", StaticFiles(directory=str(root)))]),
+            "UploadFiles": Starlette(routes=[Mount("/uploads", UploadFiles(root))]),
+        }
+
+        rows = {}
+        for label, app in apps.items():
+            async with make_client(app) as client:
+                first = await client.get(url)
+                validators = {}
+                if "etag" in first.headers:
+                    validators["If-None-Match"] = first.headers["etag"]
+                scenarios = {
+                    "cold": {},
+                    "revalidate": validators,
+                    "range": {"Range": "bytes=0-65535"},
+                    "webp": {"Accept": ACCEPT_WEBP},
+                }
+                for scenario, headers in scenarios.items():
+                    rows[f"{label} {scenario}"] = await measure(
+                        client, url, args.requests, args.concurrency, headers
+                    )
+                print(f"{label}: cache-control={first.headers.get('cache-control')!r} "
+                      f"etag={first.headers.get('etag')!r}")
+
+    print_table(rows)
+    print("status / KiB per request:")
+    for name, row in rows.items():
+        print(f"  {name:<24} {row['status']:>8} {row['kb_per_req']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size-kb", type=int, default=180, help="size of the test image")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""A local stand-in for the Chapa API, for benchmarks and reconciler runs.
+
+Implements the endpoints ``ChapaService`` uses (initialize, verify, supported
+currencies) with configurable latency, error rate and a rate limit that
+answers 429 with Retry-After. Whether a transaction was paid is derived from
+a hash of its tx_ref (``--paid`` / ``--failed`` ratios) unless set explicitly
+with ``StubGateway.set_outcome``.
+
+In-process, hand ``stub.transport()`` to ``ChapaService(transport=...)``.
+As a server, run it and point ``CHAPA_API_URL`` at it:
+
+    python -m benchmarks.stub_gateway --port 8090 --latency-ms 80 --rate-limit 20
+    CHAPA_API_URL=http://127.0.0.1:8090 uvicorn server:app
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class StubGateway:
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        paid_ratio: float = 0.7,
+        failed_ratio: float = 0.1,
+        rate_limit: float = 0,
+        error_rate: float = 0
+    ):
+        self.latency = latency_ms / 1000
+        self.paid_ratio = paid_ratio
+        self.failed_ratio = failed_ratio
+        # Requests per second (token bucket of one second's burst); 0 = unlimited
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._outcomes: Dict[str, str] = {}
+        self._transactions: Dict[str, dict] = {}
+        self.calls: Counter = Counter()
+        self.app = self._build_app()
+
+    def set_outcome(self, tx_ref: str, outcome: str) -> None:
+        """Force a transaction to ``success``, ``failed`` or ``unpaid``."""
+        self._outcomes[tx_ref] = outcome
+
+    def outcome(self, tx_ref: str) -> str:
+        if tx_ref in self._outcomes:
+            return self._outcomes[tx_ref]
+        bucket = int(hashlib.sha256(tx_ref.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if bucket < self.paid_ratio:
+            return "success"
+        if bucket < self.paid_ratio + self.failed_ratio:
+            return "failed"
+        return "unpaid"
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        return httpx.ASGITransport(app=self.app)
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _gate(self, name: str) -> Optional[JSONResponse]:
+        """Apply latency, rate limit and injected errors; a response short-circuits."""
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not self._take_token():
+            self.calls["rate_limited"] += 1
+            return JSONResponse(
+                {"message": "Too many requests", "status": "failed"},
+                status_code=429, headers={"Retry-After": "1"}
+            )
+        if self.error_rate and random.random() < self.error_rate:
+            self.calls["errors"] += 1
+            return JSONResponse({"message": "Service unavailable", "status": "failed"}, status_code=503)
+        return None
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/transaction/initialize")
+        async def initialize(request: Request):
+            blocked = await self._gate("initialize")
+            if blocked:
+                return blocked
+            payload = await request.json()
+            self._transactions[payload["tx_ref"]] = payload
+            return {
+                "message": "Hosted Link",
+                "status": "success",
+                "data": {"checkout_url": f"https://checkout.stub.local/{payload['tx_ref']}"}
+            }
+
+        @app.get("/transaction/verify/{tx_ref}")
+        async def verify(tx_ref: str):
+            blocked = await self._gate("verify")
+            if blocked:
+                return blocked
+            outcome = self.outcome(tx_ref)
+            if outcome == "unpaid":
+                return JSONResponse(
+                    {"message": "Payment not paid yet", "status": "failed", "data": None},
+                    status_code=404
+                )
+            transaction = self._transactions.get(tx_ref, {})
+            return {
+                "message": "Payment details",
+                "status": "success",
+                "data": {
+                    "tx_ref": tx_ref,
+                    "status": outcome,
+                    "amount": transaction.get("amount", "500"),
+                    "currency": transaction.get("currency", "ETB"),
+                    "reference": hashlib.md5(tx_ref.encode()).hexdigest()[:12],
+                }
+            }
+
+        @app.get("/currency_supported")
+        async def currencies():
+            blocked = await self._gate("currencies")
+            if blocked:
+                return blocked
+            return {"status": "success", "data": [{"code": "ETB"}, {"code": "USD"}]}
+
+        return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--paid", type=float, default=0.7, help="share of transactions that were paid")
+    parser.add_argument("--failed", type=float, default=0.1, help="share that failed at the gateway")
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests per second, 0 = unlimited")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of requests answered 503")
+    args = parser.parse_args()
+    stub = StubGateway(args.latency_ms, args.paid, args.failed, args.rate_limit, args.error_rate)
+    uvicorn.run(stub.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,17 @@
 
 
 import os
-import requests
+import time
+import asyncio
+import httpx
 import logging
-import re
-from typing import Dict, List, Optional, Any
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Any
 from dotenv import load_dotenv
 
 # --- Step 1: Load environment variables from .env file FIRST ---
 # This ensures that os.environ.get() calls below have the correct values
-load_dotenv() 
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
@@ -18,15 +20,241 @@ logger = logging.getLogger(__name__)
 CHAPA_SECRET_KEY = os.environ.get('CHAPA_SECRET_KEY', '')
 CHAPA_BASE_URL = os.environ.get('CHAPA_API_URL', "https://api.chapa.co/v1")
 
+# HTTP client tuning. Connect and read timeouts are separate so that an
+# unreachable gateway fails fast while a slow-but-alive one still gets time
+# to answer.
+CHAPA_CONNECT_TIMEOUT = float(os.environ.get('CHAPA_CONNECT_TIMEOUT', '5'))
+CHAPA_READ_TIMEOUT = float(os.environ.get('CHAPA_READ_TIMEOUT', '20'))
+CHAPA_MAX_CONNECTIONS = int(os.environ.get('CHAPA_MAX_CONNECTIONS', '20'))
+CHAPA_MAX_KEEPALIVE = int(os.environ.get('CHAPA_MAX_KEEPALIVE', '10'))
+CHAPA_KEEPALIVE_EXPIRY = float(os.environ.get('CHAPA_KEEPALIVE_EXPIRY', '30'))
+CHAPA_MAX_CONCURRENCY = int(os.environ.get('CHAPA_MAX_CONCURRENCY', '10'))
+
+# Circuit breaker: after CHAPA_BREAKER_FAILURES consecutive gateway failures
+# (network errors, timeouts, 5xx) calls fail fast for CHAPA_BREAKER_RESET
+# seconds, then a single trial call decides whether to close it again.
+CHAPA_BREAKER_FAILURES = int(os.environ.get('CHAPA_BREAKER_FAILURES', '5'))
+CHAPA_BREAKER_RESET = float(os.environ.get('CHAPA_BREAKER_RESET', '30'))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for calls to one upstream service
+
+    ``closed``: calls go through; consecutive failures are counted.
+    ``open``: calls fail immediately until ``reset_timeout`` has passed.
+    ``half_open``: one trial call is let through; success closes the
+    breaker, failure opens it again. Other calls fail fast meanwhile.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_failure: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a trial call through."""
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def before_call(self) -> None:
+        """Raise GatewayUnavailableError unless a call may go through now."""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return
+        self.rejected += 1
+        raise GatewayUnavailableError(
+            "Payment gateway is unavailable (circuit open)", 503,
+            retry_after=self.retry_after() or 1.0
+        )
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self, reason: str) -> None:
+        self.last_failure = reason
+        self._trial_in_flight = False
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Payment gateway circuit opened after {self._failures} failure(s): {reason}")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def record_neutral(self) -> None:
+        """A call that reached the gateway but says nothing about its health (4xx)."""
+        if self._trial_in_flight:
+            self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "retry_after_seconds": round(self.retry_after(), 1) if state == self.OPEN else 0,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected,
+            "last_failure": self.last_failure,
+        }
+
 
 class ChapaService:
-    """Service for handling Chapa payment gateway integration with all features"""
-    
-    def __init__(self):
-        self.secret_key = CHAPA_SECRET_KEY
-        self.base_url = CHAPA_BASE_URL
+    """Async service for handling Chapa payment gateway integration with all features
+
+    All calls share one pooled ``httpx.AsyncClient`` (keep-alive connections,
+    separate connect/read timeouts) and a semaphore that bounds how many
+    requests may be in flight against the gateway at once. Point ``base_url``
+    (or ``CHAPA_API_URL``) at a local stub gateway, or pass an httpx
+    ``transport``, to exercise the service without reaching Chapa.
+    """
 
-    def initialize_payment(
+    def __init__(
+        self,
+        secret_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = CHAPA_MAX_CONCURRENCY,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.secret_key = CHAPA_SECRET_KEY if secret_key is None else secret_key
+        self.base_url = (base_url or CHAPA_BASE_URL).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.breaker = breaker or CircuitBreaker(CHAPA_BREAKER_FAILURES, CHAPA_BREAKER_RESET)
+        # Called as observer(operation, seconds, outcome) after every gateway
+        # round trip; outcome is the HTTP status or the network error's name
+        self.observers: List[Callable[[str, float, str], None]] = []
+        # Last successful currency probe, reported by the health endpoints
+        self.last_probe: Optional[Dict[str, Any]] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def add_observer(self, observer: Callable[[str, float, str], None]) -> None:
+        self.observers.append(observer)
+
+    def _notify(self, operation: str, duration: float, outcome: str) -> None:
+        for observer in self.observers:
+            try:
+                observer(operation, duration, outcome)
+            except Exception as e:
+                logger.warning(f"Chapa call observer failed: {str(e)}")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.secret_key}"},
+                timeout=httpx.Timeout(
+                    connect=CHAPA_CONNECT_TIMEOUT,
+                    read=CHAPA_READ_TIMEOUT,
+                    write=CHAPA_READ_TIMEOUT,
+                    pool=CHAPA_CONNECT_TIMEOUT
+                ),
+                limits=httpx.Limits(
+                    max_connections=CHAPA_MAX_CONNECTIONS,
+                    max_keepalive_connections=CHAPA_MAX_KEEPALIVE,
+                    keepalive_expiry=CHAPA_KEEPALIVE_EXPIRY
+                ),
+                transport=self._transport
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        operation: str,
+        error_prefix: str,
+        json: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        Send a request to the gateway and return the decoded JSON body
+
+        Args:
+            method: HTTP method
+            path: Path relative to the configured base URL
+            operation: Short name of the call reported to observers (the
+                path can contain a transaction reference)
+            error_prefix: Message prefix used for logging and raised errors
+            json: Optional JSON payload
+
+        Returns:
+            Decoded JSON response body
+        """
+        client = self._get_client()
+        self.breaker.before_call()
+        try:
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=json)
+                except httpx.HTTPError as e:
+                    self._notify(operation, time.perf_counter() - start, type(e).__name__)
+                    raise
+                self._notify(operation, time.perf_counter() - start, str(response.status_code))
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"{error_prefix}: {str(e)}")
+            if e.response.status_code >= 500:
+                self.breaker.record_failure(f"HTTP {e.response.status_code}")
+            else:
+                self.breaker.record_neutral()
+            raise PaymentGatewayError(
+                f"{error_prefix}: {str(e)}",
+                e.response.status_code,
+                retry_after=_retry_after(e.response)
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"{error_prefix}: {str(e)}")
+            self.breaker.record_failure(type(e).__name__)
+            raise PaymentGatewayError(f"{error_prefix}: {str(e)}")
+        except BaseException:
+            # Cancelled mid-call: free a half-open trial slot without a verdict
+            self.breaker.record_neutral()
+            raise
+        self.breaker.record_success()
+        return data
+
+    async def initialize_payment(
         self,
         amount: float,
         currency: str,
@@ -42,7 +270,7 @@ class ChapaService:
     ) -> Dict:
         """
         Initialize a payment transaction with Chapa
-        
+
         Args:
             amount: Payment amount
             currency: Currency code (ETB for Ethiopian Birr)
@@ -55,15 +283,10 @@ class ChapaService:
             phone_number: Customer phone number (10 digits, 09xxxxxxxx or 07xxxxxxxx)
             customization: Customization options for checkout page
             subaccounts: List of subaccounts for split payments
-            
+
         Returns:
             Dictionary containing payment initialization response
         """
-        headers = {
-            "Authorization": f"Bearer {self.secret_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "amount": str(amount),
             "currency": currency,
@@ -78,146 +301,104 @@ class ChapaService:
                 "description": "Payment for premium music subscription"
             }
         }
-        
+
         # Add phone number if provided (must be 10 digits)
         if phone_number:
             if len(phone_number) == 10 and phone_number.startswith(('09', '07')):
                 payload["phone_number"] = phone_number
             else:
                 raise PaymentGatewayError("Phone number must be 10 digits starting with 09 or 07")
-        
+
         # Add subaccounts for split payments
         if subaccounts:
             payload["subaccounts"] = subaccounts
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/transaction/initialize",
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') == 'success':
-                checkout_url = data['data']['checkout_url']
-                logger.info(f"Payment initialized successfully. Checkout URL: {checkout_url}")
-                return {
-                    'status': 'success',
-                    'checkout_url': checkout_url,
-                    'tx_ref': tx_ref,
-                    'data': data['data']
-                }
-            else:
-                error_message = data.get('message', 'Unknown error occurred')
-                logger.error(f"Chapa payment initialization failed: {error_message}")
-                raise PaymentGatewayError(f"Payment initialization failed: {error_message}")
-                
-        except requests.exceptions.RequestException as e:
-            status = None
-            try:
-                status = e.response.status_code  # type: ignore[attr-defined]
-            except Exception:
-                status = None
-            logger.error(f"Chapa payment initialization failed: {str(e)}")
-            raise PaymentGatewayError(f"Payment initialization failed: {str(e)}", status)
 
-    def verify_payment(self, tx_ref: str) -> Dict:
+        data = await self._request(
+            "POST",
+            "/transaction/initialize",
+            "initialize",
+            "Payment initialization failed",
+            json=payload
+        )
+
+        if data.get('status') == 'success':
+            checkout_url = data['data']['checkout_url']
+            logger.info(f"Payment initialized successfully. Checkout URL: {checkout_url}")
+            return {
+                'status': 'success',
+                'checkout_url': checkout_url,
+                'tx_ref': tx_ref,
+                'data': data['data']
+            }
+        else:
+            error_message = data.get('message', 'Unknown error occurred')
+            logger.error(f"Chapa payment initialization failed: {error_message}")
+            raise PaymentGatewayError(f"Payment initialization failed: {error_message}")
+
+    async def verify_payment(self, tx_ref: str) -> Dict:
         """
         Verify a payment transaction with Chapa
-        
+
         Args:
             tx_ref: Transaction reference to verify
-            
+
         Returns:
             Dictionary containing payment verification response
         """
-        headers = {
-            "Authorization": f"Bearer {self.secret_key}"
-        }
-        
-        try:
-            response = requests.get(
-                f"{self.base_url}/transaction/verify/{tx_ref}",
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') == 'success':
-                logger.info(f"Payment verified successfully for tx_ref: {tx_ref}")
-                return {
-                    'status': 'success',
-                    'verified': True,
-                    'payment_data': data['data']
-                }
-            else:
-                return {
-                    'status': 'failed',
-                    'verified': False,
-                    'message': data.get('message', 'Verification failed')
-                }
-                
-        except requests.exceptions.RequestException as e:
-            status = None
-            try:
-                status = e.response.status_code  # type: ignore[attr-defined]
-            except Exception:
-                status = None
-            logger.error(f"Chapa payment verification failed: {str(e)}")
-            raise PaymentGatewayError(f"Payment verification failed: {str(e)}", status)
+        data = await self._request(
+            "GET",
+            f"/transaction/verify/{tx_ref}",
+            "verify",
+            "Payment verification failed"
+        )
 
-    def cancel_payment(self, tx_ref: str) -> Dict:
+        if data.get('status') == 'success':
+            logger.info(f"Payment verified successfully for tx_ref: {tx_ref}")
+            return {
+                'status': 'success',
+                'verified': True,
+                'payment_data': data['data']
+            }
+        else:
+            return {
+                'status': 'failed',
+                'verified': False,
+                'message': data.get('message', 'Verification failed')
+            }
+
+    async def cancel_payment(self, tx_ref: str) -> Dict:
         """
         Cancel an active payment transaction
-        
+
         Args:
             tx_ref: Transaction reference to cancel
-            
+
         Returns:
             Dictionary containing cancellation response
         """
-        headers = {
-            "Authorization": f"Bearer {self.secret_key}",
-            "Content-Type": "application/json"
-        }
-        
-        try:
-            response = requests.put(
-                f"{self.base_url}/transaction/cancel/{tx_ref}",
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') == 'success':
-                logger.info(f"Payment cancelled successfully for tx_ref: {tx_ref}")
-                return {
-                    'status': 'success',
-                    'cancelled': True,
-                    'message': data.get('message', 'Transaction cancelled successfully')
-                }
-            else:
-                logger.error(f"Payment cancellation failed: {data.get('message')}")
-                return {
-                    'status': 'failed',
-                    'cancelled': False,
-                    'message': data.get('message', 'Cancellation failed')
-                }
-                
-        except requests.exceptions.RequestException as e:
-            status = None
-            try:
-                status = e.response.status_code  # type: ignore[attr-defined]
-            except Exception:
-                status = None
-            logger.error(f"Chapa payment cancellation failed: {str(e)}")
-            raise PaymentGatewayError(f"Payment cancellation failed: {str(e)}", status)
+        data = await self._request(
+            "PUT",
+            f"/transaction/cancel/{tx_ref}",
+            "cancel",
+            "Payment cancellation failed"
+        )
+
+        if data.get('status') == 'success':
+            logger.info(f"Payment cancelled successfully for tx_ref: {tx_ref}")
+            return {
+                'status': 'success',
+                'cancelled': True,
+                'message': data.get('message', 'Transaction cancelled successfully')
+            }
+        else:
+            logger.error(f"Payment cancellation failed: {data.get('message')}")
+            return {
+                'status': 'failed',
+                'cancelled': False,
+                'message': data.get('message', 'Cancellation failed')
+            }
 
-    def create_subaccount(
+    async def create_subaccount(
         self,
         account_name: str,
         bank_code: int,
@@ -228,7 +409,7 @@ class ChapaService:
     ) -> Dict:
         """
         Create a subaccount for split payments
-        
+
         Args:
             account_name: Vendor/merchant account name
             bank_code: Bank ID (from get_banks endpoint)
@@ -236,15 +417,10 @@ class ChapaService:
             split_value: Commission amount (0.03 for 3% or 25 for flat fee)
             split_type: 'percentage' or 'flat'
             business_name: Vendor/merchant business name
-            
+
         Returns:
             Dictionary containing subaccount creation response
         """
-        headers = {
-            "Authorization": f"Bearer {self.secret_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "account_name": account_name,
             "bank_code": bank_code,
@@ -252,89 +428,97 @@ class ChapaService:
             "split_value": split_value,
             "split_type": split_type
         }
-        
+
         if business_name:
             payload["business_name"] = business_name
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/subaccount",
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') == 'success':
-                subaccount_id = data['data']['id']
-                logger.info(f"Subaccount created successfully: {subaccount_id}")
-                return {
-                    'status': 'success',
-                    'subaccount_id': subaccount_id,
-                    'data': data['data']
-                }
-            else:
-                error_message = data.get('message', 'Unknown error occurred')
-                logger.error(f"Subaccount creation failed: {error_message}")
-                raise PaymentGatewayError(f"Subaccount creation failed: {error_message}")
-                
-        except requests.exceptions.RequestException as e:
-            status = None
-            try:
-                status = e.response.status_code  # type: ignore[attr-defined]
-            except Exception:
-                status = None
-            logger.error(f"Subaccount creation failed: {str(e)}")
-            raise PaymentGatewayError(f"Subaccount creation failed: {str(e)}", status)
 
-    def get_supported_currencies(self) -> Dict:
+        data = await self._request(
+            "POST",
+            "/subaccount",
+            "create_subaccount",
+            "Subaccount creation failed",
+            json=payload
+        )
+
+        if data.get('status') == 'success':
+            subaccount_id = data['data']['id']
+            logger.info(f"Subaccount created successfully: {subaccount_id}")
+            return {
+                'status': 'success',
+                'subaccount_id': subaccount_id,
+                'data': data['data']
+            }
+        else:
+            error_message = data.get('message', 'Unknown error occurred')
+            logger.error(f"Subaccount creation failed: {error_message}")
+            raise PaymentGatewayError(f"Subaccount creation failed: {error_message}")
+
+    async def get_supported_currencies(self) -> Dict:
         """
         Get list of supported currencies and countries
-        
+
         Returns:
             Dictionary containing supported currencies
         """
-        headers = {
-            "Authorization": f"Bearer {self.secret_key}"
+        data = await self._request(
+            "GET",
+            "/currency_supported",
+            "currencies",
+            "Failed to fetch supported currencies"
+        )
+
+        currencies = data.get('data', [])
+        self.last_probe = {
+            'currencies_available': len(currencies),
+            'checked_at': datetime.now(timezone.utc).isoformat()
         }
-        
-        try:
-            response = requests.get(
-                f"{self.base_url}/currency_supported",
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                'status': 'success',
-                'currencies': data.get('data', [])
-            }
-            
-        except requests.exceptions.RequestException as e:
-            status = None
+        return {
+            'status': 'success',
+            'currencies': currencies
+        }
+
+    def start_health_probe(self, interval: float) -> None:
+        """Refresh ``last_probe`` every ``interval`` seconds in the background.
+
+        The probe also serves as the half-open trial call when the breaker
+        has been opened by real traffic. Not started when ``interval`` is 0
+        or no secret key is configured, since every probe would fail.
+        """
+        if not self.secret_key:
+            logger.info("Chapa is not configured; health probe disabled")
+            return
+        if self._probe_task is None and interval > 0:
+            self._probe_task = asyncio.create_task(self._probe_loop(interval))
+
+    async def _probe_loop(self, interval: float) -> None:
+        while True:
             try:
-                status = e.response.status_code  # type: ignore[attr-defined]
-            except Exception:
-                status = None
-            logger.error(f"Failed to fetch supported currencies: {str(e)}")
-            raise PaymentGatewayError(f"Failed to fetch supported currencies: {str(e)}", status)
+                await self.get_supported_currencies()
+            except PaymentGatewayError:
+                pass
+            await asyncio.sleep(interval)
+
+    def health(self) -> Dict[str, Any]:
+        """Breaker state and the last successful probe; makes no network call."""
+        return {
+            'configured': bool(self.secret_key),
+            'circuit': self.breaker.snapshot(),
+            'last_successful_probe': self.last_probe
+        }
 
     def get_payment_receipt_url(self, chapa_reference_id: str) -> str:
         """
         Generate payment receipt URL
-        
+
         Args:
             chapa_reference_id: Chapa's internal reference ID from payment response
-            
+
         Returns:
             Receipt URL string
         """
         return f"https://chapa.link/payment-receipt/{chapa_reference_id}"
 
-    def initialize_split_payment(
+    async def initialize_split_payment(
         self,
         amount: float,
         currency: str,
@@ -352,7 +536,7 @@ class ChapaService:
     ) -> Dict:
         """
         Initialize a split payment transaction
-        
+
         Args:
             amount: Payment amount
             currency: Currency code
@@ -367,20 +551,20 @@ class ChapaService:
             split_value: Override split value
             phone_number: Customer phone number
             customization: Checkout customization
-            
+
         Returns:
             Dictionary containing split payment initialization response
         """
         subaccount_data = {"id": subaccount_id}
-        
+
         # Override default split settings if provided
         if split_type and split_value is not None:
             subaccount_data.update({
                 "split_type": split_type,
                 "split_value": split_value
             })
-        
-        return self.initialize_payment(
+
+        return await self.initialize_payment(
             amount=amount,
             currency=currency,
             tx_ref=tx_ref,
@@ -397,9 +581,23 @@ class ChapaService:
 
 class PaymentGatewayError(Exception):
     """Raised when the payment gateway returns an error. Carries optional HTTP status."""
-    def __init__(self, message: str, status_code: int | None = None):
+    def __init__(self, message: str, status_code: int | None = None, retry_after: float | None = None):
         super().__init__(message)
         self.status_code = status_code
+        # Seconds the gateway asked us to wait (Retry-After on 429/503)
+        self.retry_after = retry_after
+
+
+class GatewayUnavailableError(PaymentGatewayError):
+    """Raised without calling the gateway while the circuit breaker is open."""
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header given in seconds; HTTP dates are ignored."""
+    try:
+        return max(0.0, float(response.headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
 
 
 # Helper functions for common payment operations
@@ -416,5 +614,3 @@ def validate_phone_number(phone_number: str) -> bool:
 
 # Singleton instance
 chapa_service = ChapaService()
-
-
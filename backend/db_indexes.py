@@ -0,0 +1,265 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# ============ INDEX REGISTRY ============
+#
+# Every index the application relies on, per collection. ensure_indexes()
+# applies this registry idempotently: creating an index that already exists
+# with the same keys and options is a no-op on the server.
+#
+# List endpoints paginate by keyset (see pagination.py), so every sort option
+# has a compound index of the form (equality filter fields, sort fields...,
+# unique id). Descending variants of a sort walk the same index backwards.
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("user_id", DESCENDING)], name="created_id"),
+    ],
+    "houses": [
+        IndexModel([("house_id", ASCENDING)], name="house_id_unique", unique=True),
+        IndexModel([("landlord_id", ASCENDING), ("status", ASCENDING)], name="landlord_status"),
+        IndexModel(
+            [("landlord_id", ASCENDING), ("created_at", DESCENDING), ("house_id", DESCENDING)],
+            name="landlord_created_id"
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("house_id", DESCENDING)],
+            name="status_created_id"
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("price_per_month", ASCENDING), ("house_id", ASCENDING)],
+            name="status_price_id"
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("num_rooms", ASCENDING), ("price_per_month", ASCENDING),
+             ("house_id", ASCENDING)],
+            name="status_rooms_price_id"
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("rating_avg", DESCENDING), ("rating_count", DESCENDING),
+             ("house_id", DESCENDING)],
+            name="status_rating_id"
+        ),
+        # Multikey index over the normalized location words (location_search.py)
+        IndexModel(
+            [("status", ASCENDING), ("location_tokens", ASCENDING), ("created_at", DESCENDING),
+             ("house_id", DESCENDING)],
+            name="status_location_created_id"
+        ),
+    ],
+    "bookings": [
+        IndexModel([("booking_id", ASCENDING)], name="booking_id_unique", unique=True),
+        IndexModel([("landlord_id", ASCENDING), ("status", ASCENDING)], name="landlord_status"),
+        IndexModel(
+            [("tenant_id", ASCENDING), ("house_id", ASCENDING), ("status", ASCENDING)],
+            name="tenant_house_status"
+        ),
+        IndexModel(
+            [("tenant_id", ASCENDING), ("requested_at", DESCENDING), ("booking_id", DESCENDING)],
+            name="tenant_requested_id"
+        ),
+        IndexModel(
+            [("landlord_id", ASCENDING), ("requested_at", DESCENDING), ("booking_id", DESCENDING)],
+            name="landlord_requested_id"
+        ),
+    ],
+    "payments": [
+        IndexModel([("tx_ref", ASCENDING)], name="tx_ref_unique", unique=True),
+        IndexModel([("booking_id", ASCENDING)], name="booking_id"),
+        # Stale pending payments, oldest first (payment_reconciler.py)
+        IndexModel(
+            [("status", ASCENDING), ("created_at", ASCENDING), ("payment_id", ASCENDING)],
+            name="status_created_id"
+        ),
+    ],
+    # Idempotency keys and booking locks expire on their own (payment_idempotency.py)
+    "payment_idempotency": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "feedbacks": [
+        IndexModel(
+            [("house_id", ASCENDING), ("submitted_at", DESCENDING), ("feedback_id", DESCENDING)],
+            name="house_submitted_id"
+        ),
+    ],
+    "upload_blobs": [
+        IndexModel([("hash", ASCENDING)], name="hash_unique", unique=True),
+        IndexModel([("ref_count", ASCENDING), ("updated_at", ASCENDING)], name="ref_count_updated"),
+    ],
+    "house_views_daily": [
+        IndexModel([("house_id", ASCENDING), ("day", ASCENDING)], name="house_day_unique", unique=True),
+    ],
+    "landlord_stats": [
+        IndexModel([("landlord_id", ASCENDING)], name="landlord_id_unique", unique=True),
+    ],
+    "saved_houses": [
+        IndexModel(
+            [("tenant_id", ASCENDING), ("house_id", ASCENDING)],
+            name="tenant_house_unique",
+            unique=True
+        ),
+        IndexModel(
+            [("tenant_id", ASCENDING), ("saved_at", DESCENDING), ("saved_id", DESCENDING)],
+            name="tenant_saved_id"
+        ),
+    ],
+}
+
+
+# ============ QUERY SHAPES ============
+
+@dataclass
+class QueryShape:
+    """A query the routers issue, with placeholder values, for plan checks"""
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+    # Set for queries that intentionally read a whole collection
+    allow_collscan: bool = False
+
+
+NEWEST_HOUSES = [("created_at", -1), ("house_id", -1)]
+NEWEST_BOOKINGS = [("requested_at", -1), ("booking_id", -1)]
+
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("login / register", "users", {"email": "user@example.com"}),
+    QueryShape("get_current_user", "users", {"user_id": "u"}),
+    QueryShape("get_all_users", "users", {}, sort=[("created_at", -1), ("user_id", -1)]),
+    QueryShape("get_houses", "houses", {"status": "available"}, sort=NEWEST_HOUSES),
+    QueryShape("get_houses by price", "houses", {
+        "status": "available", "price_per_month": {"$gte": 100, "$lte": 5000}
+    }, sort=[("price_per_month", 1), ("house_id", 1)]),
+    QueryShape("get_houses by rooms", "houses", {
+        "status": "available", "num_rooms": 2, "price_per_month": {"$lte": 5000}
+    }, sort=[("num_rooms", -1), ("price_per_month", -1), ("house_id", -1)]),
+    QueryShape("get_houses next page", "houses", {"$and": [
+        {"status": "available"},
+        {"$or": [{"created_at": {"$lt": "2025"}}, {"created_at": "2025", "house_id": {"$lt": "h"}}]}
+    ]}, sort=NEWEST_HOUSES),
+    QueryShape("get_houses by location", "houses", {
+        "status": "available", "location_tokens": "woliso"
+    }, sort=NEWEST_HOUSES),
+    # location_search_filter output; get_houses sorts every search (newest by default)
+    QueryShape("get_houses by location prefix", "houses", {
+        "status": "available", "location_tokens": {"$regex": "^wol"}
+    }, sort=NEWEST_HOUSES),
+    QueryShape("get_houses by location words and prefix", "houses", {"status": "available", "$and": [
+        {"location_tokens": "woliso"}, {"location_tokens": {"$regex": "^to"}}
+    ]}, sort=NEWEST_HOUSES),
+    QueryShape("get_houses by rating", "houses", {"status": "available"},
+               sort=[("rating_avg", -1), ("rating_count", -1), ("house_id", -1)]),
+    QueryShape("rating aggregate backfill", "houses", {"rating_count": {"$exists": False}},
+               allow_collscan=True),
+    QueryShape("location backfill", "houses", {"location_tokens": {"$exists": False}},
+               allow_collscan=True),
+    QueryShape("get_house", "houses", {"house_id": "h"}),
+    QueryShape("get_my_houses", "houses", {"landlord_id": "l"}, sort=NEWEST_HOUSES),
+    QueryShape("landlord stats rebuild (houses)", "houses", {"landlord_id": "l"}),
+    QueryShape("get_pending_houses", "houses", {"status": "pending_approval"}, sort=NEWEST_HOUSES),
+    QueryShape("pending booking check", "bookings", {
+        "tenant_id": "t", "house_id": "h", "status": "pending"
+    }),
+    QueryShape("get_house_details booking", "bookings", {"tenant_id": "t", "house_id": "h"}),
+    QueryShape("get_my_booking_requests", "bookings", {"tenant_id": "t"}, sort=NEWEST_BOOKINGS),
+    QueryShape("get_received_bookings", "bookings", {"landlord_id": "l"}, sort=NEWEST_BOOKINGS),
+    QueryShape("landlord stats rebuild (bookings)", "bookings", {
+        "landlord_id": "l", "status": {"$in": ["pending", "approved"]}
+    }),
+    QueryShape("update_booking", "bookings", {"booking_id": "b"}),
+    QueryShape("payment booking lookup", "bookings", {"booking_id": "b", "tenant_id": "t"}),
+    QueryShape("existing payment", "payments", {"booking_id": "b"}),
+    QueryShape("verify_payment", "payments", {"tx_ref": "WRS-x"}),
+    QueryShape("reusable checkout", "payments", {
+        "booking_id": "b", "status": "pending", "amount": 500, "currency": "ETB",
+        "checkout_url": {"$exists": True}, "created_at": {"$gte": "2025"}
+    }),
+    QueryShape("stale pending payments", "payments", {
+        "status": "pending", "created_at": {"$lt": "2025"}
+    }, sort=[("created_at", 1), ("payment_id", 1)]),
+    QueryShape("stale pending payments next batch", "payments", {"$and": [
+        {"status": "pending", "created_at": {"$lt": "2025"}},
+        {"$or": [{"created_at": {"$gt": "2024"}}, {"created_at": "2024", "payment_id": {"$gt": "p"}}]}
+    ]}, sort=[("created_at", 1), ("payment_id", 1)]),
+    QueryShape("get_house_feedback", "feedbacks", {"house_id": "h"},
+               sort=[("submitted_at", -1), ("feedback_id", -1)]),
+    QueryShape("upload dedup", "upload_blobs", {"hash": "0" * 64}),
+    QueryShape("prune unreferenced uploads", "upload_blobs", {
+        "ref_count": {"$lte": 0}, "updated_at": {"$lt": "2025"}
+    }),
+    QueryShape("house daily views", "house_views_daily", {"house_id": "h", "day": {"$gte": "2025-01-01"}}),
+    QueryShape("get_landlord_analytics", "landlord_stats", {"landlord_id": "l"}),
+    QueryShape("saved house toggle", "saved_houses", {"tenant_id": "t", "house_id": "h"}),
+    QueryShape("get_saved_houses", "saved_houses", {"tenant_id": "t"},
+               sort=[("saved_at", -1), ("saved_id", -1)]),
+    QueryShape("bulk is-saved", "saved_houses", {"tenant_id": "t", "house_id": {"$in": ["h1", "h2"]}}),
+]
+
+
+# ============ OPERATIONS ============
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create every registered index. Returns index names per collection."""
+    created = {}
+    for collection, indexes in INDEXES.items():
+        created[collection] = await db[collection].create_indexes(indexes)
+        logger.info(f"Ensured indexes on {collection}: {', '.join(created[collection])}")
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Flatten the stage names of an explain() winning plan."""
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        for key in ("inputStage", "queryPlan", "winningPlan"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+async def explain_stages(db, collection: str, query_filter: Dict[str, Any],
+                         sort: Optional[List[Tuple[str, int]]] = None) -> List[str]:
+    """Run explain() for a find and return the stages of its winning plan."""
+    find = {"find": collection, "filter": query_filter}
+    if sort:
+        find["sort"] = dict(sort)
+    result = await db.command({"explain": find, "verbosity": "queryPlanner"})
+    return _plan_stages(result["queryPlanner"]["winningPlan"])
+
+
+async def check_query_plans(db, shapes: Optional[List[QueryShape]] = None) -> List[str]:
+    """Explain every registered query shape and return a list of problems.
+
+    A shape fails if its winning plan contains a COLLSCAN, unless it is
+    explicitly marked ``allow_collscan``, or if a sorted shape needs an
+    in-memory SORT stage (the keyset pages would no longer be index-backed).
+    """
+    problems = []
+    for shape in shapes or QUERY_SHAPES:
+        stages = await explain_stages(db, shape.collection, shape.filter, shape.sort)
+        scanned = "COLLSCAN" in stages
+        status = "ok"
+        if scanned and not shape.allow_collscan:
+            status = "COLLSCAN"
+            problems.append(f"{shape.name}: COLLSCAN on {shape.collection} for {shape.filter}")
+        elif scanned:
+            status = "collscan (allowed)"
+        elif shape.sort and "SORT" in stages:
+            status = "SORT"
+            problems.append(f"{shape.name}: in-memory SORT on {shape.collection} for {shape.sort}")
+        logger.info(f"[{status}] {shape.name}: {' <- '.join(stages)}")
+    return problems
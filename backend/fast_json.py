@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+# Response serialization for documents we wrote ourselves.
+#
+# With `response_model=List[House]`, FastAPI validates every returned item
+# against the model and then encodes the result with the stdlib json module;
+# handlers that build `House(**doc)` pay for validation twice. Documents read
+# back from our own collections already have the model's shape, so the fast
+# path only projects them onto the model's fields (filling in defaults, which
+# also drops internal fields such as location_tokens or password_hash) and
+# encodes with orjson. A document missing a required field falls back to full
+# model validation, so malformed data still fails the way it did before.
+#
+# Handlers keep their response_model for the OpenAPI schema; returning a
+# Response directly makes FastAPI skip its own validation.
+
+
+class TrustedSerializer:
+    """Projects documents onto a model's fields and encodes them with orjson"""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = list(model.model_fields)
+        self.required = frozenset(
+            name for name, field in model.model_fields.items() if field.is_required()
+        )
+        self.defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items()
+            if not field.is_required()
+        }
+
+    def project(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.required.issubset(doc.keys()):
+            return self.model.model_validate(doc).model_dump(mode="json")
+        defaults = self.defaults
+        return {
+            name: doc[name] if name in doc else defaults[name]
+            for name in self.fields
+        }
+
+    def dumps(self, doc: Dict[str, Any]) -> bytes:
+        return orjson.dumps(self.project(doc))
+
+    def dumps_list(self, docs: Iterable[Dict[str, Any]]) -> bytes:
+        project = self.project
+        return orjson.dumps([project(doc) for doc in docs])
+
+
+@lru_cache(maxsize=None)
+def serializer_for(model: Type[BaseModel]) -> TrustedSerializer:
+    return TrustedSerializer(model)
+
+
+def _response(body: bytes, response: Optional[Response]) -> Response:
+    # Headers the handler set on the injected Response (e.g. X-Next-Cursor)
+    # are only applied by FastAPI when it builds the response itself
+    headers = dict(response.headers) if response is not None else None
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def trusted_list(model: Type[BaseModel], docs: List[Dict[str, Any]], response: Optional[Response] = None) -> Response:
+    """JSON response for a list of ``model`` documents, without re-validation."""
+    return _response(serializer_for(model).dumps_list(docs), response)
+
+
+def trusted_item(model: Type[BaseModel], doc: Dict[str, Any], response: Optional[Response] = None) -> Response:
+    """JSON response for one ``model`` document, without re-validation."""
+    return _response(serializer_for(model).dumps(doc), response)
+
+
+def encoded_response(body: bytes, response: Optional[Response] = None) -> Response:
+    """JSON response for a body that is already encoded (e.g. cached)."""
+    return _response(body, response)
@@ -0,0 +1,173 @@
+import os
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from worker_pool import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+# Longest edge, in pixels, of each generated variant. Images smaller than a
+# variant are never upscaled.
+VARIANTS: Dict[str, int] = {
+    "thumb": 480,
+    "medium": 1024,
+    "full": 2048,
+}
+
+# Pillow format name, file extension and encoder options per output format
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Refuse decompression bombs: a tiny file that expands to a huge bitmap
+Image.MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', str(50_000_000)))
+
+image_pool = BoundedExecutor(
+    name="image",
+    kind=os.environ.get("IMAGE_PROCESS_EXECUTOR", "thread"),
+    max_workers=int(os.environ.get("IMAGE_PROCESS_WORKERS", "0")) or None,
+    max_queue=int(os.environ.get("IMAGE_PROCESS_MAX_QUEUE", "16"))
+)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class InvalidImageError(Exception):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+class UploadLimitMiddleware:
+    """Rejects request bodies over the upload cap before they are spooled
+
+    Starlette parses the whole multipart body into a temporary file before
+    the route runs, so the check in ``stream_to_disk`` alone would only fire
+    after an oversized body had been received and written. For the given
+    paths this answers 413 up front when Content-Length is over the limit,
+    and fails the body read once a chunked body passes the limit (FastAPI
+    answers the HTTPException raised from ``receive`` as a 413).
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str], max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_body = max_bytes + MULTIPART_OVERHEAD_BYTES
+        self.detail = f"Upload exceeds {max_bytes} bytes"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body:
+            await JSONResponse({"detail": self.detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+async def stream_to_disk(
+    upload, destination: Path, max_bytes: int = MAX_UPLOAD_BYTES
+) -> Tuple[int, str]:
+    """Copy an UploadFile to ``destination`` in chunks, enforcing a size cap.
+
+    File I/O and hashing run in the default executor, off the event loop.
+    Returns the number of bytes written and their SHA-256 hex digest. On error
+    the partial file is removed.
+    """
+    loop = asyncio.get_running_loop()
+    written = 0
+    digest = hashlib.sha256()
+    try:
+        buffer = await loop.run_in_executor(None, open, destination, "wb")
+        try:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                await loop.run_in_executor(None, _write_chunk, buffer, digest, chunk)
+        finally:
+            await loop.run_in_executor(None, buffer.close)
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
+    return written, digest.hexdigest()
+
+
+def variant_filename(stem: str, variant: str, image_format: str) -> str:
+    return f"{stem}_{variant}.{FORMATS[image_format][1]}"
+
+
+def generate_variants(source: Path, output_dir: Path, stem: str) -> Dict[str, Dict[str, str]]:
+    """Decode ``source`` and write every size/format variant to ``output_dir``.
+
+    Orientation from EXIF is applied to the pixels and all metadata (EXIF, GPS,
+    ICC comments) is dropped, since the encoders are never handed it. Runs in
+    the image worker pool. Returns {variant: {format: filename}}.
+    """
+    try:
+        with Image.open(source) as opened:
+            opened.load()
+            image = ImageOps.exif_transpose(opened)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        logger.warning(f"Rejected upload {stem}: {str(e)}")
+        raise InvalidImageError("File is not a valid image")
+
+    if image.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha channel; flatten onto white
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    written = {}
+    for variant, edge in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        written[variant] = {}
+        for image_format, (pil_format, _, options) in FORMATS.items():
+            filename = variant_filename(stem, variant, image_format)
+            # Write then rename so a concurrent reader never sees a partial file
+            staging = output_dir / f".{filename}.tmp"
+            resized.save(staging, pil_format, **options)
+            os.replace(staging, output_dir / filename)
+            written[variant][image_format] = filename
+    return written
+
+
+async def process_upload(source: Path, output_dir: Path, stem: str) -> Dict[str, Dict[str, str]]:
+    """Generate variants for a stored upload off the event loop."""
+    return await image_pool.run(generate_variants, source, output_dir, stem)
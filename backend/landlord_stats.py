@@ -0,0 +1,212 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+# Materialized per-landlord dashboard counters.
+#
+# One `landlord_stats` document per landlord holds the numbers the analytics
+# endpoint shows, so reading them is a single indexed find_one. Every house
+# and booking write passes the document as it was before and after the write
+# to `record_house_change` / `record_booking_change`, which turn the
+# difference into one $inc. `compute_landlord_stats` recomputes the same
+# numbers from the source collections with a $facet pipeline per collection;
+# it backs both the consistency check and the rebuild.
+#
+# Deltas are only applied to an existing document. A landlord's first counter
+# write instead seeds the document from `compute_landlord_stats`, which
+# already includes the write that triggered it (the source document is saved
+# before its change is recorded).
+
+COUNTER_FIELDS = (
+    "total_properties", "total_views", "total_revenue", "pending_bookings", "approved_bookings"
+)
+
+# Booking status -> counter it is counted in; other statuses are not tracked
+BOOKING_STATUS_COUNTERS = {
+    "pending": "pending_bookings",
+    "approved": "approved_bookings",
+}
+
+
+def empty_stats() -> Dict[str, Any]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def _house_contribution(house: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    if not house:
+        return {}
+    # Views are counted across the landlord's current houses (view_tracker.py)
+    contribution = {"total_properties": 1, "total_views": house.get("views") or 0}
+    # Revenue is the monthly rent of every rented house
+    if house.get("status") == "rented":
+        contribution["total_revenue"] = house.get("price_per_month") or 0
+    return contribution
+
+
+def _booking_contribution(booking: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    if not booking:
+        return {}
+    field = BOOKING_STATUS_COUNTERS.get(booking.get("status"))
+    return {field: 1} if field else {}
+
+
+def _difference(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+    delta = {}
+    for field in set(before) | set(after):
+        change = after.get(field, 0) - before.get(field, 0)
+        if change:
+            delta[field] = change
+    return delta
+
+
+# Bump when counters change meaning; startup rebuilds every landlord once
+STATS_VERSION = 2
+STATS_VERSION_ID = "landlord_stats_version"
+
+
+async def _seed(db, landlord_id: str) -> None:
+    """Create the landlord's document from the source collections if it is missing."""
+    computed = (await compute_landlord_stats(db, landlord_id))[landlord_id]
+    await db.landlord_stats.update_one(
+        {"landlord_id": landlord_id},
+        {"$setOnInsert": {**computed, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+async def _apply(db, landlord_id: str, delta: Dict[str, float]) -> None:
+    if not delta:
+        return
+    result = await db.landlord_stats.update_one(
+        {"landlord_id": landlord_id},
+        {"$inc": delta, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    if result.matched_count == 0:
+        # An upserted $inc would hold only this delta and hide the landlord's
+        # existing houses and bookings
+        await _seed(db, landlord_id)
+
+
+async def record_house_change(db, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+    """Update counters for a house create (before=None), update or delete (after=None)."""
+    landlord_id = (after or before or {}).get("landlord_id")
+    if landlord_id:
+        await _apply(db, landlord_id, _difference(_house_contribution(before), _house_contribution(after)))
+
+
+async def record_booking_change(db, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+    """Update counters for a booking create (before=None) or status change."""
+    landlord_id = (after or before or {}).get("landlord_id")
+    if landlord_id:
+        await _apply(db, landlord_id, _difference(_booking_contribution(before), _booking_contribution(after)))
+
+
+async def compute_landlord_stats(db, landlord_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Recompute counters from houses and bookings, for one landlord or all.
+
+    Returns {landlord_id: counters}.
+    """
+    match = {"landlord_id": landlord_id} if landlord_id else {}
+    house_pipeline = [
+        {"$match": match},
+        {"$facet": {
+            "properties": [{"$group": {
+                "_id": "$landlord_id", "count": {"$sum": 1}, "views": {"$sum": "$views"}
+            }}],
+            "revenue": [
+                {"$match": {"status": "rented"}},
+                {"$group": {"_id": "$landlord_id", "total": {"$sum": "$price_per_month"}}},
+            ],
+        }},
+    ]
+    booking_pipeline = [
+        {"$match": {**match, "status": {"$in": list(BOOKING_STATUS_COUNTERS)}}},
+        {"$facet": {
+            status: [
+                {"$match": {"status": status}},
+                {"$group": {"_id": "$landlord_id", "count": {"$sum": 1}}},
+            ]
+            for status in BOOKING_STATUS_COUNTERS
+        }},
+    ]
+    house_facets, booking_facets = await asyncio.gather(
+        db.houses.aggregate(house_pipeline).to_list(1),
+        db.bookings.aggregate(booking_pipeline).to_list(1)
+    )
+    house_facets = house_facets[0] if house_facets else {}
+    booking_facets = booking_facets[0] if booking_facets else {}
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    if landlord_id:
+        stats[landlord_id] = empty_stats()
+
+    def add(rows: List[Dict[str, Any]], field: str, value_key: str) -> None:
+        for row in rows:
+            stats.setdefault(row["_id"], empty_stats())[field] = row[value_key]
+
+    add(house_facets.get("properties", []), "total_properties", "count")
+    add(house_facets.get("properties", []), "total_views", "views")
+    add(house_facets.get("revenue", []), "total_revenue", "total")
+    for status, field in BOOKING_STATUS_COUNTERS.items():
+        add(booking_facets.get(status, []), field, "count")
+    return stats
+
+
+async def get_landlord_stats(db, landlord_id: str) -> Dict[str, Any]:
+    """Counters for one landlord, materializing them on first read."""
+    stats = await db.landlord_stats.find_one({"landlord_id": landlord_id}, {"_id": 0})
+    if stats is None:
+        # Landlord predates the counters (or has never written anything)
+        await _seed(db, landlord_id)
+        stats = await db.landlord_stats.find_one({"landlord_id": landlord_id}, {"_id": 0})
+    return {**empty_stats(), **stats}
+
+
+async def check_landlord_stats(db) -> List[str]:
+    """Differences between stored counters and the source collections."""
+    computed = await compute_landlord_stats(db)
+    stored = {
+        doc["landlord_id"]: doc
+        async for doc in db.landlord_stats.find({}, {"_id": 0})
+    }
+    problems = []
+    for landlord_id in sorted(set(computed) | set(stored)):
+        expected = computed.get(landlord_id, empty_stats())
+        actual = stored.get(landlord_id, {})
+        for field in COUNTER_FIELDS:
+            if actual.get(field, 0) != expected[field]:
+                problems.append(
+                    f"{landlord_id}: {field} is {actual.get(field, 0)}, expected {expected[field]}"
+                )
+    return problems
+
+
+async def rebuild_landlord_stats(db) -> int:
+    """Overwrite every landlord's counters with freshly computed values."""
+    computed = await compute_landlord_stats(db)
+    async for doc in db.landlord_stats.find({}, {"_id": 0, "landlord_id": 1}):
+        # Landlords whose houses and bookings are all gone
+        computed.setdefault(doc["landlord_id"], empty_stats())
+    if not computed:
+        return 0
+    now = datetime.now(timezone.utc)
+    await db.landlord_stats.bulk_write([
+        UpdateOne({"landlord_id": landlord_id}, {"$set": {**counters, "updated_at": now}}, upsert=True)
+        for landlord_id, counters in computed.items()
+    ], ordered=False)
+    return len(computed)
+
+
+async def migrate_landlord_stats(db) -> bool:
+    """Rebuild all counters once per STATS_VERSION. True if it rebuilt them."""
+    marker = await db.platform_counters.find_one({"_id": STATS_VERSION_ID})
+    if marker is not None and marker.get("value", 0) >= STATS_VERSION:
+        return False
+    # Version 1 upserted partial documents on a landlord's first write
+    await rebuild_landlord_stats(db)
+    await db.platform_counters.update_one(
+        {"_id": STATS_VERSION_ID}, {"$set": {"value": STATS_VERSION}}, upsert=True
+    )
+    return True
@@ -0,0 +1,134 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from location_search import location_matches, location_tokens, normalize_location
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ListingFilter:
+    """Normalized public listing filters; hashable so it can be part of a cache key"""
+    location: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    num_rooms: Optional[int] = None
+    status: Optional[str] = None
+
+    @classmethod
+    def normalize(cls, location=None, min_price=None, max_price=None, num_rooms=None, status=None):
+        # "Woliso  TOWN" and "woliso town" are the same query
+        location = normalize_location(location) if location else None
+        return cls(
+            location=location or None,
+            min_price=float(min_price) if min_price is not None else None,
+            max_price=float(max_price) if max_price is not None else None,
+            num_rooms=num_rooms,
+            status=status or None
+        )
+
+    def matches(self, house: Dict[str, Any]) -> bool:
+        """Whether ``house`` would be returned by a query with these filters."""
+        if self.status is not None and house.get("status") != self.status:
+            return False
+        price = house.get("price_per_month")
+        if self.min_price is not None and (price is None or price < self.min_price):
+            return False
+        if self.max_price is not None and (price is None or price > self.max_price):
+            return False
+        if self.num_rooms is not None and house.get("num_rooms") != self.num_rooms:
+            return False
+        if self.location is not None:
+            tokens = house.get("location_tokens") or location_tokens(house.get("location") or "")
+            if not location_matches(self.location, tokens):
+                return False
+        return True
+
+
+@dataclass
+class ListingPage:
+    filter: ListingFilter
+    houses: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    # The JSON response body, encoded once when the page is loaded
+    body: Optional[bytes] = None
+
+    def contains(self, house_id: str) -> bool:
+        return any(house.get("house_id") == house_id for house in self.houses)
+
+
+class ListingCache:
+    """Read-through cache for the public house list and house detail responses
+
+    List pages are keyed by (filters, sort, limit, cursor) and detail
+    responses by house_id. A house write invalidates exactly the detail entry
+    for that house and the list pages that either contain it or whose filters
+    match its old or new version. Expired entries are still served for up to
+    ``stale_ttl`` seconds if MongoDB is failing.
+    """
+
+    def __init__(self, maxsize: int = 2000, ttl: float = 30, stale_ttl: float = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="listings", stale_ttl=stale_ttl)
+        # Bumped on every invalidation so a read that raced a write can't
+        # store the result it loaded before the write landed.
+        self._generation = 0
+
+    @staticmethod
+    def list_key(listing_filter: ListingFilter, sort: str, limit: int, cursor: Optional[str]) -> Tuple:
+        return ("list", listing_filter, sort, limit, cursor)
+
+    @staticmethod
+    def house_key(house_id: str) -> Tuple:
+        return ("house", house_id)
+
+    async def read_through(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+
+        generation = self._generation
+        try:
+            value = await loader()
+        except PyMongoError as e:
+            stale = self._cache.get_stale(key)
+            if stale is None:
+                raise
+            logger.warning(f"Serving stale listing cache entry after database error: {str(e)}")
+            return stale
+
+        if value is not None and generation == self._generation:
+            self._cache.set(key, value)
+        return value
+
+    def invalidate_house(self, *versions: Optional[Dict[str, Any]]) -> int:
+        """Drop entries affected by a change to a house.
+
+        Pass the house as it was before the write and/or after it (None for
+        the missing side of a create or delete).
+        """
+        houses = [house for house in versions if house]
+        if not houses:
+            return 0
+        self._generation += 1
+        house_ids = {house["house_id"] for house in houses}
+
+        def affected(key, value):
+            if key[0] == "house":
+                return key[1] in house_ids
+            return (
+                any(value.contains(house_id) for house_id in house_ids)
+                or any(value.filter.matches(house) for house in houses)
+            )
+
+        return self._cache.invalidate_where(affected)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -0,0 +1,184 @@
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Letters that NFKD does not decompose into an ASCII base letter
+_TRANSLITERATION = str.maketrans({
+    "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i",
+})
+_NON_ALNUM = re.compile(r"[^\w]+|_")
+
+
+def normalize_location(text: str) -> str:
+    """Case-fold, strip accents and transliterate to a plain searchable form.
+
+    "  Wolisó-Town " -> "woliso town"
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_NON_ALNUM.sub(" ", stripped.translate(_TRANSLITERATION)).split())
+
+
+def location_tokens(text: str) -> List[str]:
+    """Distinct normalized tokens of a location, in order of appearance."""
+    return list(dict.fromkeys(normalize_location(text).split()))
+
+
+def location_fields(location: str) -> Dict[str, Any]:
+    """Derived search fields stored alongside ``location`` on a house."""
+    return {"location_tokens": location_tokens(location)}
+
+
+def location_search_filter(query: str) -> Optional[Dict[str, Any]]:
+    """Mongo filter matching houses whose location contains every query word.
+
+    All words but the last must match a token exactly; the last one is a
+    prefix so partially typed input still matches. Both forms run against the
+    multikey ``location_tokens`` index (the prefix as an anchored regex).
+    Returns None when the query has no searchable characters.
+    """
+    tokens = location_tokens(query)
+    if not tokens:
+        return None
+    *exact, last = tokens
+    clauses = [{"location_tokens": token} for token in exact]
+    clauses.append({"location_tokens": {"$regex": f"^{re.escape(last)}"}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def location_matches(query: str, tokens: List[str]) -> bool:
+    """Python equivalent of ``location_search_filter`` for one house's tokens."""
+    query_tokens = location_tokens(query)
+    if not query_tokens:
+        return True
+    *exact, last = query_tokens
+    return all(token in tokens for token in exact) and any(t.startswith(last) for t in tokens)
+
+
+async def backfill_location_tokens(db, batch_size: int = 500) -> int:
+    """Populate ``location_tokens`` on houses written before it existed."""
+    updated = 0
+    batch = []
+    cursor = db.houses.find(
+        {"location_tokens": {"$exists": False}},
+        {"_id": 0, "house_id": 1, "location": 1}
+    )
+    async for house in cursor:
+        batch.append(UpdateOne(
+            {"house_id": house["house_id"]},
+            {"$set": location_fields(house.get("location") or "")}
+        ))
+        if len(batch) >= batch_size:
+            updated += (await db.houses.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.houses.bulk_write(batch, ordered=False)).modified_count
+    if updated:
+        logger.info(f"Backfilled location tokens on {updated} houses")
+    return updated
+
+
+# ============ AUTOCOMPLETE ============
+
+class _TrieNode:
+    __slots__ = ("children", "locations")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.locations: Dict[str, int] = {}
+
+
+class LocationTrie:
+    """Prefix trie from normalized location text to display locations.
+
+    Every location is reachable from its full normalized form and from each
+    of its tokens, so "town" suggests "Woliso Town" as well as "wol" does.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.size = 0
+
+    def insert(self, location: str, count: int = 1) -> None:
+        normalized = normalize_location(location)
+        if not normalized:
+            return
+        keys = {normalized}
+        words = normalized.split()
+        keys.update(" ".join(words[i:]) for i in range(1, len(words)))
+        for key in keys:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+            node.locations[location] = node.locations.get(location, 0) + count
+        self.size += 1
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        node = self.root
+        for char in normalize_location(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        counts: Dict[str, int] = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for location, count in current.locations.items():
+                # A location reachable through several keys counts once
+                counts[location] = max(counts.get(location, 0), count)
+            stack.extend(current.children.values())
+
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"location": location, "count": count} for location, count in ranked[:limit]]
+
+
+class LocationSuggester:
+    """In-memory autocomplete over the locations of available listings.
+
+    The trie is rebuilt from one aggregation the first time it is queried
+    after ``mark_dirty()`` (called on every house write), or once it is older
+    than ``max_age`` seconds as a safety net for writes made elsewhere.
+    """
+
+    def __init__(self, max_age: float = 300):
+        self.max_age = max_age
+        self._trie = LocationTrie()
+        self._dirty = True
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    async def refresh(self, db) -> None:
+        trie = LocationTrie()
+        pipeline = [
+            {"$match": {"status": "available"}},
+            {"$group": {"_id": "$location", "count": {"$sum": 1}}},
+        ]
+        async for row in db.houses.aggregate(pipeline):
+            if row["_id"]:
+                trie.insert(row["_id"], row["count"])
+        self._trie = trie
+        self._built_at = time.monotonic()
+
+    async def suggest(self, db, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        if self._dirty or time.monotonic() - self._built_at > self.max_age:
+            async with self._lock:
+                if self._dirty or time.monotonic() - self._built_at > self.max_age:
+                    # Clear the flag first so writes during the rebuild re-dirty it
+                    self._dirty = False
+                    try:
+                        await self.refresh(db)
+                    except Exception:
+                        self._dirty = True
+                        raise
+        return self._trie.suggest(prefix, limit)
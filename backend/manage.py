@@ -0,0 +1,165 @@
+"""Maintenance commands for the Woliso rental backend.
+
+Usage (from the backend directory):
+
+    python manage.py ensure-indexes
+    python manage.py check-indexes
+    python manage.py backfill-locations
+    python manage.py prune-uploads [--grace-hours 24]
+    python manage.py rebuild-ratings [--only-missing]
+    python manage.py check-landlord-stats [--repair]
+    python manage.py reconcile-payments [--stale-minutes 15] [--max-passes 10]
+"""
+import os
+import sys
+import asyncio
+import argparse
+import logging
+from datetime import timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from db_indexes import ensure_indexes, check_query_plans
+from chapa_service import chapa_service
+from landlord_stats import check_landlord_stats, rebuild_landlord_stats
+from location_search import backfill_location_tokens
+from payment_reconciler import PaymentReconciler
+from ratings import rebuild_rating_aggregates
+from upload_storage import UploadStore
+
+logger = logging.getLogger("manage")
+
+
+async def cmd_ensure_indexes(db, args) -> int:
+    await ensure_indexes(db)
+    return 0
+
+
+async def cmd_check_indexes(db, args) -> int:
+    if not args.skip_ensure:
+        await ensure_indexes(db)
+    problems = await check_query_plans(db)
+    for problem in problems:
+        logger.error(problem)
+    if problems:
+        logger.error(f"{len(problems)} query shape(s) are not served by an index")
+        return 1
+    logger.info("All query shapes are served by an index")
+    return 0
+
+
+async def cmd_backfill_locations(db, args) -> int:
+    updated = await backfill_location_tokens(db)
+    logger.info(f"Updated {updated} houses")
+    return 0
+
+
+async def cmd_prune_uploads(db, args) -> int:
+    store = UploadStore(ROOT_DIR / "uploads")
+    removed = await store.prune_unreferenced(db, timedelta(hours=args.grace_hours))
+    logger.info(f"Removed {removed} unreferenced uploads")
+    return 0
+
+
+async def cmd_rebuild_ratings(db, args) -> int:
+    await rebuild_rating_aggregates(db, only_missing=args.only_missing)
+    logger.info("Rebuilt house rating aggregates from feedbacks")
+    return 0
+
+
+async def cmd_check_landlord_stats(db, args) -> int:
+    problems = await check_landlord_stats(db)
+    for problem in problems:
+        logger.error(problem)
+    if problems and args.repair:
+        rebuilt = await rebuild_landlord_stats(db)
+        logger.info(f"Rebuilt counters for {rebuilt} landlords")
+        return 0
+    if problems:
+        logger.error(f"{len(problems)} landlord counter(s) differ from the source collections")
+        return 1
+    logger.info("Landlord counters match houses and bookings")
+    return 0
+
+
+async def cmd_reconcile_payments(db, args) -> int:
+    reconciler = PaymentReconciler(
+        chapa_service,
+        stale_after=args.stale_minutes * 60,
+        expire_after=float(os.environ.get('PAYMENT_EXPIRE_AFTER', '86400'))
+    )
+    try:
+        for _ in range(args.max_passes):
+            await reconciler.reconcile_once(db)
+            if reconciler.caught_up:
+                break
+    finally:
+        await chapa_service.aclose()
+    stats = reconciler.stats()
+    logger.info(f"Outcomes: {stats['outcomes']}, {stats['backlog']} stale payments left")
+    return 0
+
+
+COMMANDS = {
+    "ensure-indexes": (cmd_ensure_indexes, "Create all registered indexes"),
+    "check-indexes": (cmd_check_indexes, "Fail if any router query shape plans a COLLSCAN"),
+    "backfill-locations": (cmd_backfill_locations, "Add search tokens to houses missing them"),
+    "prune-uploads": (cmd_prune_uploads, "Delete uploads no house photo references"),
+    "rebuild-ratings": (cmd_rebuild_ratings, "Recompute house rating aggregates from feedbacks"),
+    "check-landlord-stats": (cmd_check_landlord_stats, "Compare landlord counters with houses and bookings"),
+    "reconcile-payments": (cmd_reconcile_payments, "Verify stale pending payments with Chapa"),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Woliso backend maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if name == "check-indexes":
+            subparser.add_argument(
+                "--skip-ensure", action="store_true",
+                help="check the indexes as they are instead of applying the registry first"
+            )
+        elif name == "prune-uploads":
+            subparser.add_argument(
+                "--grace-hours", type=float, default=24,
+                help="keep unreferenced uploads touched more recently than this"
+            )
+        elif name == "check-landlord-stats":
+            subparser.add_argument(
+                "--repair", action="store_true",
+                help="rebuild all counters if any differ"
+            )
+        elif name == "rebuild-ratings":
+            subparser.add_argument(
+                "--only-missing", action="store_true",
+                help="only fill in houses that have no aggregates yet"
+            )
+        elif name == "reconcile-payments":
+            subparser.add_argument(
+                "--stale-minutes", type=float, default=15,
+                help="only payments pending for longer than this"
+            )
+            subparser.add_argument("--max-passes", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        try:
+            return await COMMANDS[args.command][0](client[os.environ['DB_NAME']], args)
+        finally:
+            client.close()
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Prometheus metrics, served in the text exposition format at /metrics.
+#
+# A small in-process registry rather than prometheus_client: the app only
+# needs counters, gauges and histograms, and one registry per process is all
+# a single-worker deployment scrapes. Label values are bounded by
+# construction: HTTP metrics are labelled with the route template
+# ("/api/houses/{house_id}"), never the raw path; MongoDB metrics with the
+# collection and command name; Chapa metrics with the operation name.
+#
+# pymongo calls command listeners from the threads Motor runs operations in,
+# so every metric guards its values with a lock.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from a cached lookup to a slow gateway call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """Base for a metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(value) for value in labels)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labelnames, values, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: object, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: object) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, self.labelnames, key, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: object, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: object, value: float) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative count per bucket (last one is +Inf), and the sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: object) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, *labels: object) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        bucket_labels = self.labelnames + ("le",)
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labels, key + (bound,), cumulative
+            yield f"{self.name}_sum", self.labelnames, key, total
+            yield f"{self.name}_count", self.labelnames, key, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ("method", "route", "status")
+)
+http_request_duration = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route")
+)
+http_requests_in_progress = REGISTRY.gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled",
+    ("method", "route")
+)
+mongodb_command_duration = REGISTRY.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trips by collection and command",
+    ("collection", "command")
+)
+mongodb_command_failures = REGISTRY.counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error",
+    ("collection", "command")
+)
+chapa_request_duration = REGISTRY.histogram(
+    "chapa_request_duration_seconds", "Chapa API calls by operation and outcome (HTTP status or error)",
+    ("operation", "outcome")
+)
+
+UNMATCHED_ROUTE = "unmatched"
+# Clients can send any method name; others are labelled OTHER_METHOD
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_METHOD = "other"
+
+
+def method_label(method: str) -> str:
+    return method if method in KNOWN_METHODS else OTHER_METHOD
+
+# Route template of the request being handled, for code further down the call
+# stack (query_profiler.py). Motor copies the context into the threads it runs
+# pymongo in, so command listeners see it too; None outside a request.
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+
+class RouteTemplates:
+    """Maps a request to the path template of the route that will handle it
+
+    Matches the same way the router does (first route whose path and method
+    match, else the first whose path matches, which answers 405), but only
+    runs each route's path regex instead of building its child scope.
+    Results for routes without path parameters are memoized.
+    """
+
+    def __init__(self, routes: Sequence[BaseRoute]):
+        self._routes = [
+            (route.path_regex, getattr(route, "methods", None), route.path_format)
+            for route in routes
+            if hasattr(route, "path_regex")
+        ]
+        self._static: Dict[Tuple[str, str], str] = {}
+        self._parameterized = {
+            route.path_format for route in routes if getattr(route, "param_convertors", None)
+        }
+
+    def __call__(self, method: str, path: str) -> str:
+        template = self._static.get((method, path))
+        if template is not None:
+            return template
+        partial = None
+        for regex, methods, template in self._routes:
+            if regex.match(path):
+                if methods is None or method in methods:
+                    break
+                if partial is None:
+                    partial = template
+        else:
+            return partial or UNMATCHED_ROUTE
+        if template not in self._parameterized and method in KNOWN_METHODS:
+            # Bounded by the number of static routes times KNOWN_METHODS
+            self._static[(method, path)] = template
+        return template
+
+
+class MetricsMiddleware:
+    """Records latency, status codes and in-flight requests per route template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates: Optional[RouteTemplates] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._templates is None:
+            # Built on first use, once every route has been registered
+            self._templates = RouteTemplates(scope["app"].router.routes)
+        method = method_label(scope["method"])
+        route = self._templates(scope["method"], scope["path"])
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method, route)
+        token = current_route.set(f"{method} {route}")
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_route.reset(token)
+            http_request_duration.observe(time.perf_counter() - start, method, route)
+            http_requests.inc(method, route, status)
+            http_requests_in_progress.dec(method, route)
+
+
+def _command_collection(command_name: str, command: dict) -> str:
+    # The collection is the value of the command's first key (find, insert,
+    # aggregate, ...); getMore names it separately
+    value = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return value if isinstance(value, str) else ""
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo command listener feeding the mongodb_command_* metrics"""
+
+    def __init__(self):
+        # (connection, request id) -> labels, from started until succeeded/failed
+        self._pending: Dict[Tuple[object, int], Tuple[str, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._pending[(event.connection_id, event.request_id)] = (
+            _command_collection(event.command_name, event.command), event.command_name
+        )
+
+    def _finish(self, event) -> Optional[Tuple[str, str]]:
+        labels = self._pending.pop((event.connection_id, event.request_id), None)
+        if labels is not None:
+            mongodb_command_duration.observe(event.duration_micros / 1_000_000, *labels)
+        return labels
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        labels = self._finish(event)
+        if labels is not None:
+            mongodb_command_failures.inc(*labels)
+
+
+def observe_chapa_call(operation: str, duration: float, outcome: str) -> None:
+    """ChapaService observer feeding chapa_request_duration_seconds"""
+    chapa_request_duration.observe(duration, operation, outcome)
@@ -0,0 +1,154 @@
+import json
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+
+# Keyset (cursor) pagination.
+#
+# Each sort option is a list of (field, direction) pairs ending in a unique id
+# field, so the order is total and stable. A page is fetched by filtering for
+# documents strictly "after" the last row of the previous page instead of
+# skipping, which lets a matching compound index serve page N as cheaply as
+# page 1. The cursor handed to clients is an opaque base64 token holding the
+# sort name and the last row's sort values.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+SortSpec = List[Tuple[str, int]]
+
+HOUSE_SORTS: Dict[str, SortSpec] = {
+    "newest": [("created_at", -1), ("house_id", -1)],
+    "oldest": [("created_at", 1), ("house_id", 1)],
+    "price_asc": [("price_per_month", 1), ("house_id", 1)],
+    "price_desc": [("price_per_month", -1), ("house_id", -1)],
+    "rooms_asc": [("num_rooms", 1), ("price_per_month", 1), ("house_id", 1)],
+    "rooms_desc": [("num_rooms", -1), ("price_per_month", -1), ("house_id", -1)],
+    # Ties on the average go to the house with more reviews
+    "rating_desc": [("rating_avg", -1), ("rating_count", -1), ("house_id", -1)],
+    "rating_asc": [("rating_avg", 1), ("rating_count", 1), ("house_id", 1)],
+}
+
+LANDLORD_HOUSE_SORTS: Dict[str, SortSpec] = {
+    "newest": HOUSE_SORTS["newest"],
+    "oldest": HOUSE_SORTS["oldest"],
+}
+
+BOOKING_SORTS: Dict[str, SortSpec] = {
+    "newest": [("requested_at", -1), ("booking_id", -1)],
+    "oldest": [("requested_at", 1), ("booking_id", 1)],
+}
+
+FEEDBACK_SORTS: Dict[str, SortSpec] = {
+    "newest": [("submitted_at", -1), ("feedback_id", -1)],
+    "oldest": [("submitted_at", 1), ("feedback_id", 1)],
+}
+
+SAVED_HOUSE_SORTS: Dict[str, SortSpec] = {
+    "newest": [("saved_at", -1), ("saved_id", -1)],
+    "oldest": [("saved_at", 1), ("saved_id", 1)],
+}
+
+USER_SORTS: Dict[str, SortSpec] = {
+    "newest": [("created_at", -1), ("user_id", -1)],
+    "oldest": [("created_at", 1), ("user_id", 1)],
+}
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for an unknown sort option or a malformed/mismatched cursor."""
+
+
+def encode_cursor(sort_name: str, sort: SortSpec, doc: Dict[str, Any]) -> str:
+    payload = {"s": sort_name, "v": [doc.get(field) for field, _ in sort]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_name: str, sort: SortSpec) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidPageRequest("Invalid cursor")
+    if payload.get("s") != sort_name or len(values) != len(sort):
+        raise InvalidPageRequest("Cursor does not match the requested sort order")
+    return values
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """Filter matching rows strictly after ``values`` in ``sort`` order.
+
+    For sort keys (a, b, c) this is:
+        a > va  OR  (a == va AND b > vb)  OR  (a == va AND b == vb AND c > vc)
+    with > replaced by < for descending keys.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prefix_field: values[j] for j, (prefix_field, _) in enumerate(sort[:i])}
+        clause[field] = {"$gt" if direction == 1 else "$lt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def resolve_sort(sort_options: Dict[str, SortSpec], sort_name: str) -> SortSpec:
+    if sort_name not in sort_options:
+        raise InvalidPageRequest(
+            f"Invalid sort option '{sort_name}'. Choose one of: {', '.join(sort_options)}"
+        )
+    return sort_options[sort_name]
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort_options: Dict[str, SortSpec],
+    sort_name: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of ``collection``. Returns (documents, next_cursor)."""
+    sort = resolve_sort(sort_options, sort_name)
+    if cursor:
+        after = keyset_filter(sort, decode_cursor(cursor, sort_name, sort))
+        query = {"$and": [query, after]} if query else after
+
+    # Fetch one extra row to learn whether another page exists
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(sort_name, sort, docs[-1])
+
+
+async def aggregate_page(
+    collection,
+    query: Dict[str, Any],
+    sort_options: Dict[str, SortSpec],
+    sort_name: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    stages: Optional[List[Dict[str, Any]]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Like fetch_page, but runs ``stages`` (e.g. a $lookup) on the page's rows
+    in the same aggregation. The stages must keep the sort fields and must not
+    drop rows, since the cursor and the has-more check are taken from them.
+    """
+    sort = resolve_sort(sort_options, sort_name)
+    if cursor:
+        after = keyset_filter(sort, decode_cursor(cursor, sort_name, sort))
+        query = {"$and": [query, after]} if query else after
+
+    pipeline = [
+        {"$match": query},
+        {"$sort": dict(sort)},
+        {"$limit": limit + 1},
+        *(stages or []),
+    ]
+    docs = await collection.aggregate(pipeline).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(sort_name, sort, docs[-1])
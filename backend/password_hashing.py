@@ -0,0 +1,31 @@
+import os
+from passlib.context import CryptContext
+from worker_pool import BoundedExecutor
+
+# bcrypt costs tens of milliseconds of CPU per call, so hashing and
+# verification run in a dedicated pool instead of on the event loop. The sync
+# helpers live at module level so a process pool can pickle them.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+password_pool = BoundedExecutor(
+    name="password",
+    kind=os.environ.get("PASSWORD_HASH_EXECUTOR", "thread"),
+    max_workers=int(os.environ.get("PASSWORD_HASH_WORKERS", "0")) or None,
+    max_queue=int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", "64"))
+)
+
+
+def hash_password_sync(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    return await password_pool.run(hash_password_sync, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password_sync, plain_password, hashed_password)
@@ -0,0 +1,190 @@
+import hmac
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from chapa_service import PaymentGatewayError
+
+logger = logging.getLogger(__name__)
+
+# Payment confirmation.
+#
+# A payment is confirmed by asking the gateway to verify its tx_ref, either
+# because Chapa called our webhook or because the client polled the verify
+# endpoint after checkout. Both paths go through one PaymentConfirmer: work is
+# queued to a fixed pool of workers, and while a tx_ref is queued or being
+# verified every further request for it waits on the same future, so
+# duplicate webhooks and polls cost one gateway call. The database writes are
+# conditional on the current status and deposit flag, which makes applying
+# the same result twice a no-op.
+#
+# Only a transaction the gateway reports as failed or cancelled is marked
+# failed. Anything else that is not paid yet (still pending at Chapa, or a 4xx
+# for a transaction nobody has paid) leaves the payment pending, since the
+# tenant may still complete checkout after an early poll.
+
+# "expired" is set by the reconciler (payment_reconciler.py)
+FINAL_STATUSES = ("success", "failed", "expired")
+# Gateway transaction statuses after which the payment can no longer succeed
+GATEWAY_FAILED_STATUSES = {"failed", "cancelled"}
+# HTTP statuses worth retrying; anything else in 4xx means "no such paid transaction"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def verify_webhook_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a hex HMAC-SHA256 of the raw request body."""
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+async def record_payment_success(db, payment: Dict[str, Any], payment_data: Dict[str, Any]) -> None:
+    """Mark a payment paid and its booking's deposit paid; safe to repeat."""
+    # Conditional on status so a replay never rewrites verified_at
+    await db.payments.update_one(
+        {"tx_ref": payment["tx_ref"], "status": {"$ne": "success"}},
+        {"$set": {
+            "status": "success",
+            "verified_at": datetime.now(timezone.utc).isoformat(),
+            "chapa_response": payment_data
+        }}
+    )
+    # Applied even if the payment was already marked, in case an earlier
+    # attempt stopped between the two writes
+    await db.bookings.update_one(
+        {"booking_id": payment["booking_id"], "deposit_paid": {"$ne": True}},
+        {"$set": {"deposit_paid": True}}
+    )
+
+
+async def record_payment_unpaid(db, tx_ref: str, status: str) -> bool:
+    """Move a still-pending payment to ``status`` (failed/expired)."""
+    result = await db.payments.update_one(
+        {"tx_ref": tx_ref, "status": "pending"},
+        {"$set": {"status": status, "verified_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return result.modified_count == 1
+
+
+class ConfirmationQueueFullError(Exception):
+    """Raised when the confirmation queue cannot take more work."""
+
+
+class PaymentConfirmer:
+    """Verifies payments with the gateway on a bounded worker pool
+
+    ``workers`` bounds concurrent gateway verifications; ``max_queue`` bounds
+    the backlog (a full queue rejects new work, Chapa retries its webhooks).
+    """
+
+    def __init__(self, gateway, workers: int = 4, max_queue: int = 1000):
+        self.gateway = gateway
+        self.workers = workers
+        self.max_queue = max_queue
+        self._db = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks = []
+        self.verified = 0
+        self.deduplicated = 0
+
+    def start(self, db) -> None:
+        if self._tasks:
+            return
+        self._db = db
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for future in self._inflight.values():
+            future.cancel()
+        self._inflight.clear()
+
+    def submit(self, tx_ref: str, recheck_failed: bool = False) -> asyncio.Future:
+        """Queue a confirmation, or join the one already pending for ``tx_ref``.
+
+        ``recheck_failed`` asks the gateway again even if the payment is
+        recorded as failed or expired (a webhook saying it has since succeeded).
+        """
+        future = self._inflight.get(tx_ref)
+        if future is not None:
+            self.deduplicated += 1
+            return future
+        if self._queue is None:
+            raise RuntimeError("PaymentConfirmer has not been started")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((tx_ref, recheck_failed, future))
+        except asyncio.QueueFull:
+            raise ConfirmationQueueFullError("Payment confirmation queue is full")
+        self._inflight[tx_ref] = future
+        return future
+
+    async def confirm(self, tx_ref: str) -> Dict[str, Any]:
+        """Confirm ``tx_ref`` and wait for the outcome."""
+        # Shielded so a disconnecting client doesn't cancel work others share
+        return await asyncio.shield(self.submit(tx_ref))
+
+    async def _worker(self) -> None:
+        while True:
+            tx_ref, recheck_failed, future = await self._queue.get()
+            try:
+                result = await self._confirm(tx_ref, recheck_failed)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Payment confirmation failed for {tx_ref}: {str(e)}")
+                if not future.done():
+                    future.set_exception(e)
+                    # Nobody may be awaiting (webhook path); don't warn about it
+                    future.exception()
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._inflight.pop(tx_ref, None)
+                self._queue.task_done()
+
+    async def _confirm(self, tx_ref: str, recheck_failed: bool) -> Dict[str, Any]:
+        db = self._db
+        payment = await db.payments.find_one({"tx_ref": tx_ref}, {"_id": 0})
+        if payment is None:
+            return {"status": "not_found"}
+        if payment["status"] == "success" or (payment["status"] in FINAL_STATUSES and not recheck_failed):
+            return {"status": payment["status"], "payment_data": payment.get("chapa_response")}
+
+        try:
+            response = await self.gateway.verify_payment(tx_ref)
+        except PaymentGatewayError as e:
+            if e.status_code in RETRYABLE_STATUSES or e.status_code is None:
+                raise
+            # Chapa answers 4xx for transactions that were never paid
+            response = None
+        self.verified += 1
+
+        payment_data = (response or {}).get("payment_data") or {}
+        if response and response["status"] == "success" and payment_data.get("status") == "success":
+            await record_payment_success(db, payment, payment_data)
+            return {"status": "success", "payment_data": payment_data}
+        if payment_data.get("status") in GATEWAY_FAILED_STATUSES:
+            await record_payment_unpaid(db, tx_ref, "failed")
+            return {"status": "failed", "payment_data": None}
+        # Not paid yet; the reconciler expires it if it never is
+        return {"status": payment["status"], "payment_data": None}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._inflight),
+            "workers": len(self._tasks),
+            "gateway_verifications": self.verified,
+            "deduplicated": self.deduplicated,
+        }
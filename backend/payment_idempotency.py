@@ -0,0 +1,106 @@
+import uuid
+import asyncio
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+# Duplicate protection for payment initialization.
+#
+# Two mechanisms, both stored in the `payment_idempotency` collection so they
+# hold across server processes, and both expiring through a TTL index on
+# `expires_at`:
+#
+# - Idempotency keys: a client-chosen `Idempotency-Key` header. The first
+#   response for a key is stored and returned for every retry with the same
+#   key; reusing the key for another booking is rejected.
+# - Booking locks: while one request is talking to the gateway for a
+#   booking, others for the same booking wait for its result instead of
+#   starting a second checkout. A lock left behind by a crashed process is
+#   taken over once it has expired (the TTL monitor only runs once a minute).
+#   Each holder gets its own owner token and only releases a lock that still
+#   carries it, so a holder that outlived its TTL can't free the lock of the
+#   request that took it over.
+
+COLLECTION = "payment_idempotency"
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """Raised when an idempotency key is reused for a different request."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def key_id(tenant_id: str, key: str) -> str:
+    # Scoped per tenant so clients can't collide with each other's keys
+    return f"key:{tenant_id}:{key}"
+
+
+def lock_id(booking_id: str) -> str:
+    return f"booking:{booking_id}"
+
+
+async def stored_response(db, record_id: str, request: str) -> Optional[Dict[str, Any]]:
+    """The response stored under an idempotency key, if any.
+
+    ``request`` identifies what the key was used for (the booking id); a
+    different value raises IdempotencyKeyMismatchError.
+    """
+    record = await db[COLLECTION].find_one({"_id": record_id, "expires_at": {"$gt": _now()}})
+    if record is None:
+        return None
+    if record["request"] != request:
+        raise IdempotencyKeyMismatchError("Idempotency-Key was already used for a different booking")
+    return record["response"]
+
+
+async def store_response(db, record_id: str, request: str, response: Dict[str, Any], ttl: float) -> None:
+    await db[COLLECTION].update_one(
+        {"_id": record_id},
+        {"$set": {
+            "request": request,
+            "response": response,
+            "expires_at": _now() + timedelta(seconds=ttl)
+        }},
+        upsert=True
+    )
+
+
+async def acquire_lock(db, record_id: str, ttl: float) -> Optional[str]:
+    """Take the lock, or take over an expired one.
+
+    Returns the owner token to release it with, or None if someone holds it.
+    """
+    now = _now()
+    expires_at = now + timedelta(seconds=ttl)
+    owner = uuid.uuid4().hex
+    try:
+        await db[COLLECTION].insert_one({"_id": record_id, "owner": owner, "expires_at": expires_at})
+        return owner
+    except DuplicateKeyError:
+        result = await db[COLLECTION].update_one(
+            {"_id": record_id, "expires_at": {"$lte": now}},
+            {"$set": {"owner": owner, "expires_at": expires_at}}
+        )
+        return owner if result.modified_count == 1 else None
+
+
+async def release_lock(db, record_id: str, owner: str) -> None:
+    """Release the lock if ``owner`` still holds it."""
+    await db[COLLECTION].delete_one({"_id": record_id, "owner": owner})
+
+
+async def wait_for_lock(db, record_id: str, timeout: float, poll_interval: float = 0.1) -> bool:
+    """Wait until nobody holds the lock. False if it is still held after ``timeout``."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        held = await db[COLLECTION].find_one(
+            {"_id": record_id, "expires_at": {"$gt": _now()}}, {"_id": 1}
+        )
+        if held is None:
+            return True
+        if asyncio.get_running_loop().time() >= deadline:
+            return False
+        await asyncio.sleep(poll_interval)
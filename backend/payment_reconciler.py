@@ -0,0 +1,231 @@
+import math
+import time
+import random
+import asyncio
+import logging
+from collections import Counter, deque
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+
+from chapa_service import PaymentGatewayError
+from pagination import SortSpec, keyset_filter
+from payment_confirmation import (
+    GATEWAY_FAILED_STATUSES,
+    RETRYABLE_STATUSES,
+    record_payment_success,
+    record_payment_unpaid,
+)
+
+logger = logging.getLogger(__name__)
+
+# Reconciliation of abandoned payments.
+#
+# A payment stays `pending` until a webhook or the tenant's return to the app
+# confirms it; if neither happens (closed tab, lost webhook) nothing ever
+# looks at it again. The reconciler periodically takes the oldest pending
+# payments past `stale_after` (index payments.status_created_id), a batch per
+# pass, and verifies them with the gateway a bounded number at a time:
+#
+# - paid                        -> success, booking deposit_paid (as a webhook would)
+# - gateway reports it failed   -> failed
+# - not paid after expire_after -> expired; younger ones are retried next pass
+#
+# Rate limiting (429) and gateway errors are retried with exponential backoff
+# and jitter, honouring Retry-After; a 429 pauses every worker, not just the
+# one that hit it. All writes are conditional on the payment still being
+# pending, so racing a webhook is harmless.
+
+# Batch order; payment_id breaks ties so a batch boundary never skips payments
+# created in the same instant (index payments.status_created_id)
+STALE_SORT: SortSpec = [("created_at", 1), ("payment_id", 1)]
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class PaymentReconciler:
+    """Verifies stale pending payments with the gateway in the background"""
+
+    def __init__(
+        self,
+        gateway,
+        interval: float = 60,
+        stale_after: float = 900,
+        expire_after: float = 86400,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        self.gateway = gateway
+        self.interval = interval
+        self.stale_after = stale_after
+        self.expire_after = expire_after
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._task: Optional[asyncio.Task] = None
+        self._pass_lock = asyncio.Lock()
+        # Monotonic time before which no worker calls the gateway (rate limit)
+        self._resume_at = 0.0
+        # Sort values of the last payment of the previous batch
+        self._cursor: Optional[List[Any]] = None
+        self.outcomes: Counter = Counter()
+        self.retries = 0
+        self.rate_limited = 0
+        self.passes = 0
+        self.backlog: Optional[int] = None
+        self.oldest_pending_age: Optional[float] = None
+        self.last_pass_seconds: Optional[float] = None
+        self._latencies: deque = deque(maxlen=1000)
+
+    def _stale_filter(self, now: datetime) -> Dict[str, Any]:
+        # created_at is an ISO-8601 UTC string, so string order is time order
+        cutoff = (now - timedelta(seconds=self.stale_after)).isoformat()
+        return {"status": "pending", "created_at": {"$lt": cutoff}}
+
+    async def reconcile_once(self, db) -> Dict[str, int]:
+        """Reconcile up to ``batch_size`` stale payments. Returns outcome counts."""
+        async with self._pass_lock:
+            started = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            stale = self._stale_filter(now)
+            query = stale
+            if self._cursor is not None:
+                query = {"$and": [stale, keyset_filter(STALE_SORT, self._cursor)]}
+            payments = await db.payments.find(query, {"_id": 0}).sort(
+                STALE_SORT
+            ).limit(self.batch_size).to_list(self.batch_size)
+            # Walk the stale range in batches so payments that stay pending
+            # don't keep the newer ones from being checked; start over at the end
+            self._cursor = (
+                [payments[-1].get(field) for field, _ in STALE_SORT]
+                if len(payments) == self.batch_size else None
+            )
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def run(payment):
+                async with semaphore:
+                    return await self._reconcile(db, payment, now)
+
+            results = await asyncio.gather(*(run(p) for p in payments), return_exceptions=True)
+            outcomes: Counter = Counter()
+            for payment, result in zip(payments, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Reconciling {payment['tx_ref']} failed: {str(result)}")
+                    result = "error"
+                outcomes[result] += 1
+            self.outcomes.update(outcomes)
+
+            self.backlog = await db.payments.count_documents(stale)
+            oldest = await db.payments.find_one(
+                {"status": "pending"}, {"_id": 0, "created_at": 1}, sort=[("created_at", 1)]
+            )
+            self.oldest_pending_age = (
+                round((now - datetime.fromisoformat(oldest["created_at"])).total_seconds(), 1)
+                if oldest else None
+            )
+            self.passes += 1
+            self.last_pass_seconds = round(time.perf_counter() - started, 3)
+            if payments:
+                logger.info(
+                    f"Reconciled {len(payments)} pending payments: {dict(outcomes)}, "
+                    f"{self.backlog} still stale"
+                )
+            return dict(outcomes)
+
+    @property
+    def caught_up(self) -> bool:
+        """True when the last pass reached the newest stale payment."""
+        return self._cursor is None
+
+    async def _reconcile(self, db, payment: Dict[str, Any], now: datetime) -> str:
+        started = time.perf_counter()
+        try:
+            response = await self._verify(payment["tx_ref"])
+        except PaymentGatewayError as e:
+            if e.status_code in RETRYABLE_STATUSES or e.status_code is None:
+                # Out of attempts for this pass; picked up again next pass
+                return "retry_later"
+            # Chapa answers 4xx for transactions that were never paid
+            response = None
+        finally:
+            self._latencies.append(time.perf_counter() - started)
+
+        payment_data = (response or {}).get("payment_data") or {}
+        if response and response["status"] == "success" and payment_data.get("status") == "success":
+            await record_payment_success(db, payment, payment_data)
+            return "success"
+        if payment_data.get("status") in GATEWAY_FAILED_STATUSES:
+            await record_payment_unpaid(db, payment["tx_ref"], "failed")
+            return "failed"
+        age = (now - datetime.fromisoformat(payment["created_at"])).total_seconds()
+        if age >= self.expire_after:
+            await record_payment_unpaid(db, payment["tx_ref"], "expired")
+            return "expired"
+        return "pending"
+
+    async def _verify(self, tx_ref: str) -> Dict[str, Any]:
+        for attempt in range(self.max_attempts):
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await self.gateway.verify_payment(tx_ref)
+            except PaymentGatewayError as e:
+                retryable = e.status_code in RETRYABLE_STATUSES or e.status_code is None
+                if not retryable or attempt == self.max_attempts - 1:
+                    raise
+                delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                if e.status_code == 429:
+                    self.rate_limited += 1
+                    self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _run(self, db) -> None:
+        while True:
+            try:
+                await self.reconcile_once(db)
+            except Exception as e:
+                logger.error(f"Payment reconciliation failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, db) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self._latencies)
+        return {
+            "backlog": self.backlog,
+            "oldest_pending_age_seconds": self.oldest_pending_age,
+            "outcomes": dict(self.outcomes),
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "passes": self.passes,
+            "last_pass_seconds": self.last_pass_seconds,
+            "reconcile_p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "reconcile_p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,363 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson.regex import Regex
+from pymongo import monitoring
+
+from metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+# Opt-in slow-query profiler (QUERY_PROFILER=1).
+#
+# A pymongo command listener on the Motor client. Every read and write
+# command is reduced to its shape: the command, the collection and the
+# filter/sort/pipeline with values replaced by placeholders, so
+# `{"tenant_id": "<uuid>"}` and `{"tenant_id": "<other uuid>"}` are one shape
+# and no user data is kept. Per shape it counts executions, slow executions
+# (above QUERY_PROFILER_SLOW_MS) and the routes they came from; the route is
+# read from metrics.current_route, which Motor carries into its worker
+# threads.
+#
+# The first time a shape is seen, and again when it runs slow with a plan
+# older than EXPLAIN_REFRESH seconds, the command is explained in the
+# background (queryPlanner verbosity, so the query is not executed again).
+# A winning plan containing a COLLSCAN marks the shape as offending even if it
+# is fast today. Only the plan's stages and index names are kept.
+#
+# GET /api/admin/slow-queries returns the offending shapes, worst first.
+
+# Commands with a query plan worth looking at
+PROFILED_COMMANDS = frozenset({
+    "find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"
+})
+# Command fields that are about the session or the connection, not the query;
+# explain rejects some of them
+_SESSION_FIELDS = frozenset({
+    "lsid", "txnNumber", "$db", "$clusterTime", "$readPreference", "readConcern", "writeConcern",
+    "autocommit", "startTransaction", "apiVersion", "apiStrict", "apiDeprecationErrors",
+})
+# Tracked shapes, offending or not; the least recently seen is dropped first
+MAX_SHAPES = 1000
+EXPLAIN_QUEUE_SIZE = 100
+EXPLAIN_REFRESH = 3600
+BACKGROUND_ROUTE = "background"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def query_shape(value: Any) -> Any:
+    """``value`` with every literal replaced by a placeholder.
+
+    Operators and field names are kept; arrays of values collapse to one
+    placeholder, arrays of sub-documents ($and, $or, pipelines) keep their
+    structure. Regexes stay distinguishable from plain equality.
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return "<array>"
+    if isinstance(value, (Regex, re.Pattern)):
+        return "<regex>"
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a command that decide its plan, as a shape"""
+    if command_name == "find":
+        parts = {key: command.get(key) for key in ("filter", "sort", "hint")}
+    elif command_name == "aggregate":
+        parts = {"pipeline": command.get("pipeline")}
+    elif command_name == "count":
+        parts = {"query": command.get("query")}
+    elif command_name == "distinct":
+        parts = {"key": command.get("key"), "query": command.get("query")}
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        # Bulk writes of one kind share the statement shape; the first stands for all
+        parts = {"q": statements[0].get("q"), "multi": statements[0].get("multi")}
+    else:
+        parts = {key: command.get(key) for key in ("query", "sort")}
+    return {key: query_shape(value) for key, value in parts.items() if value is not None}
+
+
+def explain_command(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The command to pass to explain: one statement, no session fields"""
+    explained = {key: value for key, value in command.items() if key not in _SESSION_FIELDS}
+    if command_name == "update":
+        explained["updates"] = explained["updates"][:1]
+    elif command_name == "delete":
+        explained["deletes"] = explained["deletes"][:1]
+    return explained
+
+
+def summarize_plan(plan: Any) -> Any:
+    """A plan tree reduced to stages and indexes (no bounds or filter values)"""
+    if isinstance(plan, list):
+        return [summarize_plan(item) for item in plan]
+    if not isinstance(plan, dict):
+        return None
+    summary = {}
+    for key in ("stage", "indexName", "keyPattern"):
+        if key in plan:
+            summary[key] = plan[key]
+    for key in ("inputStage", "inputStages", "queryPlan", "winningPlan"):
+        if key in plan:
+            summary[key] = summarize_plan(plan[key])
+    return summary
+
+
+def winning_plans(explain: Any) -> List[Any]:
+    """Every winningPlan in an explain result (aggregations nest them per stage)"""
+    found = []
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                found.append(value)
+            elif key != "rejectedPlans":
+                found.extend(winning_plans(value))
+    elif isinstance(explain, list):
+        for item in explain:
+            found.extend(winning_plans(item))
+    return found
+
+
+def plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+class ShapeStats:
+    """What has been seen of one query shape"""
+
+    def __init__(self, shape_id: str, command: str, collection: str, shape: Dict[str, Any]):
+        self.shape_id = shape_id
+        self.command = command
+        self.collection = collection
+        self.shape = shape
+        self.executions = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_executions = 0
+        self.slow_ms = 0.0
+        self.routes: Counter = Counter()
+        self.collscan = False
+        self.plan: Optional[List[Any]] = None
+        self.explained_at: Optional[float] = None
+        self.explain_pending = False
+        self.last_seen = ""
+
+    @property
+    def offending(self) -> bool:
+        return self.slow_executions > 0 or self.collscan
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "shape_id": self.shape_id,
+            "command": self.command,
+            "collection": self.collection,
+            "shape": self.shape,
+            "collscan": self.collscan,
+            "executions": self.executions,
+            "slow_executions": self.slow_executions,
+            "avg_ms": round(self.total_ms / self.executions, 2) if self.executions else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "slow_total_ms": round(self.slow_ms, 2),
+            "routes": dict(self.routes.most_common(5)),
+            "plan": self.plan,
+            "explained_at": (
+                datetime.fromtimestamp(self.explained_at, timezone.utc).isoformat()
+                if self.explained_at else None
+            ),
+            "last_seen": self.last_seen,
+        }
+
+
+class SlowQueryProfiler(monitoring.CommandListener):
+    """Flags slow and collection-scanning query shapes (see module comment)"""
+
+    def __init__(self, slow_ms: float = 100, top_n: int = 20, enabled: bool = True):
+        self.slow_ms = slow_ms
+        self.top_n = top_n
+        self.enabled = enabled
+        # Listener callbacks run on Motor's worker threads
+        self._lock = threading.Lock()
+        # (connection, request id) -> (shape stats, command) between started and succeeded
+        self._pending: Dict[Tuple[Any, int], Tuple[ShapeStats, Dict[str, Any]]] = {}
+        self._shapes: "OrderedDict[str, ShapeStats]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.explains = 0
+        self.explain_failures = 0
+        self.explains_dropped = 0
+
+    # Listener callbacks (Motor worker threads)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if not self.enabled or event.command_name not in PROFILED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            # Database-level aggregations ($currentOp etc.)
+            return
+        shape = command_shape(event.command_name, command)
+        key = json.dumps([event.database_name, event.command_name, collection, shape], default=str)
+        shape_id = hashlib.sha1(key.encode()).hexdigest()[:12]
+        with self._lock:
+            stats = self._shapes.get(shape_id)
+            if stats is None:
+                stats = ShapeStats(shape_id, event.command_name, collection, shape)
+                self._shapes[shape_id] = stats
+                if len(self._shapes) > MAX_SHAPES:
+                    self._evict()
+            else:
+                self._shapes.move_to_end(shape_id)
+            stats.routes[current_route.get() or BACKGROUND_ROUTE] += 1
+        self._pending[(event.connection_id, event.request_id)] = (stats, command)
+        if stats.explained_at is None:
+            self._request_explain(stats, event.database_name, command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event)
+
+    def _finish(self, event) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        stats, command = pending
+        elapsed_ms = event.duration_micros / 1000
+        slow = elapsed_ms >= self.slow_ms
+        with self._lock:
+            stats.executions += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.last_seen = _now()
+            if slow:
+                stats.slow_executions += 1
+                stats.slow_ms += elapsed_ms
+        if slow:
+            logger.warning(
+                f"Slow query ({elapsed_ms:.0f} ms) {stats.command} {stats.collection} "
+                f"shape={stats.shape_id} route={current_route.get() or BACKGROUND_ROUTE}"
+            )
+            if stats.explained_at is not None and time.time() - stats.explained_at > EXPLAIN_REFRESH:
+                self._request_explain(stats, event.database_name, command)
+
+    def _evict(self) -> None:
+        # Least recently seen harmless shape first; offending ones only when all are
+        for shape_id, stats in self._shapes.items():
+            if not stats.offending:
+                del self._shapes[shape_id]
+                return
+        self._shapes.popitem(last=False)
+
+    def _request_explain(self, stats: ShapeStats, database: str, command: Dict[str, Any]) -> None:
+        if self._loop is None or stats.explain_pending:
+            return
+        stats.explain_pending = True
+        item = (stats, database, explain_command(stats.command, command))
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, item)
+        except RuntimeError:
+            # Loop already closed (shutdown)
+            stats.explain_pending = False
+
+    # Explain worker (event loop)
+
+    def _enqueue(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            item[0].explain_pending = False
+            self.explains_dropped += 1
+
+    async def _explain(self, db, stats: ShapeStats, database: str, command: Dict[str, Any]) -> None:
+        try:
+            result = await db.client[database].command(
+                {"explain": command, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            self.explain_failures += 1
+            # Retried with the plan refresh, not on every execution
+            stats.explained_at = time.time()
+            logger.warning(f"Explain failed for {stats.command} {stats.collection}: {str(e)}")
+            return
+        finally:
+            stats.explain_pending = False
+        plans = winning_plans(result)
+        with self._lock:
+            stats.plan = summarize_plan(plans)
+            stats.collscan = "COLLSCAN" in plan_stages(plans)
+            stats.explained_at = time.time()
+        self.explains += 1
+        if stats.collscan:
+            logger.warning(f"Collection scan: {stats.command} {stats.collection} shape={stats.shape_id}")
+
+    async def _run(self, db) -> None:
+        while True:
+            stats, database, command = await self._queue.get()
+            await self._explain(db, stats, database, command)
+
+    def start(self, db) -> None:
+        if self.enabled and self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        self._loop = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Reporting
+
+    def report(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            offending = [stats for stats in self._shapes.values() if stats.offending]
+            offending.sort(key=lambda s: (s.slow_ms, s.collscan, s.executions), reverse=True)
+            top = [stats.to_dict() for stats in offending[:limit or self.top_n]]
+            tracked = len(self._shapes)
+        return {
+            "enabled": self.enabled,
+            "slow_ms": self.slow_ms,
+            "tracked_shapes": tracked,
+            "offending_shapes": len(offending),
+            "explains": self.explains,
+            "explain_failures": self.explain_failures,
+            "explains_dropped": self.explains_dropped,
+            "queries": top,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
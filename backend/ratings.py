@@ -0,0 +1,92 @@
+from typing import Any, Dict, List
+
+# Per-house rating aggregates.
+#
+# Every house carries rating_count, rating_sum, rating_avg and a histogram of
+# how many reviews gave each star value ({"1": n, ..., "5": n}). A new review
+# updates them with one pipeline update on the house document, so readers
+# never see a count without its matching sum and average. The aggregates can
+# always be recomputed from the feedbacks collection with
+# `rebuild_rating_aggregates`.
+
+RATING_VALUES = range(1, 6)
+
+
+def empty_rating_fields() -> Dict[str, Any]:
+    """Aggregate fields for a house with no reviews."""
+    return {
+        "rating_count": 0,
+        "rating_sum": 0,
+        "rating_avg": 0.0,
+        "rating_histogram": {str(value): 0 for value in RATING_VALUES},
+    }
+
+
+def add_rating_update(rating: int) -> List[Dict[str, Any]]:
+    """Pipeline update recording one more review of ``rating`` stars on a house."""
+    bucket = f"rating_histogram.{rating}"
+    return [
+        {"$set": {
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, 1]},
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, rating]},
+            bucket: {"$add": [{"$ifNull": [f"${bucket}", 0]}, 1]},
+        }},
+        # Runs after the first stage, so it sees the new count and sum
+        {"$set": {"rating_avg": {"$divide": ["$rating_sum", "$rating_count"]}}},
+    ]
+
+
+def _rebuild_pipeline(only_missing: bool) -> List[Dict[str, Any]]:
+    histogram = {
+        str(value): {"$sum": {"$cond": [{"$eq": ["$rating", value]}, 1, 0]}}
+        for value in RATING_VALUES
+    }
+    pipeline = []
+    if only_missing:
+        pipeline.append({"$match": {"rating_count": {"$exists": False}}})
+    pipeline += [
+        {"$project": {"_id": 0, "house_id": 1}},
+        # Served by the feedbacks house_submitted_id index
+        {"$lookup": {
+            "from": "feedbacks",
+            "let": {"house_id": "$house_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$house_id", "$$house_id"]}}},
+                {"$group": {"_id": None, "count": {"$sum": 1}, "sum": {"$sum": "$rating"}, **histogram}},
+            ],
+            "as": "totals",
+        }},
+        {"$set": {"totals": {"$ifNull": [{"$arrayElemAt": ["$totals", 0]}, {"count": 0, "sum": 0}]}}},
+        {"$project": {
+            "house_id": 1,
+            "rating_count": "$totals.count",
+            "rating_sum": "$totals.sum",
+            "rating_avg": {"$cond": [
+                {"$gt": ["$totals.count", 0]},
+                {"$divide": ["$totals.sum", "$totals.count"]},
+                0.0,
+            ]},
+            "rating_histogram": {
+                str(value): {"$ifNull": [f"$totals.{value}", 0]} for value in RATING_VALUES
+            },
+        }},
+        # Needs the unique house_id index (db_indexes.py)
+        {"$merge": {
+            "into": "houses",
+            "on": "house_id",
+            "whenMatched": "merge",
+            "whenNotMatched": "discard",
+        }},
+    ]
+    return pipeline
+
+
+async def rebuild_rating_aggregates(db, only_missing: bool = False) -> None:
+    """Recompute every house's rating aggregates from its reviews in one pipeline.
+
+    With ``only_missing`` only houses written before the aggregates existed
+    are filled in, which is cheap enough to run on every startup.
+    """
+    # $merge produces no output documents; iterating runs the pipeline
+    async for _ in db.houses.aggregate(_rebuild_pipeline(only_missing)):
+        pass
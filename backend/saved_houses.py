@@ -0,0 +1,48 @@
+from typing import Any, Dict, Iterable
+
+from ttl_cache import TTLCache
+
+
+class SavedHouseCache:
+    """Per-tenant memo of which house ids a tenant has saved
+
+    Each tenant maps to {house_id: saved} for the ids looked up so far; only
+    unknown ids go to MongoDB, as a single $in query. save_house records its
+    result here so the tenant's own toggles are visible immediately. Entries
+    expire after ``ttl`` seconds, which bounds staleness when another server
+    process changed the saved state.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="saved_houses")
+
+    async def are_saved(self, db, tenant_id: str, house_ids: Iterable[str]) -> Dict[str, bool]:
+        house_ids = list(dict.fromkeys(house_ids))
+        known = self._cache.get(tenant_id)
+        if known is None:
+            known = {}
+            self._cache.set(tenant_id, known)
+
+        unknown = [house_id for house_id in house_ids if house_id not in known]
+        if unknown:
+            saved = {
+                doc["house_id"]
+                async for doc in db.saved_houses.find(
+                    {"tenant_id": tenant_id, "house_id": {"$in": unknown}},
+                    {"_id": 0, "house_id": 1}
+                )
+            }
+            # Updated in place so the entry keeps its original expiry. An id
+            # record()ed while the query ran keeps that newer value, since the
+            # query may have read from before the toggle
+            for house_id in unknown:
+                known.setdefault(house_id, house_id in saved)
+        return {house_id: known[house_id] for house_id in house_ids}
+
+    def record(self, tenant_id: str, house_id: str, saved: bool) -> None:
+        known = self._cache.get(tenant_id)
+        if known is not None:
+            known[house_id] = saved
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -1,10 +1,15 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Request, Response, Query, Header
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
+import json
+import hmac
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
@@ -12,36 +17,172 @@ from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-from passlib.context import CryptContext
-import shutil
-from chapa_service import ChapaService, PaymentGatewayError 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Local modules read their settings from the environment at import time,
+# so they are imported after the .env file has been loaded.
+from chapa_service import GatewayUnavailableError, PaymentGatewayError, chapa_service
+from password_hashing import hash_password, verify_password, password_pool
+from worker_pool import PoolSaturatedError
+from image_pipeline import InvalidImageError, UploadLimitMiddleware, UploadTooLargeError, image_pool
+from upload_storage import UnsupportedImageTypeError, UploadStore
+from static_serving import UploadFiles
+from ttl_cache import TTLCache
+from db_indexes import ensure_indexes
+from landlord_stats import get_landlord_stats, migrate_landlord_stats, record_booking_change, record_house_change
+from admin_stats import AdminStatsSnapshot, migrate_pending_houses, record_pending_houses
+from view_tracker import ViewTracker, daily_views
+from ratings import add_rating_update, empty_rating_fields, rebuild_rating_aggregates
+from listing_cache import ListingCache, ListingFilter, ListingPage
+from location_search import (
+    LocationSuggester, location_fields, location_search_filter, backfill_location_tokens
+)
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, HOUSE_SORTS, LANDLORD_HOUSE_SORTS, BOOKING_SORTS,
+    FEEDBACK_SORTS, SAVED_HOUSE_SORTS, USER_SORTS, InvalidPageRequest, aggregate_page, fetch_page
+)
+from saved_houses import SavedHouseCache
+from fast_json import encoded_response, serializer_for, trusted_item, trusted_list
+from payment_confirmation import (
+    FINAL_STATUSES, ConfirmationQueueFullError, PaymentConfirmer, verify_webhook_signature
+)
+from payment_reconciler import PaymentReconciler
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, MongoCommandTimer, observe_chapa_call
+from query_profiler import SlowQueryProfiler
+from payment_idempotency import (
+    IdempotencyKeyMismatchError, acquire_lock, key_id, lock_id, release_lock, store_response,
+    stored_response, wait_for_lock
+)
+
+# Opt-in (QUERY_PROFILER=1): query shapes slower than QUERY_PROFILER_SLOW_MS or
+# planned as a collection scan are reported at /api/admin/slow-queries
+query_profiler = SlowQueryProfiler(
+    slow_ms=float(os.environ.get('QUERY_PROFILER_SLOW_MS', '100')),
+    top_n=int(os.environ.get('QUERY_PROFILER_TOP_N', '20')),
+    enabled=os.environ.get('QUERY_PROFILER', '0') == '1'
+)
+
+# MongoDB connection; every command is timed for /metrics
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandTimer(), query_profiler])
 db = client[os.environ['DB_NAME']]
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 CHAPA_SECRET_KEY = os.environ.get('CHAPA_SECRET_KEY', '')
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
 
 security = HTTPBearer()
+# For public endpoints that behave differently for signed-in users
+optional_security = HTTPBearer(auto_error=False)
+
+# Authenticated-user caches. Verified tokens skip the signature check until
+# they expire; user documents skip the Mongo lookup for USER_CACHE_TTL seconds.
+# No route changes an existing user document, so only edits made directly in
+# the database (a role change, a removed user) can be stale, and for at most
+# USER_CACHE_TTL seconds per process. A route that starts writing to users
+# must call user_cache.invalidate(user_id) after the write.
+token_cache = TTLCache(
+    maxsize=int(os.environ.get('TOKEN_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('TOKEN_CACHE_TTL', '300')),
+    name="verified_tokens"
+)
+user_cache = TTLCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('USER_CACHE_TTL', '60')),
+    name="users"
+)
+
+# Location autocomplete over available listings, rebuilt after house writes
+location_suggester = LocationSuggester(
+    max_age=float(os.environ.get('LOCATION_SUGGEST_MAX_AGE', '300'))
+)
+
+# Read-through cache for the public listing endpoints
+listing_cache = ListingCache(
+    maxsize=int(os.environ.get('LISTING_CACHE_SIZE', '2000')),
+    ttl=float(os.environ.get('LISTING_CACHE_TTL', '30')),
+    stale_ttl=float(os.environ.get('LISTING_CACHE_STALE_TTL', '300'))
+)
+
+# Which houses each tenant has saved, for listing grids
+saved_house_cache = SavedHouseCache(
+    maxsize=int(os.environ.get('SAVED_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('SAVED_CACHE_TTL', '300'))
+)
+
+# House detail views are counted in memory and flushed in batches; the dedup
+# window (opt-in, seconds) skips repeat views of a house by the same viewer
+view_tracker = ViewTracker(
+    flush_interval=float(os.environ.get('VIEW_FLUSH_INTERVAL', '10')),
+    dedup_window=float(os.environ.get('VIEW_DEDUP_WINDOW', '0'))
+)
+# Number of reverse proxies in front of the app that append to X-Forwarded-For;
+# 0 ignores the header (anything in it may have been sent by the client)
+TRUSTED_PROXY_DEPTH = int(os.environ.get('TRUSTED_PROXY_DEPTH', '0'))
+
+# Admin dashboard totals, served from a periodically refreshed snapshot
+admin_stats = AdminStatsSnapshot(
+    refresh_interval=float(os.environ.get('ADMIN_STATS_REFRESH_INTERVAL', '30'))
+)
+
+# Chapa webhooks and verify polls are confirmed on a small worker pool, one
+# gateway call per tx_ref at a time (payment_confirmation.py)
+CHAPA_WEBHOOK_SECRET = os.environ.get('CHAPA_WEBHOOK_SECRET', '')
+chapa_service.add_observer(observe_chapa_call)
+payment_confirmer = PaymentConfirmer(
+    chapa_service,
+    workers=int(os.environ.get('PAYMENT_CONFIRM_WORKERS', '4')),
+    max_queue=int(os.environ.get('PAYMENT_CONFIRM_QUEUE_SIZE', '1000'))
+)
+
+# Pending payments nobody confirmed are re-verified with Chapa once they are
+# PAYMENT_RECONCILE_STALE_AFTER seconds old, and expired after
+# PAYMENT_EXPIRE_AFTER seconds unpaid (interval 0 disables the reconciler)
+payment_reconciler = PaymentReconciler(
+    chapa_service,
+    interval=float(os.environ.get('PAYMENT_RECONCILE_INTERVAL', '60')),
+    stale_after=float(os.environ.get('PAYMENT_RECONCILE_STALE_AFTER', '900')),
+    expire_after=float(os.environ.get('PAYMENT_EXPIRE_AFTER', '86400')),
+    batch_size=int(os.environ.get('PAYMENT_RECONCILE_BATCH_SIZE', '100')),
+    concurrency=int(os.environ.get('PAYMENT_RECONCILE_CONCURRENCY', '4'))
+)
+
+# Duplicate payment initialization: a pending checkout for the same booking and
+# amount is handed out again for PAYMENT_CHECKOUT_REUSE seconds, Idempotency-Key
+# responses are kept for IDEMPOTENCY_KEY_TTL seconds, and a booking lock
+# covers one gateway call. The call is cut off PAYMENT_INIT_LOCK_MARGIN seconds
+# before the lock expires (including any wait for a gateway connection slot),
+# which leaves the margin for the database reads and writes around it
+PAYMENT_CHECKOUT_REUSE = float(os.environ.get('PAYMENT_CHECKOUT_REUSE', '1800'))
+IDEMPOTENCY_KEY_TTL = float(os.environ.get('IDEMPOTENCY_KEY_TTL', '86400'))
+PAYMENT_INIT_LOCK_TTL = float(os.environ.get('PAYMENT_INIT_LOCK_TTL', '60'))
+PAYMENT_INIT_LOCK_MARGIN = 5
 
 # Create uploads directory
 UPLOADS_DIR = ROOT_DIR / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
+upload_store = UploadStore(UPLOADS_DIR)
 
 # Create the main app
 app = FastAPI()
 
 # Mount static files for serving uploaded images
-app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
+app.mount("/uploads", UploadFiles(UPLOADS_DIR), name="uploads")
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    # Fail fast instead of queueing work the client will have given up on
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please try again shortly"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -88,6 +229,10 @@ class House(HouseBase):
     status: str  # available, pending_approval, rented, hidden
     photos: List[str] = []
     created_at: str
+    rating_count: int = 0
+    rating_sum: int = 0
+    rating_avg: float = 0.0
+    rating_histogram: Dict[str, int] = {}
 
 class HouseUpdate(BaseModel):
     title: Optional[str] = None
@@ -134,6 +279,8 @@ class AdminStatsResponse(BaseModel):
     total_houses: int
     pending_houses: int
     total_bookings: int
+    snapshot_taken_at: str
+    snapshot_age_seconds: float
 
 class PaymentInitRequest(BaseModel):
     booking_id: str
@@ -154,6 +301,17 @@ class SavedHouse(BaseModel):
     house_id: str
     saved_at: str
 
+class SavedHouseQuery(BaseModel):
+    house_ids: List[str] = Field(..., max_length=MAX_PAGE_SIZE)
+
+class HouseDetails(BaseModel):
+    house: House
+    feedback: List[Feedback]
+    feedback_next_cursor: Optional[str] = None
+    # Only set for signed-in tenants
+    is_saved: Optional[bool] = None
+    booking: Optional[Booking] = None
+
 class LandlordAnalytics(BaseModel):
     total_properties: int
     total_views: int
@@ -163,12 +321,6 @@ class LandlordAnalytics(BaseModel):
 
 # ============ UTILITY FUNCTIONS ============
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -184,27 +336,106 @@ def generate_transaction_reference(prefix: str = "WRS") -> str:
     """
     return f"{prefix}-{uuid.uuid4().hex[:8]}"
 
+def decode_access_token(token: str) -> dict:
+    """Decode a JWT, reusing the result of an earlier signature check."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        if payload["exp"] > datetime.now(timezone.utc).timestamp():
+            return payload
+        token_cache.invalidate(token)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    # Never cache a token past its own expiry
+    remaining = payload["exp"] - datetime.now(timezone.utc).timestamp()
+    token_cache.set(token, payload, ttl=min(token_cache.ttl, remaining))
+    return payload
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_access_token(token)
         user_id = payload.get("user_id")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+        user = user_cache.get(user_id)
         if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+            user = await db.users.find_one({"user_id": user_id}, {"_id": 0, "password_hash": 0})
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            user_cache.set(user_id, user)
+        # Hand out a copy so handlers can't mutate the cached document
+        return dict(user)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def house_changed(before: Optional[dict], after: Optional[dict]) -> None:
+    """Keep the materialized counters in step with a house write."""
+    await record_house_change(db, before, after)
+    await record_pending_houses(db, before, after)
+
+async def raise_write_refused(collection, query: dict, noun: str, action: str) -> None:
+    """Explain why a conditional write matched nothing: 404 if missing, else 403.
+
+    Writes carry their ownership precondition in the filter, so this extra
+    read only happens on the failure path.
+    """
+    if await collection.find_one(query, {"_id": 1}) is None:
+        raise HTTPException(status_code=404, detail=f"{noun} not found")
+    raise HTTPException(status_code=403, detail=f"Not authorized to {action} this {noun.lower()}")
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[dict]:
+    """The signed-in user, or None for anonymous requests and bad tokens."""
+    if credentials is None:
+        return None
+    try:
+        return await get_current_user(credentials)
+    except HTTPException:
+        return None
+
 async def require_role(user: dict, allowed_roles: List[str]):
     if user["role"] not in allowed_roles:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
 
+async def fetch_page_or_400(
+    collection,
+    query: dict,
+    sort_options: dict,
+    sort: str,
+    limit: int,
+    cursor: Optional[str],
+    projection: Optional[dict] = None
+):
+    try:
+        return await fetch_page(
+            collection, query, sort_options, sort, limit, cursor, projection or {"_id": 0}
+        )
+    except InvalidPageRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def paginate(
+    response: Response,
+    collection,
+    query: dict,
+    sort_options: dict,
+    sort: str,
+    limit: int,
+    cursor: Optional[str],
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """Fetch one keyset page; the next-page cursor goes in X-Next-Cursor."""
+    docs, next_cursor = await fetch_page_or_400(
+        collection, query, sort_options, sort, limit, cursor, projection
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return docs
+
 # ============ AUTH ROUTES ============
 
 @api_router.post("/auth/register", response_model=Token)
@@ -223,7 +454,7 @@ async def register(user_data: UserCreate):
     user_doc = {
         "user_id": user_id,
         "email": user_data.email,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password(user_data.password),
         "full_name": user_data.full_name,
         "phone_number": user_data.phone_number,
         "role": user_data.role,
@@ -249,7 +480,7 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login", response_model=Token)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user or not await verify_password(credentials.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     access_token = create_access_token({"user_id": user["user_id"], "role": user["role"]})
@@ -277,39 +508,46 @@ async def upload_image(
     current_user: dict = Depends(get_current_user)
 ):
     # Validate file type
-    if not file.content_type.startswith("image/"):
+    if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = UPLOADS_DIR / unique_filename
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # The original (with its EXIF data) is never stored; only its variants
+    try:
+        urls = await upload_store.store(db, file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedImageTypeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Return URL
-    file_url = f"/uploads/{unique_filename}"
-    return {"url": file_url}
+    # "url" stays the full-size JPEG so existing clients keep working
+    return {"url": urls["full"]["jpeg"], "variants": urls}
 
 # ============ HOUSE ROUTES ============
 
 @api_router.get("/houses", response_model=List[House])
 async def get_houses(
+    response: Response,
     location: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     num_rooms: Optional[int] = None,
-    status: Optional[str] = "available"
+    status: Optional[str] = "available",
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
 ):
+    listing_filter = ListingFilter.normalize(location, min_price, max_price, num_rooms, status)
     query = {}
     
-    if status:
-        query["status"] = status
+    if listing_filter.status:
+        query["status"] = listing_filter.status
     
-    if location:
-        query["location"] = {"$regex": location, "$options": "i"}
+    if listing_filter.location:
+        location_filter = location_search_filter(listing_filter.location)
+        if location_filter:
+            query.update(location_filter)
     
     if min_price is not None or max_price is not None:
         query["price_per_month"] = {}
@@ -321,15 +559,125 @@ async def get_houses(
     if num_rooms is not None:
         query["num_rooms"] = num_rooms
     
-    houses = await db.houses.find(query, {"_id": 0}).to_list(1000)
-    return houses
+    async def load():
+        houses, next_cursor = await fetch_page_or_400(
+            db.houses, query, HOUSE_SORTS, sort, limit, cursor
+        )
+        return ListingPage(
+            listing_filter, houses, next_cursor, serializer_for(House).dumps_list(houses)
+        )
+    
+    page = await listing_cache.read_through(
+        listing_cache.list_key(listing_filter, sort, limit, cursor), load
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    # Cached pages are served as the bytes encoded when they were loaded
+    return encoded_response(page.body, response)
+
+@api_router.get("/locations/suggest")
+async def suggest_locations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Prefix autocomplete over the locations of available houses"""
+    return await location_suggester.suggest(db, q, limit)
+
+async def load_house(house_id: str) -> Optional[dict]:
+    return await listing_cache.read_through(
+        listing_cache.house_key(house_id),
+        lambda: db.houses.find_one({"house_id": house_id}, {"_id": 0})
+    )
+
+def client_address(request: Request) -> Optional[str]:
+    """The client's address as seen by the outermost trusted proxy"""
+    if TRUSTED_PROXY_DEPTH > 0:
+        # Each proxy appends the address it received from, so only the last
+        # TRUSTED_PROXY_DEPTH entries are trustworthy; earlier ones are the
+        # client's to choose
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_DEPTH:
+            return hops[-TRUSTED_PROXY_DEPTH]
+    return request.client.host if request.client else None
+
+def count_house_view(house: dict, request: Request, current_user: Optional[dict]) -> None:
+    # Landlords looking at their own listing are not counted
+    if current_user and current_user["user_id"] == house["landlord_id"]:
+        return
+    viewer = current_user["user_id"] if current_user else client_address(request)
+    view_tracker.record(house["house_id"], house["landlord_id"], viewer)
 
 @api_router.get("/houses/{house_id}", response_model=House)
-async def get_house(house_id: str):
-    house = await db.houses.find_one({"house_id": house_id}, {"_id": 0})
+async def get_house(
+    house_id: str,
+    request: Request,
+    count_view: bool = True,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    house = await load_house(house_id)
+    if not house:
+        raise HTTPException(status_code=404, detail="House not found")
+    
+    # Dashboards loading a booking's house pass count_view=false
+    if count_view:
+        count_house_view(house, request, current_user)
+    return trusted_item(House, house)
+
+@api_router.get("/houses/{house_id}/full", response_model=HouseDetails)
+async def get_house_details(
+    house_id: str,
+    request: Request,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """House, first page of feedback and the caller's saved/booking state in one call"""
+    async def no_result():
+        return None
+    
+    is_tenant = current_user is not None and current_user["role"] == "tenant"
+    # The parts are independent, so they are fetched concurrently
+    house, (feedback, feedback_next_cursor), saved, booking = await asyncio.gather(
+        load_house(house_id),
+        fetch_page_or_400(
+            db.feedbacks, {"house_id": house_id}, FEEDBACK_SORTS, "newest", DEFAULT_PAGE_SIZE, None
+        ),
+        saved_house_cache.are_saved(
+            db, current_user["user_id"], [house_id]
+        ) if is_tenant else no_result(),
+        db.bookings.find_one(
+            {"tenant_id": current_user["user_id"], "house_id": house_id},
+            {"_id": 0},
+            sort=[("requested_at", -1)]
+        ) if is_tenant else no_result()
+    )
     if not house:
         raise HTTPException(status_code=404, detail="House not found")
-    return house
+    
+    count_house_view(house, request, current_user)
+    return HouseDetails(
+        house=house,
+        feedback=feedback,
+        feedback_next_cursor=feedback_next_cursor,
+        is_saved=saved[house_id] if is_tenant else None,
+        booking=booking
+    )
+
+@api_router.get("/houses/{house_id}/views/daily")
+async def get_house_daily_views(
+    house_id: str,
+    days: int = Query(30, ge=1, le=365),
+    current_user: dict = Depends(get_current_user)
+):
+    """Views per UTC day for a house, for trend charts"""
+    await require_role(current_user, ["landlord", "admin"])
+    
+    house = await db.houses.find_one({"house_id": house_id}, {"_id": 0, "landlord_id": 1})
+    if not house:
+        raise HTTPException(status_code=404, detail="House not found")
+    
+    if current_user["role"] == "landlord" and house["landlord_id"] != current_user["user_id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view this house's analytics")
+    
+    return await daily_views(db, house_id, days)
 
 @api_router.post("/houses", response_model=House)
 async def create_house(
@@ -349,11 +697,16 @@ async def create_house(
         "num_rooms": house_data.num_rooms,
         "status": "pending_approval",
         "photos": [],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **location_fields(house_data.location),
+        **empty_rating_fields()
     }
     
     await db.houses.insert_one(house_doc)
-    return House(**house_doc)
+    await house_changed(None, house_doc)
+    location_suggester.mark_dirty()
+    listing_cache.invalidate_house(house_doc)
+    return trusted_item(House, house_doc)
 
 @api_router.put("/houses/{house_id}", response_model=House)
 async def update_house(
@@ -363,20 +716,31 @@ async def update_house(
 ):
     await require_role(current_user, ["landlord"])
     
-    house = await db.houses.find_one({"house_id": house_id}, {"_id": 0})
-    if not house:
-        raise HTTPException(status_code=404, detail="House not found")
-    
-    if house["landlord_id"] != current_user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update this house")
-    
     update_data = {k: v for k, v in house_data.model_dump().items() if v is not None}
+    if "location" in update_data:
+        update_data.update(location_fields(update_data["location"]))
+    
+    owned = {"house_id": house_id, "landlord_id": current_user["user_id"]}
+    if not update_data:
+        house = await db.houses.find_one(owned, {"_id": 0})
+        if not house:
+            await raise_write_refused(db.houses, {"house_id": house_id}, "House", "update")
+        return trusted_item(House, house)
+    
+    previous = await db.houses.find_one_and_update(
+        owned,
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        await raise_write_refused(db.houses, {"house_id": house_id}, "House", "update")
+    house = {**previous, **update_data}
+    await house_changed(previous, house)
+    location_suggester.mark_dirty()
+    listing_cache.invalidate_house(previous, house)
     
-    if update_data:
-        await db.houses.update_one({"house_id": house_id}, {"$set": update_data})
-        house.update(update_data)
-    
-    return House(**house)
+    return trusted_item(House, house)
 
 @api_router.delete("/houses/{house_id}")
 async def delete_house(
@@ -385,14 +749,17 @@ async def delete_house(
 ):
     await require_role(current_user, ["landlord"])
     
-    house = await db.houses.find_one({"house_id": house_id})
+    house = await db.houses.find_one_and_delete(
+        {"house_id": house_id, "landlord_id": current_user["user_id"]},
+        projection={"_id": 0}
+    )
     if not house:
-        raise HTTPException(status_code=404, detail="House not found")
-    
-    if house["landlord_id"] != current_user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this house")
+        await raise_write_refused(db.houses, {"house_id": house_id}, "House", "delete")
     
-    await db.houses.delete_one({"house_id": house_id})
+    await house_changed(house, None)
+    await upload_store.release_references(db, house.get("photos", []))
+    location_suggester.mark_dirty()
+    listing_cache.invalidate_house(house)
     return {"message": "House deleted successfully"}
 
 @api_router.post("/houses/{house_id}/photos")
@@ -403,30 +770,34 @@ async def add_house_photos(
 ):
     await require_role(current_user, ["landlord"])
     
-    house = await db.houses.find_one({"house_id": house_id})
+    house = await db.houses.find_one_and_update(
+        {"house_id": house_id, "landlord_id": current_user["user_id"]},
+        {"$push": {"photos": {"$each": photo_urls}}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
     if not house:
-        raise HTTPException(status_code=404, detail="House not found")
+        await raise_write_refused(db.houses, {"house_id": house_id}, "House", "update")
     
-    if house["landlord_id"] != current_user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update this house")
-    
-    await db.houses.update_one(
-        {"house_id": house_id},
-        {"$push": {"photos": {"$each": photo_urls}}}
-    )
+    await upload_store.add_references(db, photo_urls)
+    listing_cache.invalidate_house(house)
     
     return {"message": "Photos added successfully"}
 
 @api_router.get("/my-houses", response_model=List[House])
-async def get_my_houses(current_user: dict = Depends(get_current_user)):
+async def get_my_houses(
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     await require_role(current_user, ["landlord"])
     
-    houses = await db.houses.find(
-        {"landlord_id": current_user["user_id"]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    return houses
+    return trusted_list(House, await paginate(
+        response, db.houses, {"landlord_id": current_user["user_id"]},
+        LANDLORD_HOUSE_SORTS, sort, limit, cursor
+    ), response)
 
 # ============ BOOKING ROUTES ============
 
@@ -465,29 +836,38 @@ async def create_booking(
     }
     
     await db.bookings.insert_one(booking_doc)
-    return Booking(**booking_doc)
+    await record_booking_change(db, None, booking_doc)
+    return trusted_item(Booking, booking_doc)
 
 @api_router.get("/bookings/my-requests", response_model=List[Booking])
-async def get_my_booking_requests(current_user: dict = Depends(get_current_user)):
+async def get_my_booking_requests(
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     await require_role(current_user, ["tenant"])
     
-    bookings = await db.bookings.find(
-        {"tenant_id": current_user["user_id"]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    return bookings
+    return trusted_list(Booking, await paginate(
+        response, db.bookings, {"tenant_id": current_user["user_id"]},
+        BOOKING_SORTS, sort, limit, cursor
+    ), response)
 
 @api_router.get("/bookings/received", response_model=List[Booking])
-async def get_received_bookings(current_user: dict = Depends(get_current_user)):
+async def get_received_bookings(
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     await require_role(current_user, ["landlord"])
     
-    bookings = await db.bookings.find(
-        {"landlord_id": current_user["user_id"]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    return bookings
+    return trusted_list(Booking, await paginate(
+        response, db.bookings, {"landlord_id": current_user["user_id"]},
+        BOOKING_SORTS, sort, limit, cursor
+    ), response)
 
 @api_router.put("/bookings/{booking_id}", response_model=Booking)
 async def update_booking(
@@ -497,30 +877,50 @@ async def update_booking(
 ):
     await require_role(current_user, ["landlord"])
     
-    booking = await db.bookings.find_one({"booking_id": booking_id}, {"_id": 0})
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking["landlord_id"] != current_user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update this booking")
-    
     if booking_update.status not in ["approved", "rejected"]:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    await db.bookings.update_one(
-        {"booking_id": booking_id},
-        {"$set": {"status": booking_update.status}}
+    # Only a pending request can be decided, and only once
+    previous_booking = await db.bookings.find_one_and_update(
+        {"booking_id": booking_id, "landlord_id": current_user["user_id"], "status": "pending"},
+        {"$set": {"status": booking_update.status}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
-    
-    # If approved, mark house as rented
+    if not previous_booking:
+        booking = await db.bookings.find_one({"booking_id": booking_id}, {"_id": 0, "landlord_id": 1, "status": 1})
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        if booking["landlord_id"] != current_user["user_id"]:
+            raise HTTPException(status_code=403, detail="Not authorized to update this booking")
+        raise HTTPException(status_code=409, detail=f"Booking has already been {booking['status']}")
+    booking = {**previous_booking, "status": booking_update.status}
+    
+    # If approved, mark house as rented, unless another approval got there first
     if booking_update.status == "approved":
-        await db.houses.update_one(
-            {"house_id": booking["house_id"]},
-            {"$set": {"status": "rented"}}
+        house = await db.houses.find_one_and_update(
+            {"house_id": booking["house_id"], "status": {"$ne": "rented"}},
+            {"$set": {"status": "rented"}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
         )
+        if house:
+            rented = {**house, "status": "rented"}
+            await house_changed(house, rented)
+            location_suggester.mark_dirty()
+            listing_cache.invalidate_house(house, rented)
+        elif await db.houses.find_one({"house_id": booking["house_id"]}, {"_id": 1}):
+            # Undo our approval; the request stays pending for the landlord.
+            # initialize_payment refuses a booking whose house isn't rented,
+            # so the approval can't be paid for in the meantime
+            await db.bookings.update_one(
+                {"booking_id": booking_id, "status": "approved"},
+                {"$set": {"status": "pending"}}
+            )
+            raise HTTPException(status_code=409, detail="House is already rented")
     
-    booking["status"] = booking_update.status
-    return Booking(**booking)
+    await record_booking_change(db, previous_booking, booking)
+    return trusted_item(Booking, booking)
 
 # ============ FEEDBACK ROUTES ============
 
@@ -534,9 +934,16 @@ async def create_feedback(
     if feedback_data.rating < 1 or feedback_data.rating > 5:
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
     
-    house = await db.houses.find_one({"house_id": feedback_data.house_id})
+    # Count the review on the house first; this doubles as the existence check
+    house = await db.houses.find_one_and_update(
+        {"house_id": feedback_data.house_id},
+        add_rating_update(feedback_data.rating),
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
     if not house:
         raise HTTPException(status_code=404, detail="House not found")
+    listing_cache.invalidate_house(house)
     
     feedback_id = str(uuid.uuid4())
     feedback_doc = {
@@ -549,40 +956,77 @@ async def create_feedback(
     }
     
     await db.feedbacks.insert_one(feedback_doc)
-    return Feedback(**feedback_doc)
+    return trusted_item(Feedback, feedback_doc)
 
 @api_router.get("/houses/{house_id}/feedback", response_model=List[Feedback])
-async def get_house_feedback(house_id: str):
-    feedbacks = await db.feedbacks.find(
-        {"house_id": house_id},
-        {"_id": 0}
-    ).to_list(1000)
-    return feedbacks
+async def get_house_feedback(
+    house_id: str,
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    return trusted_list(Feedback, await paginate(
+        response, db.feedbacks, {"house_id": house_id}, FEEDBACK_SORTS, sort, limit, cursor
+    ), response)
 
 # ============ PAYMENT ROUTES ============
 
 
+def gateway_unavailable(error: GatewayUnavailableError) -> HTTPException:
+    """503 for calls refused by the open circuit breaker, without waiting on Chapa"""
+    return HTTPException(
+        status_code=503,
+        detail="Payment service is temporarily unavailable. Please try again shortly.",
+        headers={"Retry-After": str(max(1, round(error.retry_after or 1)))}
+    )
+
 @api_router.get("/payment/health")
 async def payment_health_check():
-    """Check if payment service is healthy"""
+    """Payment gateway health from the circuit breaker and the last probe (no gateway call)"""
     if chapa_service is None:
         raise HTTPException(status_code=503, detail="Payment service not configured")
     
-    try:
-        # Try to get supported currencies as a health check
-        currencies = chapa_service.get_supported_currencies()
-        return {
-            "status": "healthy",
-            "service": "chapa",
-            "currencies_available": len(currencies.get('currencies', []))
-        }
-    except PaymentGatewayError as e:
-        raise HTTPException(status_code=503, detail=f"Payment service unhealthy: {str(e)}")
-    
+    health = chapa_service.health()
+    if not health["configured"]:
+        raise HTTPException(status_code=503, detail="Payment service not configured")
+    if health["circuit"]["state"] == "open":
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "service": "chapa", **health})
+    return {
+        "status": "healthy" if health["circuit"]["state"] == "closed" else "degraded",
+        "service": "chapa",
+        **health
+    }
+
+async def find_reusable_checkout(payment_data: PaymentInitRequest) -> Optional[dict]:
+    """A recent pending checkout for the same booking, amount and currency"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=PAYMENT_CHECKOUT_REUSE)).isoformat()
+    return await db.payments.find_one(
+        {
+            "booking_id": payment_data.booking_id,
+            "status": "pending",
+            "amount": payment_data.amount,
+            "currency": payment_data.currency,
+            "checkout_url": {"$exists": True},
+            "created_at": {"$gte": cutoff}
+        },
+        {"_id": 0},
+        sort=[("created_at", -1)]
+    )
+
+async def checkout_response(payment: dict, idempotency_record: Optional[str]) -> PaymentInitResponse:
+    response = PaymentInitResponse(checkout_url=payment["checkout_url"], tx_ref=payment["tx_ref"])
+    if idempotency_record:
+        await store_response(
+            db, idempotency_record, payment["booking_id"], response.model_dump(), IDEMPOTENCY_KEY_TTL
+        )
+    return response
+
 @api_router.post("/payment/initialize", response_model=PaymentInitResponse)
 async def initialize_payment(
     payment_data: PaymentInitRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
 ):
     """Initialize Chapa payment for booking deposit"""
     await require_role(current_user, ["tenant"])
@@ -594,6 +1038,16 @@ async def initialize_payment(
             detail="Payment service is currently unavailable. Please try again later."
         )
     
+    # A retry of a request we already answered gets the same answer
+    idempotency_record = key_id(current_user["user_id"], idempotency_key) if idempotency_key else None
+    if idempotency_record:
+        try:
+            stored = await stored_response(db, idempotency_record, payment_data.booking_id)
+        except IdempotencyKeyMismatchError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if stored:
+            return PaymentInitResponse(**stored)
+    
     # Verify booking exists and belongs to current user
     booking = await db.bookings.find_one({
         "booking_id": payment_data.booking_id,
@@ -606,17 +1060,46 @@ async def initialize_payment(
     if booking["status"] != "approved":
         raise HTTPException(status_code=400, detail="Only approved bookings can proceed to payment")
     
+    # An approval only holds once it has claimed the house (update_booking)
+    if not await db.houses.find_one({"house_id": booking["house_id"], "status": "rented"}, {"_id": 1}):
+        raise HTTPException(status_code=409, detail="The house is not reserved for this booking")
+    
     # Check if payment already exists
-    existing_payment = await db.payments.find_one({"booking_id": payment_data.booking_id})
-    if existing_payment and existing_payment.get("status") == "success":
+    if booking.get("deposit_paid") or await db.payments.find_one(
+        {"booking_id": payment_data.booking_id, "status": "success"}, {"_id": 1}
+    ):
         raise HTTPException(status_code=400, detail="Payment already completed for this booking")
     
+    # A checkout that is still open is handed out again (double clicks, reloads)
+    existing = await find_reusable_checkout(payment_data)
+    if existing:
+        return await checkout_response(existing, idempotency_record)
+    
+    booking_lock = lock_id(payment_data.booking_id)
+    lock_owner = await acquire_lock(db, booking_lock, PAYMENT_INIT_LOCK_TTL)
+    if lock_owner is None:
+        # Another request is creating the checkout for this booking; use its result
+        await wait_for_lock(db, booking_lock, PAYMENT_INIT_LOCK_TTL)
+        existing = await find_reusable_checkout(payment_data)
+        if existing is None:
+            raise HTTPException(status_code=409, detail="Payment is already being initialized for this booking")
+        return await checkout_response(existing, idempotency_record)
+    
+    try:
+        # Checked again under the lock, in case a checkout finished in between
+        existing = await find_reusable_checkout(payment_data)
+        if existing:
+            return await checkout_response(existing, idempotency_record)
+        payment_doc = await create_checkout(payment_data, booking, current_user)
+        return await checkout_response(payment_doc, idempotency_record)
+    finally:
+        await release_lock(db, booking_lock, lock_owner)
+
+async def create_checkout(payment_data: PaymentInitRequest, booking: dict, current_user: dict) -> dict:
+    """Initialize the transaction with Chapa and store the pending payment"""
     # Generate unique transaction reference
     tx_ref = f"WRS-{payment_data.booking_id}-{uuid.uuid4().hex[:8]}"
     
-    # Get house details for callback URL
-    house = await db.houses.find_one({"house_id": booking["house_id"]})
-    
     # Split full name for Chapa
     name_parts = current_user["full_name"].split(" ", 1)
     first_name = name_parts[0]
@@ -628,20 +1111,23 @@ async def initialize_payment(
     return_url = f"{frontend_url}/payment/success?tx_ref={tx_ref}"
     
     try:
-        # Initialize payment with Chapa
-        chapa_response = chapa_service.initialize_payment(
-            amount=payment_data.amount,
-            currency=payment_data.currency,
-            tx_ref=tx_ref,
-            callback_url=callback_url,
-            return_url=return_url,  # Added return_url
-            email=current_user["email"],
-            first_name=first_name,
-            last_name=last_name,
-            phone_number=current_user.get("phone_number")
+        # Initialize payment with Chapa, finishing before the booking lock expires
+        chapa_response = await asyncio.wait_for(
+            chapa_service.initialize_payment(
+                amount=payment_data.amount,
+                currency=payment_data.currency,
+                tx_ref=tx_ref,
+                callback_url=callback_url,
+                return_url=return_url,  # Added return_url
+                email=current_user["email"],
+                first_name=first_name,
+                last_name=last_name,
+                phone_number=current_user.get("phone_number")
+            ),
+            timeout=PAYMENT_INIT_LOCK_TTL - PAYMENT_INIT_LOCK_MARGIN
         )
         
-        # Store payment record
+        # Store payment record; the checkout URL is kept so duplicates can reuse it
         payment_doc = {
             "payment_id": str(uuid.uuid4()),
             "booking_id": payment_data.booking_id,
@@ -651,15 +1137,17 @@ async def initialize_payment(
             "amount": payment_data.amount,
             "currency": payment_data.currency,
             "status": "pending",
+            "checkout_url": chapa_response["data"]["checkout_url"],
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
         await db.payments.insert_one(payment_doc)
-        
-        return PaymentInitResponse(
-            checkout_url=chapa_response["data"]["checkout_url"],
-            tx_ref=tx_ref
-        )
+        return payment_doc
+    except asyncio.TimeoutError:
+        logger.error(f"Payment initialization timed out for booking {payment_data.booking_id}")
+        raise HTTPException(status_code=504, detail="Payment service did not respond in time. Please try again.")
+    except GatewayUnavailableError as e:
+        raise gateway_unavailable(e)
     except PaymentGatewayError as e:
         # Surface gateway HTTP errors (e.g. 401 Unauthorized) to the client with a reasonable status
         status_code = e.status_code if (e.status_code and 100 <= e.status_code < 600) else 502
@@ -678,6 +1166,50 @@ async def initialize_payment(
         logger.error(f"Unexpected payment initialization error: {str(e)}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred while initializing payment")
 
+@api_router.post("/payment/webhook")
+async def payment_webhook(request: Request):
+    """Chapa callback: acknowledge at once and confirm in the background"""
+    if not CHAPA_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Payment webhook not configured")
+    
+    body = await request.body()
+    signature = request.headers.get("x-chapa-signature") or request.headers.get("chapa-signature")
+    if not verify_webhook_signature(CHAPA_WEBHOOK_SECRET, body, signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+    tx_ref = (event.get("tx_ref") or event.get("trx_ref")) if isinstance(event, dict) else None
+    if not tx_ref:
+        raise HTTPException(status_code=400, detail="Webhook payload has no tx_ref")
+    
+    # The payload is only a hint; the worker verifies the status with Chapa
+    try:
+        payment_confirmer.submit(tx_ref, recheck_failed=True)
+    except ConfirmationQueueFullError:
+        # Chapa retries failed deliveries
+        raise HTTPException(status_code=503, detail="Payment confirmation is busy, retry later")
+    return {"received": True}
+
+def payment_verification_response(status: str, payment_data: Optional[dict]) -> dict:
+    if status == "success":
+        return {
+            "status": "success",
+            "message": "Payment verified successfully",
+            "data": payment_data
+        }
+    if status == "pending":
+        return {
+            "status": "pending",
+            "message": "Payment not completed yet"
+        }
+    return {
+        "status": "failed",
+        "message": "Payment verification failed"
+    }
+
 @api_router.get("/payment/verify/{tx_ref}")
 async def verify_payment(
     tx_ref: str,
@@ -686,7 +1218,7 @@ async def verify_payment(
     """Verify payment status with Chapa"""
     
     # Find payment record
-    payment = await db.payments.find_one({"tx_ref": tx_ref})
+    payment = await db.payments.find_one({"tx_ref": tx_ref}, {"_id": 0})
     if not payment:
         raise HTTPException(status_code=404, detail="Payment record not found")
     
@@ -694,48 +1226,31 @@ async def verify_payment(
     if payment["tenant_id"] != current_user["user_id"] and current_user["role"] not in ["admin", "landlord"]:
         raise HTTPException(status_code=403, detail="Not authorized to verify this payment")
     
+    # Already settled (by the webhook or an earlier poll): no gateway call
+    if payment["status"] in FINAL_STATUSES:
+        return payment_verification_response(payment["status"], payment.get("chapa_response"))
+    
     try:
-        # Verify with Chapa
-        chapa_response = chapa_service.verify_payment(tx_ref)
-        
-        if chapa_response["status"] == "success" and chapa_response["data"]["status"] == "success":
-            # Update payment status
-            await db.payments.update_one(
-                {"tx_ref": tx_ref},
-                {"$set": {
-                    "status": "success",
-                    "verified_at": datetime.now(timezone.utc).isoformat(),
-                    "chapa_response": chapa_response["data"]
-                }}
-            )
-            
-            # Update booking to mark deposit as paid
-            await db.bookings.update_one(
-                {"booking_id": payment["booking_id"]},
-                {"$set": {"deposit_paid": True}}
-            )
-            
-            return {
-                "status": "success",
-                "message": "Payment verified successfully",
-                "data": chapa_response["data"]
-            }
-        else:
-            # Payment failed
-            await db.payments.update_one(
-                {"tx_ref": tx_ref},
-                {"$set": {
-                    "status": "failed",
-                    "verified_at": datetime.now(timezone.utc).isoformat()
-                }}
+        result = await payment_confirmer.confirm(tx_ref)
+    except ConfirmationQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except GatewayUnavailableError as e:
+        raise gateway_unavailable(e)
+    except PaymentGatewayError as e:
+        # Only retryable errors get here; the payment stays pending (4xx for
+        # an unpaid transaction is answered as pending by the confirmer)
+        logger.error(f"Payment verification error: {str(e)} (status={e.status_code})")
+        if e.status_code == 429:
+            raise HTTPException(
+                status_code=503,
+                detail="Payment service is busy. Please try again shortly.",
+                headers={"Retry-After": str(max(1, round(e.retry_after or 1)))}
             )
-            return {
-                "status": "failed",
-                "message": "Payment verification failed"
-            }
+        raise HTTPException(status_code=502, detail="Could not verify the payment with the gateway. Please try again shortly.")
     except Exception as e:
-        logger.error(f"Payment verification error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Unexpected payment verification error: {str(e)}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred while verifying payment")
+    return payment_verification_response(result["status"], result.get("payment_data"))
 
 # ============ SAVED HOUSES ROUTES ============
 
@@ -747,58 +1262,78 @@ async def save_house(
     """Save/favorite a house"""
     await require_role(current_user, ["tenant"])
     
-    # Check if house exists
-    house = await db.houses.find_one({"house_id": house_id})
-    if not house:
-        raise HTTPException(status_code=404, detail="House not found")
-    
-    # Check if already saved
-    existing = await db.saved_houses.find_one({
+    # Unsave (toggle behavior): removing it is also the "already saved?" check
+    removed = await db.saved_houses.delete_one({
         "tenant_id": current_user["user_id"],
         "house_id": house_id
     })
-    
-    if existing:
-        # Unsave (toggle behavior)
-        await db.saved_houses.delete_one({
-            "tenant_id": current_user["user_id"],
-            "house_id": house_id
-        })
+    if removed.deleted_count:
+        saved_house_cache.record(current_user["user_id"], house_id, False)
         return {"message": "House removed from favorites", "saved": False}
-    else:
-        # Save house
-        saved_doc = {
-            "saved_id": str(uuid.uuid4()),
-            "tenant_id": current_user["user_id"],
-            "house_id": house_id,
-            "saved_at": datetime.now(timezone.utc).isoformat()
-        }
+    
+    # Check if house exists
+    if not await db.houses.find_one({"house_id": house_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="House not found")
+    
+    # Save house
+    saved_doc = {
+        "saved_id": str(uuid.uuid4()),
+        "tenant_id": current_user["user_id"],
+        "house_id": house_id,
+        "saved_at": datetime.now(timezone.utc).isoformat()
+    }
+    try:
         await db.saved_houses.insert_one(saved_doc)
-        return {"message": "House added to favorites", "saved": True}
+    except DuplicateKeyError:
+        # A concurrent request saved it first (unique tenant_house index)
+        pass
+    saved_house_cache.record(current_user["user_id"], house_id, True)
+    return {"message": "House added to favorites", "saved": True}
 
 @api_router.get("/tenant/saved-houses", response_model=List[House])
-async def get_saved_houses(current_user: dict = Depends(get_current_user)):
-    """Get all saved houses for current tenant"""
+async def get_saved_houses(
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get saved houses for current tenant, most recently saved first"""
     await require_role(current_user, ["tenant"])
     
-    # Get saved house IDs
-    saved_records = await db.saved_houses.find(
-        {"tenant_id": current_user["user_id"]},
-        {"_id": 0, "house_id": 1}
-    ).to_list(1000)
-    
-    house_ids = [record["house_id"] for record in saved_records]
-    
-    if not house_ids:
-        return []
+    # One aggregation: page through saved_houses, then join each row's house
+    join_houses = [
+        {"$lookup": {
+            "from": "houses",
+            "localField": "house_id",
+            "foreignField": "house_id",
+            "as": "house"
+        }},
+        {"$project": {"_id": 0, "saved_at": 1, "saved_id": 1, "house": {"$arrayElemAt": ["$house", 0]}}},
+        {"$project": {"house._id": 0}},
+    ]
+    try:
+        rows, next_cursor = await aggregate_page(
+            db.saved_houses, {"tenant_id": current_user["user_id"]},
+            SAVED_HOUSE_SORTS, sort, limit, cursor, join_houses
+        )
+    except InvalidPageRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Fetch house details
-    houses = await db.houses.find(
-        {"house_id": {"$in": house_ids}},
-        {"_id": 0}
-    ).to_list(1000)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    # Saved rows whose house has since been deleted have nothing to show
+    return trusted_list(House, [row["house"] for row in rows if row.get("house")], response)
+
+@api_router.post("/tenant/is-saved")
+async def check_if_saved_bulk(
+    query: SavedHouseQuery,
+    current_user: dict = Depends(get_current_user)
+):
+    """Saved state of many houses at once, e.g. every card in a listing grid"""
+    await require_role(current_user, ["tenant"])
     
-    return houses
+    return {"saved": await saved_house_cache.are_saved(db, current_user["user_id"], query.house_ids)}
 
 @api_router.get("/tenant/is-saved/{house_id}")
 async def check_if_saved(
@@ -808,12 +1343,8 @@ async def check_if_saved(
     """Check if a house is saved by current tenant"""
     await require_role(current_user, ["tenant"])
     
-    saved = await db.saved_houses.find_one({
-        "tenant_id": current_user["user_id"],
-        "house_id": house_id
-    })
-    
-    return {"saved": saved is not None}
+    saved = await saved_house_cache.are_saved(db, current_user["user_id"], [house_id])
+    return {"saved": saved[house_id]}
 
 # ============ LANDLORD ANALYTICS ROUTES ============
 
@@ -822,38 +1353,16 @@ async def get_landlord_analytics(current_user: dict = Depends(get_current_user))
     """Get analytics for landlord dashboard"""
     await require_role(current_user, ["landlord"])
     
-    # Count total properties
-    total_properties = await db.houses.count_documents({"landlord_id": current_user["user_id"]})
-    
-    # Count bookings
-    pending_bookings = await db.bookings.count_documents({
-        "landlord_id": current_user["user_id"],
-        "status": "pending"
-    })
-    
-    approved_bookings = await db.bookings.count_documents({
-        "landlord_id": current_user["user_id"],
-        "status": "approved"
-    })
-    
-    # Calculate total revenue from rented properties
-    rented_houses = await db.houses.find(
-        {"landlord_id": current_user["user_id"], "status": "rented"},
-        {"_id": 0, "price_per_month": 1}
-    ).to_list(1000)
-    
-    total_revenue = sum(house.get("price_per_month", 0) for house in rented_houses)
-    
-    # For views, we'll use a placeholder since we haven't implemented view tracking
-    # In a real app, you'd track this with each house view
-    total_views = total_properties * 10  # Placeholder calculation
+    # Counters are maintained by house and booking writes (landlord_stats.py)
+    # Views lag by up to VIEW_FLUSH_INTERVAL seconds (view_tracker.py)
+    stats = await get_landlord_stats(db, current_user["user_id"])
     
     return LandlordAnalytics(
-        total_properties=total_properties,
-        total_views=total_views,
-        pending_bookings=pending_bookings,
-        approved_bookings=approved_bookings,
-        total_revenue=total_revenue
+        total_properties=stats["total_properties"],
+        total_views=stats["total_views"],
+        pending_bookings=stats["pending_bookings"],
+        approved_bookings=stats["approved_bookings"],
+        total_revenue=stats["total_revenue"]
     )
 
 # ============ ADMIN ROUTES ============
@@ -862,28 +1371,22 @@ async def get_landlord_analytics(current_user: dict = Depends(get_current_user))
 async def get_admin_stats(current_user: dict = Depends(get_current_user)):
     await require_role(current_user, ["admin"])
     
-    total_users = await db.users.count_documents({})
-    total_houses = await db.houses.count_documents({})
-    pending_houses = await db.houses.count_documents({"status": "pending_approval"})
-    total_bookings = await db.bookings.count_documents({})
-    
-    return AdminStatsResponse(
-        total_users=total_users,
-        total_houses=total_houses,
-        pending_houses=pending_houses,
-        total_bookings=total_bookings
-    )
+    # Totals are approximate and up to ADMIN_STATS_REFRESH_INTERVAL seconds old
+    return AdminStatsResponse(**await admin_stats.get(db))
 
 @api_router.get("/admin/pending-houses", response_model=List[House])
-async def get_pending_houses(current_user: dict = Depends(get_current_user)):
+async def get_pending_houses(
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     await require_role(current_user, ["admin"])
     
-    houses = await db.houses.find(
-        {"status": "pending_approval"},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    return houses
+    return trusted_list(House, await paginate(
+        response, db.houses, {"status": "pending_approval"}, HOUSE_SORTS, sort, limit, cursor
+    ), response)
 
 @api_router.put("/admin/houses/{house_id}/status")
 async def update_house_status(
@@ -896,33 +1399,121 @@ async def update_house_status(
     if status not in ["available", "pending_approval", "rented", "hidden"]:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    house = await db.houses.find_one({"house_id": house_id})
+    house = await db.houses.find_one_and_update(
+        {"house_id": house_id},
+        {"$set": {"status": status}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
     if not house:
         raise HTTPException(status_code=404, detail="House not found")
     
-    await db.houses.update_one(
-        {"house_id": house_id},
-        {"$set": {"status": status}}
-    )
+    updated = {**house, "status": status}
+    await house_changed(house, updated)
+    location_suggester.mark_dirty()
+    listing_cache.invalidate_house(house, updated)
     
     return {"message": "House status updated successfully"}
 
 @api_router.get("/admin/users", response_model=List[User])
-async def get_all_users(current_user: dict = Depends(get_current_user)):
+async def get_all_users(
+    response: Response,
+    sort: str = "newest",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    await require_role(current_user, ["admin"])
+    
+    return trusted_list(User, await paginate(
+        response, db.users, {}, USER_SORTS, sort, limit, cursor,
+        projection={"_id": 0, "password_hash": 0}
+    ), response)
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counters for the in-process caches, used to size them"""
+    await require_role(current_user, ["admin"])
+    
+    return {
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "listing_cache": listing_cache.stats(),
+        "saved_house_cache": saved_house_cache.stats(),
+        "view_tracker": view_tracker.stats(),
+        "payment_confirmer": payment_confirmer.stats()
+    }
+
+@api_router.get("/admin/payments/reconciliation")
+async def get_payment_reconciliation(current_user: dict = Depends(get_current_user)):
+    """Backlog, outcomes and latency of the stale payment reconciler"""
     await require_role(current_user, ["admin"])
     
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-    return users
+    return payment_reconciler.stats()
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Slowest and collection-scanning query shapes seen by the query profiler"""
+    await require_role(current_user, ["admin"])
+    
+    return query_profiler.report(limit)
+
+@api_router.delete("/admin/slow-queries")
+async def reset_slow_queries(current_user: dict = Depends(get_current_user)):
+    """Forget the collected query shapes, e.g. after adding an index"""
+    await require_role(current_user, ["admin"])
+    
+    query_profiler.reset()
+    return {"message": "Slow query statistics cleared"}
+
+@api_router.get("/health")
+async def liveness():
+    """Process is up and serving requests"""
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def readiness():
+    """Ready when MongoDB answers; the payment gateway is reported, not required"""
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=2)
+        database = "ok"
+    except Exception as e:
+        logger.error(f"Readiness check failed: {str(e)}")
+        database = "unavailable"
+    body = {
+        "status": "ready" if database == "ok" else "not_ready",
+        "database": database,
+        "payments": chapa_service.health()["circuit"]["state"]
+    }
+    return JSONResponse(status_code=200 if database == "ok" else 503, content=body)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint"""
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Oversized uploads are refused before Starlette spools the body to disk
+app.add_middleware(UploadLimitMiddleware, paths=["/api/upload"])
+
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -934,13 +1525,37 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_db():
+    if os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true':
+        try:
+            await ensure_indexes(db)
+        except Exception as e:
+            # Usually duplicate data blocking a unique index; keep serving
+            # and let `python manage.py check-indexes` report the details.
+            logger.error(f"Index bootstrap failed: {str(e)}")
+    await backfill_location_tokens(db)
+    try:
+        await rebuild_rating_aggregates(db, only_missing=True)
+    except Exception as e:
+        # $merge needs MongoDB 4.2+; listings still work without aggregates
+        logger.error(f"Rating aggregate backfill failed: {str(e)}")
+    try:
+        if await migrate_landlord_stats(db):
+            logger.info("Rebuilt landlord analytics counters")
+    except Exception as e:
+        logger.error(f"Landlord counter rebuild failed: {str(e)}")
+    try:
+        if await migrate_pending_houses(db):
+            logger.info("Recounted houses pending approval")
+    except Exception as e:
+        logger.error(f"Pending houses recount failed: {str(e)}")
+    
     # Create default admin user if not exists
     admin_exists = await db.users.find_one({"email": "admin@woliso.com"})
     if not admin_exists:
         admin_doc = {
             "user_id": str(uuid.uuid4()),
             "email": "admin@woliso.com",
-            "password_hash": hash_password("Admin@123"),
+            "password_hash": await hash_password("Admin@123"),
             "full_name": "System Administrator",
             "phone_number": "+251-000-0000",
             "role": "admin",
@@ -948,7 +1563,23 @@ async def startup_db():
         }
         await db.users.insert_one(admin_doc)
         logger.info("Default admin user created: admin@woliso.com / Admin@123")
+    
+    view_tracker.start(db)
+    admin_stats.start(db)
+    payment_confirmer.start(db)
+    payment_reconciler.start(db)
+    query_profiler.start(db)
+    chapa_service.start_health_probe(float(os.environ.get('CHAPA_PROBE_INTERVAL', '60')))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Write out buffered views before the client goes away
+    await view_tracker.stop(db)
+    await admin_stats.stop()
+    await payment_confirmer.stop()
+    await payment_reconciler.stop()
+    await query_profiler.stop()
+    await chapa_service.aclose()
+    password_pool.shutdown()
+    image_pool.shutdown()
     client.close()
\ No newline at end of file
@@ -0,0 +1,196 @@
+import os
+import re
+import stat
+import hashlib
+import mimetypes
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import get_route_path
+from starlette.types import Receive, Scope, Send
+
+# Cache-friendly file serving for /uploads.
+#
+# Content-addressed variants (uploads/ab/cd/<sha256>_<variant>.<ext>, see
+# upload_storage.py) never change once written, so they are sent with a
+# year-long `immutable` Cache-Control and a strong ETag derived from the file
+# name. Legacy flat uploads get a shorter max-age and an ETag from size/mtime.
+# Conditional requests are answered with 304, single byte ranges with 206, and
+# a JPEG/PNG request from a client that accepts WebP is served the WebP
+# sibling of the same variant when one exists.
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=86400"
+CHUNK_SIZE = 64 * 1024
+
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}_\w+\.\w+$")
+_NEGOTIABLE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, RFC 9110 13.1.2)."""
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None for headers we don't honour (multiple ranges, other units),
+    in which case the whole file is served. Raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or (last and int(last) < start):
+            raise ValueError("Range not satisfiable")
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Range not satisfiable")
+        start, end = max(size - suffix, 0), size - 1
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """Send ``length`` bytes of a file starting at ``offset``."""
+
+    def __init__(self, path: Path, offset: int, length: int, status_code: int, headers: dict,
+                 send_body: bool = True):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            remaining = self.length
+            while remaining:
+                size = min(CHUNK_SIZE, remaining)
+                # A single small read is cheaper inline than a thread hop
+                if remaining <= CHUNK_SIZE:
+                    chunk = f.read(size)
+                else:
+                    chunk = await anyio.to_thread.run_sync(f.read, size)
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining:
+            # File shrank underneath us; close the body rather than hang
+            await send({"type": "http.response.body", "body": b""})
+
+
+class UploadFiles:
+    """ASGI app serving files below ``directory`` with caching, ranges and WebP negotiation"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory).resolve()
+
+    def _resolve(self, relative: str) -> Optional[Path]:
+        parts = [part for part in relative.split("/") if part]
+        # Hidden entries (e.g. the .incoming staging area) are never served
+        if not parts or any(part.startswith(".") for part in parts):
+            return None
+        path = (self.directory / Path(*parts)).resolve()
+        if self.directory not in path.parents:
+            return None
+        return path
+
+    @staticmethod
+    def _accepts_webp(headers: Headers) -> bool:
+        return "image/webp" in headers.get("accept", "")
+
+    def _select_representation(self, path: Path, headers: Headers) -> Tuple[Path, bool]:
+        """Pick the file to send; the flag says whether the choice depends on Accept."""
+        if path.suffix.lower() not in _NEGOTIABLE_SUFFIXES:
+            return path, False
+        webp = path.with_suffix(".webp")
+        if not webp.is_file():
+            return path, False
+        return (webp if self._accepts_webp(headers) else path), True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        response = self.get_response(scope)
+        await response(scope, receive, send)
+
+    def get_response(self, scope: Scope) -> Response:
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+
+        relative = get_route_path(scope).lstrip("/")
+        headers = Headers(scope=scope)
+
+        requested = self._resolve(relative)
+        if requested is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        path, negotiated = self._select_representation(requested, headers)
+        try:
+            file_stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return PlainTextResponse("Not Found", status_code=404)
+        if not stat.S_ISREG(file_stat.st_mode):
+            return PlainTextResponse("Not Found", status_code=404)
+
+        immutable = bool(_CONTENT_ADDRESSED.match(relative))
+        if immutable:
+            etag = f'"{path.name}"'
+        else:
+            fingerprint = f"{file_stat.st_size}-{file_stat.st_mtime_ns}-{path.name}"
+            etag = f'"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+
+        response_headers = {
+            "etag": etag,
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL,
+            "last-modified": formatdate(file_stat.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+        if negotiated:
+            response_headers["vary"] = "Accept"
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=response_headers)
+
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        response_headers["content-type"] = media_type
+        size = file_stat.st_size
+        send_body = method == "GET"
+
+        range_header = headers.get("range")
+        if_range = headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return PlainTextResponse(
+                    "Range Not Satisfiable", status_code=416, headers={"content-range": f"bytes */{size}"}
+                )
+            if byte_range is not None:
+                start, end = byte_range
+                response_headers["content-range"] = f"bytes {start}-{end}/{size}"
+                return FileRangeResponse(path, start, end - start + 1, 206, response_headers, send_body)
+
+        return FileRangeResponse(path, 0, size, 200, response_headers, send_body)
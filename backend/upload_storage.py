@@ -0,0 +1,159 @@
+import re
+import uuid
+import logging
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from image_pipeline import process_upload, stream_to_disk
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed upload storage.
+#
+# An upload is identified by the SHA-256 of its bytes. Its variants live in a
+# directory sharded by hash prefix (uploads/ab/cd/<hash>_<variant>.<ext>) so no
+# single directory grows unbounded. One `upload_blobs` document per hash
+# records the generated variants and how many house photo references point at
+# them; uploading identical bytes again reuses the stored variants.
+# Unreferenced blobs are removed by `prune_unreferenced` after a grace period,
+# which covers uploads that were never attached to a house.
+
+# Magic-byte signatures of the image types we accept
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+_BLOB_URL = re.compile(r"/uploads/[0-9a-f]{2}/[0-9a-f]{2}/(?P<hash>[0-9a-f]{64})_\w+\.\w+$")
+
+
+class UnsupportedImageTypeError(Exception):
+    """Raised when an upload's bytes are not a supported image type."""
+
+
+def sniff_content_type(header: bytes) -> Optional[str]:
+    """Detect the image type from the first bytes of a file."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in _SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    return None
+
+
+def shard_path(content_hash: str) -> str:
+    return f"{content_hash[:2]}/{content_hash[2:4]}"
+
+
+def hash_from_url(url: str) -> Optional[str]:
+    """Content hash of a stored variant URL, or None for legacy flat uploads."""
+    match = _BLOB_URL.search(url)
+    return match.group("hash") if match else None
+
+
+class UploadStore:
+    def __init__(self, root: Path, url_prefix: str = "/uploads"):
+        self.root = root
+        self.url_prefix = url_prefix
+        self.incoming = root / ".incoming"
+        self.incoming.mkdir(parents=True, exist_ok=True)
+
+    def _urls(self, content_hash: str, variants: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        prefix = f"{self.url_prefix}/{shard_path(content_hash)}"
+        return {
+            variant: {image_format: f"{prefix}/{filename}" for image_format, filename in files.items()}
+            for variant, files in variants.items()
+        }
+
+    async def store(self, db, upload) -> Dict[str, Dict[str, str]]:
+        """Store an upload, reusing existing variants for identical bytes.
+
+        Returns {variant: {format: url}}.
+        """
+        staging = self.incoming / str(uuid.uuid4())
+        try:
+            size, content_hash = await stream_to_disk(upload, staging)
+            with open(staging, "rb") as f:
+                content_type = sniff_content_type(f.read(16))
+            if content_type is None:
+                raise UnsupportedImageTypeError("Only JPEG, PNG, WebP and GIF images are supported")
+
+            now = datetime.now(timezone.utc)
+            # Touching updated_at also restarts the prune grace period
+            existing = await db.upload_blobs.find_one_and_update(
+                {"hash": content_hash},
+                {"$set": {"updated_at": now}},
+                projection={"_id": 0, "variants": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if existing:
+                logger.info(f"Deduplicated upload {content_hash}")
+                return self._urls(content_hash, existing["variants"])
+
+            output_dir = self.root / shard_path(content_hash)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            variants = await process_upload(staging, output_dir, content_hash)
+        finally:
+            staging.unlink(missing_ok=True)
+
+        try:
+            await db.upload_blobs.insert_one({
+                "hash": content_hash,
+                "content_type": content_type,
+                "size": size,
+                "variants": variants,
+                "ref_count": 0,
+                "created_at": now,
+                "updated_at": now
+            })
+        except DuplicateKeyError:
+            # An identical upload finished first; both wrote the same files
+            pass
+        return self._urls(content_hash, variants)
+
+    async def _adjust_references(self, db, urls: Iterable[str], direction: int) -> None:
+        counts = Counter(h for h in (hash_from_url(url) for url in urls) if h)
+        if not counts:
+            return
+        now = datetime.now(timezone.utc)
+        await db.upload_blobs.bulk_write([
+            UpdateOne(
+                {"hash": content_hash},
+                {"$inc": {"ref_count": direction * count}, "$set": {"updated_at": now}}
+            )
+            for content_hash, count in counts.items()
+        ], ordered=False)
+
+    async def add_references(self, db, urls: Iterable[str]) -> None:
+        """Record that house photos now point at these upload URLs."""
+        await self._adjust_references(db, urls, 1)
+
+    async def release_references(self, db, urls: Iterable[str]) -> None:
+        """Record that house photos no longer point at these upload URLs."""
+        await self._adjust_references(db, urls, -1)
+
+    async def prune_unreferenced(self, db, grace: timedelta = timedelta(hours=24)) -> int:
+        """Delete blobs with no references that have not been touched within ``grace``."""
+        cutoff = datetime.now(timezone.utc) - grace
+        condition = {"ref_count": {"$lte": 0}, "updated_at": {"$lt": cutoff}}
+        removed = 0
+        async for blob in db.upload_blobs.find(condition, {"_id": 0, "hash": 1, "variants": 1}):
+            # Re-check atomically: a new reference or re-upload may have landed
+            deleted = await db.upload_blobs.find_one_and_delete({"hash": blob["hash"], **condition})
+            if not deleted:
+                continue
+            directory = self.root / shard_path(blob["hash"])
+            for files in blob["variants"].values():
+                for filename in files.values():
+                    (directory / filename).unlink(missing_ok=True)
+            removed += 1
+        if removed:
+            logger.info(f"Pruned {removed} unreferenced uploads")
+        return removed
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# (house_id, landlord_id, UTC day)
+ViewKey = Tuple[str, str, str]
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class ViewTracker:
+    """Counts house detail views in memory and flushes them in batches
+
+    ``record()`` only touches a Counter, so a view costs no database write.
+    Every ``flush_interval`` seconds the accumulated counts are written with
+    one unordered bulk_write per collection:
+
+    - ``houses.views``                      lifetime views per house
+    - ``house_views_daily``                 one document per house and UTC day
+    - ``landlord_stats.total_views``        dashboard total (landlord_stats.py)
+
+    A crash loses at most one interval of views; a failed flush puts its
+    counts back so the next flush retries them. With ``dedup_window`` set, a
+    viewer seen on the same house within that many seconds is not counted again.
+    """
+
+    def __init__(self, flush_interval: float = 10, dedup_window: float = 0, dedup_size: int = 100_000):
+        self.flush_interval = flush_interval
+        self._pending: "Counter[ViewKey]" = Counter()
+        self._recent = None
+        if dedup_window > 0:
+            self._recent = TTLCache(maxsize=dedup_size, ttl=dedup_window, name="recent_viewers")
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.recorded = 0
+        self.deduplicated = 0
+        self.flushed = 0
+
+    def record(self, house_id: str, landlord_id: str, viewer: Optional[str] = None) -> bool:
+        """Count one view; returns False if it was a repeat within the dedup window."""
+        if self._recent is not None and viewer:
+            key = (viewer, house_id)
+            if key in self._recent:
+                self.deduplicated += 1
+                return False
+            self._recent.set(key, True)
+        self._pending[(house_id, landlord_id, today())] += 1
+        self.recorded += 1
+        return True
+
+    @staticmethod
+    def _operations(counts: Counter) -> Dict[str, List[UpdateOne]]:
+        house_views: Counter = Counter()
+        landlord_views: Counter = Counter()
+        daily = []
+        for (house_id, landlord_id, day), views in counts.items():
+            house_views[house_id] += views
+            landlord_views[landlord_id] += views
+            daily.append(UpdateOne(
+                {"house_id": house_id, "day": day},
+                {"$inc": {"views": views}, "$setOnInsert": {"landlord_id": landlord_id}},
+                upsert=True
+            ))
+        return {
+            "houses": [
+                UpdateOne({"house_id": house_id}, {"$inc": {"views": views}})
+                for house_id, views in house_views.items()
+            ],
+            "house_views_daily": daily,
+            "landlord_stats": [
+                # No upsert: a landlord without a document is seeded from the
+                # houses' views on its first read or write (landlord_stats.py)
+                UpdateOne({"landlord_id": landlord_id}, {"$inc": {"total_views": views}})
+                for landlord_id, views in landlord_views.items()
+            ],
+        }
+
+    async def flush(self, db) -> int:
+        """Write all pending views. Returns the number of views flushed."""
+        async with self._flush_lock:
+            counts, self._pending = self._pending, Counter()
+            if not counts:
+                return 0
+            operations = self._operations(counts)
+            results = await asyncio.gather(*(
+                db[collection].bulk_write(ops, ordered=False)
+                for collection, ops in operations.items()
+            ), return_exceptions=True)
+
+            failed = {
+                collection: result
+                for collection, result in zip(operations, results)
+                if isinstance(result, BaseException)
+            }
+            for collection, error in failed.items():
+                logger.error(f"View flush to {collection} failed: {str(error)}")
+            if len(failed) == len(operations):
+                # Nothing was written; retry all of it on the next flush.
+                # Partial failures are not requeued, since that would double
+                # count the collections that did succeed.
+                self._pending.update(counts)
+                return 0
+
+            views = sum(counts.values())
+            self.flushed += views
+            return views
+
+    async def _run(self, db) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(db)
+            except Exception as e:
+                logger.error(f"View flush failed: {str(e)}")
+
+    def start(self, db) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self, db) -> None:
+        """Stop the periodic flush and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(db)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "recorded": self.recorded,
+            "deduplicated": self.deduplicated,
+            "flushed": self.flushed,
+            "pending": sum(self._pending.values()),
+            "flush_interval_seconds": self.flush_interval,
+        }
+
+
+async def daily_views(db, house_id: str, days: int) -> List[Dict[str, Any]]:
+    """Views per UTC day for the last ``days`` days, oldest first, zero-filled."""
+    end = datetime.now(timezone.utc).date()
+    start = end - timedelta(days=days - 1)
+    counts = {
+        doc["day"]: doc["views"]
+        async for doc in db.house_views_daily.find(
+            {"house_id": house_id, "day": {"$gte": start.isoformat()}},
+            {"_id": 0, "day": 1, "views": 1}
+        )
+    }
+    return [
+        {"day": day, "views": counts.get(day, 0)}
+        for day in ((start + timedelta(days=i)).isoformat() for i in range(days))
+    ]
@@ -8,19 +8,23 @@ import { useAuth } from '../context/AuthContext';
 import axios from 'axios';
 import { toast } from 'sonner';
 
-const HouseCard = ({ house, onSaveToggle }) => {
+// Pass `saved` when the parent already knows the saved state (e.g. from a bulk
+// POST /tenant/is-saved); otherwise the card looks it up itself.
+const HouseCard = ({ house, onSaveToggle, saved }) => {
   const navigate = useNavigate();
   const { user, token } = useAuth();
-  const [isSaved, setIsSaved] = useState(false);
+  const [isSaved, setIsSaved] = useState(saved ?? false);
   const [checkingSaved, setCheckingSaved] = useState(false);
   const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
   const API = `${BACKEND_URL}/api`;
 
   useEffect(() => {
-    if (user?.role === 'tenant' && token) {
+    if (saved !== undefined) {
+      setIsSaved(saved);
+    } else if (user?.role === 'tenant' && token) {
       checkIfSaved();
     }
-  }, [house.house_id, user, token]);
+  }, [house.house_id, user, token, saved]);
 
   const checkIfSaved = async () => {
     try {
@@ -73,8 +77,9 @@ const HouseCard = ({ house, onSaveToggle }) => {
   };
 
   const defaultImage = 'https://images.unsplash.com/photo-1568605114967-8130f3a36994?w=500';
+  // Processed uploads store a small variant next to the full-size image
   const imageUrl = house.photos && house.photos.length > 0 
-    ? `${BACKEND_URL}${house.photos[0]}`
+    ? `${BACKEND_URL}${house.photos[0].replace(/_full\.jpg$/, '_thumb.jpg')}`
     : defaultImage;
 
   return (
@@ -0,0 +1,24 @@
+import axios from 'axios';
+
+// List endpoints return one page at a time and put the cursor for the next
+// page in the X-Next-Cursor header (absent on the last page).
+const MAX_PAGE_SIZE = 200;
+
+export async function fetchPage(url, config = {}, cursor = null) {
+  const params = { ...config.params };
+  if (cursor) params.cursor = cursor;
+  const response = await axios.get(url, { ...config, params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+}
+
+// Follows the cursor to the end, for views that show the whole list
+export async function fetchAllPages(url, config = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const page = await fetchPage(url, { ...config, params: { limit: MAX_PAGE_SIZE, ...config.params } }, cursor);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return items;
+}
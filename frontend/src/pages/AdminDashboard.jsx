@@ -9,6 +9,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import { toast } from 'sonner';
 import { Users, Home, Clock, CheckCircle, XCircle } from 'lucide-react';
 import { useSearchParams } from 'react-router-dom';
+import { fetchAllPages } from '../lib/pagination';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -37,17 +38,17 @@ const AdminDashboard = () => {
         axios.get(`${API}/admin/stats`, {
           headers: { Authorization: `Bearer ${token}` }
         }),
-        axios.get(`${API}/admin/pending-houses`, {
+        fetchAllPages(`${API}/admin/pending-houses`, {
           headers: { Authorization: `Bearer ${token}` }
         }),
-        axios.get(`${API}/admin/users`, {
+        fetchAllPages(`${API}/admin/users`, {
           headers: { Authorization: `Bearer ${token}` }
         })
       ]);
 
       setStats(statsRes.data);
-      setPendingHouses(housesRes.data);
-      setUsers(usersRes.data);
+      setPendingHouses(housesRes);
+      setUsers(usersRes);
     } catch (error) {
       toast.error('Failed to fetch admin data');
     } finally {
@@ -1,20 +1,26 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import HouseCard from '../components/HouseCard';
+import { useAuth } from '../context/AuthContext';
 import { Search, MapPin, DollarSign, BedDouble, CheckCircle, Home as HomeIcon, CreditCard } from 'lucide-react';
 import { Input } from '../components/ui/input';
 import { Button } from '../components/ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { Card, CardContent } from '../components/ui/card';
 import { toast } from 'sonner';
+import { fetchPage } from '../lib/pagination';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const HomePage = () => {
+  const { user, token } = useAuth();
   const [houses, setHouses] = useState([]);
   const [featuredHouses, setFeaturedHouses] = useState([]);
+  const [savedMap, setSavedMap] = useState({});
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({
     location: '',
     num_rooms: '',
@@ -27,19 +33,44 @@ const HomePage = () => {
     fetchFeaturedHouses();
   }, []);
 
+  useEffect(() => {
+    fetchSavedState();
+  }, [houses, featuredHouses, user, token]);
+
+  // One request for the saved state of every card on the page
+  const fetchSavedState = async () => {
+    if (user?.role !== 'tenant' || !token) return;
+    const houseIds = [...new Set([...houses, ...featuredHouses].map((house) => house.house_id))];
+    if (houseIds.length === 0) return;
+    try {
+      const response = await axios.post(
+        `${API}/tenant/is-saved`,
+        { house_ids: houseIds },
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setSavedMap(response.data.saved);
+    } catch (error) {
+      console.error('Failed to check saved houses', error);
+    }
+  };
+
+  const searchUrl = () => {
+    const params = new URLSearchParams();
+    params.append('status', 'available');
+    
+    if (filters.location) params.append('location', filters.location);
+    if (filters.num_rooms) params.append('num_rooms', filters.num_rooms);
+    if (filters.min_price) params.append('min_price', filters.min_price);
+    if (filters.max_price) params.append('max_price', filters.max_price);
+    return `${API}/houses?${params.toString()}`;
+  };
+
   const fetchHouses = async () => {
     try {
       setLoading(true);
-      const params = new URLSearchParams();
-      params.append('status', 'available');
-      
-      if (filters.location) params.append('location', filters.location);
-      if (filters.num_rooms) params.append('num_rooms', filters.num_rooms);
-      if (filters.min_price) params.append('min_price', filters.min_price);
-      if (filters.max_price) params.append('max_price', filters.max_price);
-
-      const response = await axios.get(`${API}/houses?${params.toString()}`);
-      setHouses(response.data);
+      const page = await fetchPage(searchUrl());
+      setHouses(page.items);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Failed to fetch houses', error);
       toast.error('Failed to load houses');
@@ -48,11 +79,26 @@ const HomePage = () => {
     }
   };
 
+  // Next page of the current search; the cursor carries the filters' sort position
+  const loadMoreHouses = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(searchUrl(), {}, nextCursor);
+      setHouses((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Failed to fetch more houses', error);
+      toast.error('Failed to load more houses');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchFeaturedHouses = async () => {
     try {
-      const response = await axios.get(`${API}/houses?status=available`);
-      // Get first 6 houses as featured
-      setFeaturedHouses(response.data.slice(0, 6));
+      // First 6 houses are featured
+      const response = await axios.get(`${API}/houses?status=available&limit=6`);
+      setFeaturedHouses(response.data);
     } catch (error) {
       console.error('Failed to fetch featured houses', error);
     }
@@ -196,7 +242,7 @@ const HomePage = () => {
             <h2 className="text-3xl font-bold text-gray-800 mb-8">Featured Properties</h2>
             <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
               {featuredHouses.map((house) => (
-                <HouseCard key={house.house_id} house={house} />
+                <HouseCard key={house.house_id} house={house} saved={savedMap[house.house_id] ?? false} />
               ))}
             </div>
           </div>
@@ -218,10 +264,23 @@ const HomePage = () => {
         ) : (
           <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6" data-testid="houses-grid">
             {houses.map((house) => (
-              <HouseCard key={house.house_id} house={house} />
+              <HouseCard key={house.house_id} house={house} saved={savedMap[house.house_id] ?? false} />
             ))}
           </div>
         )}
+
+        {!loading && nextCursor && (
+          <div className="text-center mt-8">
+            <Button
+              variant="outline"
+              onClick={loadMoreHouses}
+              disabled={loadingMore}
+              data-testid="load-more-houses"
+            >
+              {loadingMore ? 'Loading...' : 'Load more properties'}
+            </Button>
+          </div>
+        )}
       </section>
 
       {/* Footer Section */}
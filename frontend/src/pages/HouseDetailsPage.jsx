@@ -7,6 +7,7 @@ import { Button } from '../components/ui/button';
 import { Textarea } from '../components/ui/textarea';
 import { Badge } from '../components/ui/badge';
 import { toast } from 'sonner';
+import { fetchPage } from '../lib/pagination';
 import { MapPin, BedDouble, DollarSign, ArrowLeft, Star } from 'lucide-react';
 import {
   Dialog,
@@ -29,16 +30,22 @@ const HouseDetailsPage = () => {
   const [showBookingDialog, setShowBookingDialog] = useState(false);
   const [bookingMessage, setBookingMessage] = useState('');
   const [feedbacks, setFeedbacks] = useState([]);
+  const [feedbackCursor, setFeedbackCursor] = useState(null);
+  const [booking, setBooking] = useState(null);
 
   useEffect(() => {
     fetchHouseDetails();
-    fetchFeedbacks();
-  }, [id]);
+  }, [id, token]);
 
   const fetchHouseDetails = async () => {
     try {
-      const response = await axios.get(`${API}/houses/${id}`);
-      setHouse(response.data);
+      // One call returns the house, its feedback and the tenant's booking state
+      const headers = token ? { Authorization: `Bearer ${token}` } : {};
+      const response = await axios.get(`${API}/houses/${id}/full`, { headers });
+      setHouse(response.data.house);
+      setFeedbacks(response.data.feedback);
+      setFeedbackCursor(response.data.feedback_next_cursor);
+      setBooking(response.data.booking);
     } catch (error) {
       toast.error('Failed to load house details');
     } finally {
@@ -46,12 +53,13 @@ const HouseDetailsPage = () => {
     }
   };
 
-  const fetchFeedbacks = async () => {
+  const loadMoreFeedback = async () => {
     try {
-      const response = await axios.get(`${API}/houses/${id}/feedback`);
-      setFeedbacks(response.data);
+      const page = await fetchPage(`${API}/houses/${id}/feedback`, {}, feedbackCursor);
+      setFeedbacks((current) => [...current, ...page.items]);
+      setFeedbackCursor(page.nextCursor);
     } catch (error) {
-      console.error('Failed to fetch feedbacks', error);
+      toast.error('Failed to load more reviews');
     }
   };
 
@@ -68,11 +76,12 @@ const HouseDetailsPage = () => {
     }
 
     try {
-      await axios.post(
+      const response = await axios.post(
         `${API}/bookings`,
         { house_id: id, message: bookingMessage },
         { headers: { Authorization: `Bearer ${token}` } }
       );
+      setBooking(response.data);
       toast.success('Booking request sent successfully!');
       setShowBookingDialog(false);
       setBookingMessage('');
@@ -108,9 +117,9 @@ const HouseDetailsPage = () => {
     }
   };
 
-  const averageRating = feedbacks.length > 0
-    ? (feedbacks.reduce((sum, f) => sum + f.rating, 0) / feedbacks.length).toFixed(1)
-    : 0;
+  // Aggregates are maintained server-side; feedbacks only holds the first page
+  const ratingCount = house.rating_count || 0;
+  const averageRating = ratingCount > 0 ? house.rating_avg.toFixed(1) : 0;
 
   return (
     <div className="min-h-screen py-8" data-testid="house-details-page">
@@ -169,7 +178,7 @@ const HouseDetailsPage = () => {
                   <div className="flex items-center text-yellow-500">
                     <Star className="w-5 h-5 fill-current" />
                     <span className="ml-1 text-gray-700 font-semibold">{averageRating}</span>
-                    <span className="ml-1 text-gray-500 text-sm">({feedbacks.length} reviews)</span>
+                    <span className="ml-1 text-gray-500 text-sm">({ratingCount} reviews)</span>
                   </div>
                 </div>
 
@@ -195,7 +204,12 @@ const HouseDetailsPage = () => {
                   <p className="text-gray-600 leading-relaxed">{house.description}</p>
                 </div>
 
-                {house.status === 'available' && (
+                {house.status === 'available' && booking?.status === 'pending' && (
+                  <Button className="w-full" disabled data-testid="booking-requested-btn">
+                    Booking Requested
+                  </Button>
+                )}
+                {house.status === 'available' && booking?.status !== 'pending' && (
                   <Button 
                     className="w-full" 
                     onClick={() => setShowBookingDialog(true)}
@@ -242,6 +256,13 @@ const HouseDetailsPage = () => {
                 </Card>
               ))}
             </div>
+            {feedbackCursor && (
+              <div className="text-center mt-6">
+                <Button variant="outline" onClick={loadMoreFeedback} data-testid="load-more-feedback">
+                  Load more reviews
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </div>
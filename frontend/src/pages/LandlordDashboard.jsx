@@ -28,6 +28,7 @@ import {
   DialogTitle,
 } from '../components/ui/dialog';
 import { useSearchParams } from 'react-router-dom';
+import { fetchAllPages } from '../lib/pagination';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -64,10 +65,10 @@ const LandlordDashboard = () => {
 
   const fetchHouses = async () => {
     try {
-      const response = await axios.get(`${API}/my-houses`, {
+      const houses = await fetchAllPages(`${API}/my-houses`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setHouses(response.data);
+      setHouses(houses);
     } catch (error) {
       toast.error('Failed to fetch houses');
     } finally {
@@ -77,10 +78,10 @@ const LandlordDashboard = () => {
 
   const fetchBookings = async () => {
     try {
-      const response = await axios.get(`${API}/bookings/received`, {
+      const bookings = await fetchAllPages(`${API}/bookings/received`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setBookings(response.data);
+      setBookings(bookings);
     } catch (error) {
       toast.error('Failed to fetch bookings');
     }
@@ -188,7 +189,10 @@ const LandlordDashboard = () => {
     useEffect(() => {
       const fetchDetails = async () => {
         try {
-          const houseRes = await axios.get(`${API}/houses/${booking.house_id}`);
+          // Not a listing view: don't count it in the house's analytics
+          const houseRes = await axios.get(`${API}/houses/${booking.house_id}?count_view=false`, {
+            headers: { Authorization: `Bearer ${token}` }
+          });
           setHouseDetails(houseRes.data);
         } catch (error) {
           console.error('Failed to fetch details');
@@ -8,6 +8,9 @@ import { CheckCircle, XCircle, Loader2 } from 'lucide-react';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Chapa can redirect back before the payment settles; poll a few times
+const VERIFY_ATTEMPTS = 5;
+const VERIFY_INTERVAL_MS = 3000;
 
 const PaymentCallback = () => {
   const [searchParams] = useSearchParams();
@@ -17,7 +20,10 @@ const PaymentCallback = () => {
   const [message, setMessage] = useState('Verifying your payment...');
 
   useEffect(() => {
-    const verifyPayment = async () => {
+    let cancelled = false;
+    let timer;
+
+    const verifyPayment = async (attempt = 1) => {
       const txRef = searchParams.get('tx_ref');
       const chapaStatus = searchParams.get('status');
 
@@ -32,20 +38,32 @@ const PaymentCallback = () => {
           headers: { Authorization: `Bearer ${token}` }
         });
 
+        if (cancelled) return;
         if (response.data.status === 'success') {
           setStatus('success');
           setMessage('Payment verified successfully!');
+        } else if (response.data.status === 'pending' && attempt < VERIFY_ATTEMPTS) {
+          setMessage('Waiting for the payment to complete...');
+          timer = setTimeout(() => verifyPayment(attempt + 1), VERIFY_INTERVAL_MS);
+        } else if (response.data.status === 'pending') {
+          setStatus('failed');
+          setMessage('Payment not completed yet. Check your bookings again in a few minutes.');
         } else {
           setStatus('failed');
           setMessage('Payment verification failed');
         }
       } catch (error) {
+        if (cancelled) return;
         setStatus('failed');
         setMessage(error.response?.data?.detail || 'Payment verification failed');
       }
     };
 
     verifyPayment();
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [searchParams, token]);
 
   return (
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useAuth } from '../context/AuthContext';
 import DashboardLayout from '../components/DashboardLayout';
@@ -10,6 +10,7 @@ import { toast } from 'sonner';
 import { Clock, CheckCircle, XCircle, MapPin, CreditCard, Heart } from 'lucide-react';
 import HouseCard from '../components/HouseCard';
 import { useSearchParams } from 'react-router-dom';
+import { fetchAllPages } from '../lib/pagination';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -21,6 +22,7 @@ const TenantDashboard = () => {
   const [savedHouses, setSavedHouses] = useState([]);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState(searchParams.get('tab') || 'overview');
+  const paymentKeys = useRef({});
 
   useEffect(() => {
     fetchBookings();
@@ -34,10 +36,10 @@ const TenantDashboard = () => {
 
   const fetchBookings = async () => {
     try {
-      const response = await axios.get(`${API}/bookings/my-requests`, {
+      const bookings = await fetchAllPages(`${API}/bookings/my-requests`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setBookings(response.data);
+      setBookings(bookings);
     } catch (error) {
       toast.error('Failed to fetch bookings');
     } finally {
@@ -47,26 +49,35 @@ const TenantDashboard = () => {
 
   const fetchSavedHouses = async () => {
     try {
-      const response = await axios.get(`${API}/tenant/saved-houses`, {
+      const savedHouses = await fetchAllPages(`${API}/tenant/saved-houses`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setSavedHouses(response.data);
+      setSavedHouses(savedHouses);
     } catch (error) {
       console.error('Failed to fetch saved houses', error);
     }
   };
 
   const handleProceedToPayment = async (bookingId) => {
+    // Repeated clicks for a booking share one key, so the server returns the
+    // same checkout instead of starting another
+    paymentKeys.current[bookingId] ??= crypto.randomUUID();
     try {
       const response = await axios.post(
         `${API}/payment/initialize`,
         { booking_id: bookingId, amount: 500, currency: 'ETB' },
-        { headers: { Authorization: `Bearer ${token}` } }
+        {
+          headers: {
+            Authorization: `Bearer ${token}`,
+            'Idempotency-Key': paymentKeys.current[bookingId]
+          }
+        }
       );
       
       // Redirect to Chapa checkout
       window.location.href = response.data.checkout_url;
     } catch (error) {
+      delete paymentKeys.current[bookingId];
       toast.error(error.response?.data?.detail || 'Failed to initialize payment');
     }
   };
@@ -99,7 +110,10 @@ const TenantDashboard = () => {
     useEffect(() => {
       const fetchHouse = async () => {
         try {
-          const response = await axios.get(`${API}/houses/${booking.house_id}`);
+          // Not a listing view: don't count it in the house's analytics
+          const response = await axios.get(`${API}/houses/${booking.house_id}?count_view=false`, {
+            headers: { Authorization: `Bearer ${token}` }
+          });
           setHouseDetails(response.data);
         } catch (error) {
           console.error('Failed to fetch house details');
@@ -262,7 +276,7 @@ const TenantDashboard = () => {
             ) : (
               <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
                 {savedHouses.map(house => (
-                  <HouseCard key={house.house_id} house={house} onSaveToggle={fetchSavedHouses} />
+                  <HouseCard key={house.house_id} house={house} onSaveToggle={fetchSavedHouses} saved />
                 ))}
               </div>
             )}